@@ -0,0 +1,312 @@
+# benchmarks/bench_database.py
+
+"""
+Headless benchmark for database_manager and ProjectController.
+
+    python -m benchmarks.bench_database --size small --output results.json
+    python -m benchmarks.bench_database --size small --compare results.json
+
+A deterministic synthetic database is generated in a temporary directory and the
+app is pointed at it through FREELANCER_HUB_DB, so the real freelancer_hub.db is
+never opened. Every case is timed with a warm connection (pooled connection and
+page cache and reference cache reused) and cold (connection pool closed and
+reference cache cleared before each run; the OS file cache stays warm). Results are p50/p95/mean in milliseconds plus rows/sec.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.synthetic_data import SIZES, generate_database
+
+# A case regresses when its p50 is this much slower than the baseline...
+DEFAULT_THRESHOLD = 0.25
+# ...and at least this many milliseconds slower (keeps sub-millisecond noise out).
+DEFAULT_MIN_DELTA_MS = 0.5
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+def count_rows(result):
+    """How many rows a case produced, for rows/sec. Generators are consumed here."""
+    if result is None:
+        return 0
+    if isinstance(result, dict):
+        if "time_entries" in result and "invoices" in result:
+            return len(result["time_entries"]) + len(result["invoices"])
+        return len(result)
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, (int, float, str)):
+        return 1
+    return sum(1 for _ in result)
+
+
+class Case:
+    """
+    One benchmarked call. `setup()` runs untimed before every iteration and returns
+    the positional arguments for `fn`; generators returned by `fn` are drained inside
+    the timed region so streaming functions are measured end to end.
+    """
+
+    def __init__(self, name, fn, setup=None, mutates=False):
+        self.name = name
+        self.fn = fn
+        self.setup = setup or (lambda: ())
+        self.mutates = mutates
+
+    def run_once(self, before_timing=None):
+        args = self.setup()
+        if before_timing is not None:
+            before_timing()
+        started = time.perf_counter()
+        rows = count_rows(self.fn(*args))
+        return time.perf_counter() - started, rows
+
+
+def _pick_ids(conn):
+    """Representative ids: the busiest project (worst case) and a typical one."""
+    busiest = conn.execute("SELECT project_id FROM time_entries GROUP BY project_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+    typical = conn.execute("SELECT id FROM projects ORDER BY id LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM projects)").fetchone()[0]
+    return busiest, typical
+
+
+def build_cases(db, controller, seed):
+    """Returns the read cases followed by the mutation cases."""
+    rng = random.Random(seed)
+    conn = db.get_db_connection()
+    busiest, typical = _pick_ids(conn)
+    client_ids = [row[0] for row in conn.execute("SELECT id FROM clients")]
+    conn.close()
+
+    reads = [
+        Case("user_exists", db.user_exists),
+        Case("get_all_settings", db.get_all_settings),
+        Case("get_all_clients", db.get_all_clients),
+        Case("get_client_by_id", db.get_client_by_id, lambda: (rng.choice(client_ids),)),
+        Case("get_all_projects_with_client_name", db.get_all_projects_with_client_name),
+        Case("get_project_details", db.get_project_details, lambda: (typical,)),
+        Case("get_time_entries_for_project[busiest]", db.get_time_entries_for_project, lambda: (busiest,)),
+        Case("get_unbilled_time_for_project[busiest]", db.get_unbilled_time_for_project, lambda: (busiest,)),
+        Case("get_unbilled_line_items[busiest,entry]", db.get_unbilled_line_items, lambda: (busiest, "entry")),
+        Case("get_unbilled_line_items[busiest,week]", db.get_unbilled_line_items, lambda: (busiest, "week")),
+        Case("get_unbilled_line_items[busiest,tag]", db.get_unbilled_line_items, lambda: (busiest, "tag")),
+        Case("get_invoices_for_project[busiest]", db.get_invoices_for_project, lambda: (busiest,)),
+        Case("get_project_financial_summary[busiest]", db.get_project_financial_summary, lambda: (busiest,)),
+        Case("get_project_financial_summary[typical]", db.get_project_financial_summary, lambda: (typical,)),
+        Case("get_all_project_financial_summaries", db.get_all_project_financial_summaries),
+        Case("get_client_financial_summaries", db.get_client_financial_summaries),
+        Case("get_all_invoices_with_details", db.get_all_invoices_with_details),
+        Case("get_all_expenses", db.get_all_expenses),
+        Case("get_next_invoice_number", db.get_next_invoice_number),
+        Case("get_dashboard_kpis", db.get_dashboard_kpis),
+        Case("get_recent_activity", db.get_recent_activity),
+        Case("get_monthly_income_summary", db.get_monthly_income_summary),
+        Case("get_clients_page", db.get_clients_page),
+        Case("get_time_entries_page[busiest]", db.get_time_entries_page, lambda: (busiest,)),
+        Case("get_invoices_page", db.get_invoices_page),
+        Case("get_expenses_page", db.get_expenses_page),
+        Case("iter_clients", db.iter_clients),
+        Case("iter_time_entries_for_project[busiest]", db.iter_time_entries_for_project, lambda: (busiest,)),
+        Case("iter_invoices_with_details", db.iter_invoices_with_details),
+        Case("iter_expenses", db.iter_expenses),
+        Case("count_table_rows[time_entries]", db.count_table_rows, lambda: ("time_entries",)),
+        Case("get_table_page[invoices]", db.get_table_page, lambda: ("invoices",)),
+        Case("get_project_revision", db.get_project_revision, lambda: (busiest,)),
+        Case("search_all[common prefix]", db.search_all, lambda: ("re",)),
+        Case("get_time_series[3y,week]", db.get_time_series, lambda: ("2023-07-01", "2026-06-30", "week")),
+        Case("get_time_series[3y,month,client]", db.get_time_series, lambda: ("2023-07-01", "2026-06-30", "month", rng.choice(client_ids))),
+        Case("search_all[two words]", db.search_all, lambda: ("api mig",)),
+        Case("get_project_dashboard_snapshot[busiest]", db.get_project_dashboard_snapshot, lambda: (busiest,)),
+        Case("ProjectController.get_project_dashboard_data[busiest]", controller.get_project_dashboard_data, lambda: (busiest,)),
+        Case("ProjectController.get_project_dashboard_data[typical]", controller.get_project_dashboard_data, lambda: (typical,)),
+    ]
+
+    def invoice_args():
+        # Bills up to 20 unbilled entries of a random project, the way CreateInvoiceDialog does.
+        conn = db.get_db_connection()
+        project = conn.execute(
+            "SELECT p.id, p.client_id, p.rate FROM projects p WHERE EXISTS (SELECT 1 FROM time_entries te WHERE te.project_id = p.id AND te.is_billed = 0 AND te.duration_minutes IS NOT NULL) "
+            "ORDER BY p.id LIMIT 1 OFFSET ?", (rng.randint(0, 50),)
+        ).fetchone()
+        conn.close()
+        entries = db.get_unbilled_time_for_project(project["id"])[:20]
+        hours = sum(e["duration_minutes"] for e in entries) / 60.0
+        total = hours * project["rate"]
+        invoice_data = {"invoice_number": None, "client_id": project["client_id"],
+                        "issue_date": datetime.now().date().isoformat(),
+                        "due_date": (datetime.now() + timedelta(days=30)).date().isoformat(), "total_amount": total}
+        items = [{"description": "Benchmark work", "quantity": hours, "rate": project["rate"], "amount": total}]
+        return invoice_data, items, [e["id"] for e in entries]
+
+    def new_expense_id():
+        db.add_expense("Benchmark expense", "Other", 10.0, "2026-01-01")
+        conn = db.get_db_connection()
+        expense_id = conn.execute("SELECT MAX(id) FROM expenses").fetchone()[0]
+        conn.close()
+        return (expense_id,)
+
+    def latest_invoice_id():
+        conn = db.get_db_connection()
+        invoice_id = conn.execute("SELECT MAX(id) FROM invoices").fetchone()[0]
+        conn.close()
+        return (invoice_id,)
+
+    counter = iter(range(10 ** 9))
+    mutations = [
+        Case("add_client", db.add_client, lambda: (f"Bench Client {next(counter)}", "bench@example.com", "1 Bench Rd"), mutates=True),
+        Case("add_project", db.add_project, lambda: (f"Bench Project {next(counter)}", rng.choice(client_ids), 100.0), mutates=True),
+        Case("add_expense", db.add_expense, lambda: ("Benchmark expense", "Other", 12.5, "2026-01-01"), mutates=True),
+        Case("start_time_entry", db.start_time_entry, lambda: (typical, datetime.now()), mutates=True),
+        Case("stop_time_entry", db.stop_time_entry,
+             lambda: (db.start_time_entry(typical, datetime.now()), datetime.now(), 30, "Benchmark entry"), mutates=True),
+        Case("create_invoice_from_time_entries", db.create_invoice_from_time_entries, invoice_args, mutates=True),
+        Case("update_invoice_pdf_path", db.update_invoice_pdf_path, lambda: latest_invoice_id() + ("bench.pdf",), mutates=True),
+        Case("delete_invoice", db.delete_invoice, latest_invoice_id, mutates=True),
+        Case("delete_expense", db.delete_expense, new_expense_id, mutates=True),
+        Case("save_setting", db.save_setting, lambda: ("benchmark_key", str(next(counter))), mutates=True),
+    ]
+    return reads + mutations
+
+
+def run_cases(cases, db, repeat, warmup, modes=("warm", "cold")):
+    from database.reference_cache import reference_cache
+
+    def cold_reset():
+        db.connection_manager.close_all()
+        reference_cache.clear()
+
+    results = {}
+    for case in cases:
+        results[case.name] = {}
+        for mode in modes:
+            for _ in range(warmup if mode == "warm" else 0):
+                case.run_once()
+            samples, rows = [], 0
+            reset = cold_reset if mode == "cold" else None
+            for _ in range(repeat):
+                elapsed, rows = case.run_once(reset)
+                samples.append(elapsed)
+            p50 = percentile(samples, 0.50)
+            results[case.name][mode] = {
+                "p50_ms": p50 * 1000.0,
+                "p95_ms": percentile(samples, 0.95) * 1000.0,
+                "mean_ms": sum(samples) / len(samples) * 1000.0,
+                "rows": rows,
+                "rows_per_sec": rows / p50 if p50 > 0 else None,
+                "runs": repeat,
+            }
+        print(f"  {case.name:<58} warm p50 {results[case.name]['warm']['p50_ms']:9.3f} ms   "
+              f"cold p50 {results[case.name]['cold']['p50_ms']:9.3f} ms   rows {results[case.name]['warm']['rows']}")
+    return results
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """Returns a list of regression descriptions (empty if none) between two reports."""
+    regressions = []
+    for name, modes in report["results"].items():
+        for mode, stats in modes.items():
+            previous = baseline.get("results", {}).get(name, {}).get(mode)
+            if not previous:
+                continue
+            old, new = previous["p50_ms"], stats["p50_ms"]
+            if new > old * (1.0 + threshold) and new - old > min_delta_ms:
+                regressions.append(f"{name} [{mode}]: p50 {old:.3f} ms -> {new:.3f} ms ({(new / old - 1.0) * 100.0:+.0f}%)")
+    return regressions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the database layer against a synthetic database.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small", help="dataset preset (default: small)")
+    for table in ("clients", "projects", "time_entries", "invoices", "expenses"):
+        parser.add_argument(f"--{table.replace('_', '-')}", type=int, dest=table, help=f"override the preset's {table} count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=15, help="timed runs per case and mode")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed runs before the warm pass")
+    parser.add_argument("--filter", default=None, help="only run cases whose name contains this text")
+    parser.add_argument("--reads-only", action="store_true", help="skip the mutation cases")
+    parser.add_argument("--no-reference-cache", action="store_true", help="disable the reference data cache")
+    parser.add_argument("--db", default=None, help="reuse/create the synthetic database at this path instead of a temp file")
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    parser.add_argument("--compare", default=None, help="baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed p50 slowdown as a fraction (default: 0.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    sizes = dict(SIZES[args.size])
+    sizes.update({k: getattr(args, k) for k in sizes if getattr(args, k) is not None})
+
+    with tempfile.TemporaryDirectory(prefix="freelancer_hub_bench_") as tmp:
+        db_path = args.db or os.path.join(tmp, "bench.db")
+        dataset = {"size": args.size, **sizes, "seed": args.seed}
+        if not os.path.exists(db_path):
+            dataset.update(generate_database(db_path, seed=args.seed, **sizes))
+
+        # Must be set before database_manager is imported: it binds DB_FILE at import time.
+        os.environ["FREELANCER_HUB_DB"] = db_path
+        from database import database_manager as db
+        from controllers.project_controller import ProjectController
+        if os.path.abspath(db.DB_FILE) != os.path.abspath(db_path):
+            print("database_manager was already imported with another database; refusing to run.")
+            return 2
+        db.initialize_database()
+
+        if args.no_reference_cache:
+            from database.reference_cache import set_enabled
+            set_enabled(False)
+        cases = build_cases(db, ProjectController(), args.seed)
+        if args.reads_only:
+            cases = [c for c in cases if not c.mutates]
+        if args.filter:
+            cases = [c for c in cases if args.filter in c.name]
+
+        print(f"Running {len(cases)} cases x {args.repeat} runs (warm and cold) on {db_path}")
+        results = run_cases(cases, db, args.repeat, args.warmup)
+        db.connection_manager.close_all()
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "dataset": dataset,
+        "reference_cache": not args.no_reference_cache,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("dataset", {}).get("size") != args.size:
+            print(f"Warning: baseline was recorded with dataset '{baseline.get('dataset', {}).get('size')}', not '{args.size}'.")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold * 100:.0f}%:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# benchmarks/bench_palette.py
+
+"""
+Benchmark for the command palette index (shared/fuzzy_index.py).
+
+    python -m benchmarks.bench_palette
+    python -m benchmarks.bench_palette --entities 10000 100000 --output palette_results.json
+
+Entities are generated in memory with the naming scheme of synthetic_data.py:
+10% clients, 30% projects, 60% invoices, plus the sidebar pages. Each query is
+typed one character at a time, the way the palette searches on every keystroke,
+and every keystroke is timed. Reported per size: build time, peak Python memory
+while building, keystroke latency (median, p95, max) against the 5 ms budget, and
+the cost of an incremental update (one renamed project, re-synced).
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+DEFAULT_SIZES = (10_000, 100_000)
+BUDGET_MS = 5.0
+PAGES = ["Dashboard", "Projects", "Time Tracking", "Invoices", "Expenses", "Clients", "Settings"]
+QUERIES = ["client 00042", "inv-2025-0001", "api project", "acme", "settings", "deploy design", "clnt 0042", "tm trck", "re"]
+
+
+def entities(count, seed=42):
+    """Returns {kind: [(id, label, detail)]} for `count` entities."""
+    from benchmarks.synthetic_data import WORDS
+    rng = random.Random(seed)
+    clients = [(i, f"Client {i:05d} {rng.choice(WORDS).capitalize()}", f"client{i}@example.com") for i in range(1, count // 10 + 1)]
+    client_names = [name for _, name, _ in clients]
+    projects = [(i, f"{' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 2))).capitalize()} Project {i}", rng.choice(client_names))
+                for i in range(1, count * 3 // 10 + 1)]
+    invoices = [(i, f"INV-{rng.randint(2023, 2026)}-{i:06d}", rng.choice(client_names)) for i in range(1, count - len(clients) - len(projects) + 1)]
+    return {"client": clients, "project": projects, "invoice": invoices}
+
+
+def build(data):
+    from shared.fuzzy_index import FuzzyIndex
+    index = FuzzyIndex()
+    index.sync("page", ((i, name, "") for i, name in enumerate(PAGES)))
+    for kind, rows in data.items():
+        index.sync(kind, rows)
+    return index
+
+
+def run(count, seed):
+    data = entities(count, seed)
+    started = time.perf_counter()
+    index = build(data)
+    build_seconds = time.perf_counter() - started
+    tracemalloc.start()
+    build(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = []
+    for query in QUERIES:
+        for end in range(1, len(query) + 1):
+            started = time.perf_counter()
+            index.search(query[:end])
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    # One renamed project: sync() diffs every row but re-indexes a single entity.
+    projects = list(data["project"])
+    projects[len(projects) // 2] = (projects[len(projects) // 2][0], "Renamed Benchmark Project", projects[0][2])
+    started = time.perf_counter()
+    changed = index.sync("project", projects)
+    sync_ms = (time.perf_counter() - started) * 1000
+
+    return {"entities": len(index), "build_seconds": build_seconds, "peak_mb": peak / 1024 / 1024,
+            "keystrokes": len(latencies), "median_ms": statistics.median(latencies),
+            "p95_ms": latencies[int(len(latencies) * 0.95) - 1], "max_ms": latencies[-1],
+            "over_budget": sum(1 for ms in latencies if ms > BUDGET_MS), "sync_changed": changed, "sync_ms": sync_ms,
+            "stats": index.stats()}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, nargs="+", default=list(DEFAULT_SIZES), help="entity counts to index")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    results = []
+    for count in args.entities:
+        result = run(count, args.seed)
+        results.append(result)
+        print(f"  {result['entities']:>7} entities  build {result['build_seconds']:6.2f} s  peak {result['peak_mb']:6.1f} MiB  "
+              f"keystroke median {result['median_ms']:5.2f} ms  p95 {result['p95_ms']:5.2f} ms  max {result['max_ms']:5.2f} ms  "
+              f"({result['over_budget']}/{result['keystrokes']} over {BUDGET_MS:g} ms)  sync {result['sync_ms']:6.1f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
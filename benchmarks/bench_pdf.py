@@ -0,0 +1,98 @@
+# benchmarks/bench_pdf.py
+
+"""
+Benchmark for the invoice PDF renderer (shared/pdf_generator.py).
+
+    python -m benchmarks.bench_pdf
+    python -m benchmarks.bench_pdf --items 1000 10000 50000 --output pdf_results.json
+
+Line items are produced by a generator, the way rows stream from a database
+cursor, with a mix of short and long (wrapping) descriptions. Each size is
+rendered into a temporary directory with the PDF cache disabled. Reported per
+size: render time, pages, pages/sec, peak Python memory (tracemalloc, measured in a
+second render) and file size.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DEFAULT_SIZES = (1000, 10000, 50000)
+
+_WORDS = ("design", "review", "deploy", "bugfix", "research", "meeting", "refactor", "api", "migration",
+          "client", "support", "testing", "documentation", "integration", "performance", "analysis")
+
+
+def line_items(count, seed=42):
+    """Yields `count` line item dicts; about one in five has a description long enough to wrap."""
+    rng = random.Random(seed)
+    for i in range(count):
+        words = rng.randint(12, 40) if rng.random() < 0.2 else rng.randint(2, 6)
+        hours = round(rng.uniform(0.25, 8.0), 2)
+        rate = rng.choice((75.0, 95.0, 120.0, 150.0))
+        yield {"description": f"#{i + 1} " + " ".join(rng.choice(_WORDS) for _ in range(words)),
+               "quantity": hours, "rate": rate, "amount": hours * rate}
+
+
+def render(count, seed):
+    from shared.pdf_generator import create_invoice_pdf
+    invoice_data = {"invoice_number": f"BENCH-{count}", "issue_date": "2026-01-31", "due_date": "2026-03-02",
+                    "total_amount": sum(item["amount"] for item in line_items(count, seed))}
+    client_data = {"name": "Benchmark Client", "address": "1 Benchmark Way"}
+    company_details = {"company_name": "Benchmark LLC", "company_address": "2 Benchmark Way"}
+    # Timed without tracemalloc (which slows allocation-heavy code severalfold), then rendered
+    # again under tracemalloc for the peak.
+    started = time.perf_counter()
+    path = create_invoice_pdf(invoice_data, line_items(count, seed), client_data, company_details)
+    elapsed = time.perf_counter() - started
+    if not path:
+        raise RuntimeError(f"rendering {count} items failed")
+    tracemalloc.start()
+    create_invoice_pdf(invoice_data, line_items(count, seed), client_data, company_details)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    with open(path, "rb") as f:
+        pages = f.read().count(b"/Type /Page\n")
+    return {"items": count, "seconds": elapsed, "pages": pages, "pages_per_sec": pages / elapsed if elapsed else 0.0,
+            "items_per_sec": count / elapsed if elapsed else 0.0, "peak_mb": peak / 1024 / 1024,
+            "file_mb": os.path.getsize(path) / 1024 / 1024}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=list(DEFAULT_SIZES), help="line item counts to render")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    # Must be set before shared.pdf_cache is imported.
+    os.environ["FREELANCER_HUB_PDF_CACHE"] = "0"
+    results = []
+    with tempfile.TemporaryDirectory(prefix="freelancer_hub_bench_pdf_") as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)  # create_invoice_pdf writes to ./data/invoices
+        try:
+            for count in args.items:
+                result = render(count, args.seed)
+                results.append(result)
+                print(f"  {count:>7} items  {result['seconds']:8.2f} s  {result['pages']:>6} pages  "
+                      f"{result['pages_per_sec']:8.1f} pages/s  peak {result['peak_mb']:8.1f} MiB  file {result['file_mb']:7.1f} MiB")
+        finally:
+            os.chdir(cwd)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+# benchmarks/bench_ui.py
+
+"""
+Offscreen UI benchmark: builds MainWindow against a synthetic database and times
+view refreshes, the project selection path and dialog construction.
+
+    python -m benchmarks.bench_ui --size small --output ui.json
+    python -m benchmarks.bench_ui --size small --budgets budgets.json --compare ui.json
+
+Runs under QT_QPA_PLATFORM=offscreen, so no display is needed. A step's time
+covers the call itself plus waiting for the background query executor to
+deliver its results and for Qt to process the resulting events, i.e. until the
+view is filled. Memory is measured in a separate pass (tracemalloc slows
+Python down): the Python heap peak per step and the process RSS high-water mark.
+
+Budgets are {step name: {"p95_ms": ..., "python_peak_kib": ...}} ("*" applies to
+every step without its own entry); the exit code is 1 when one is exceeded.
+"""
+
+import os
+import sys
+
+# Must be set before Qt is imported.
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.synthetic_data import SIZES, generate_database
+from benchmarks.bench_database import percentile, compare, DEFAULT_THRESHOLD
+
+DEFAULT_BUDGETS = {
+    "*": {"p95_ms": 300.0},
+    "MainWindow()": {"p95_ms": 3000.0},
+}
+DEFAULT_MAX_RSS_MB = 600.0
+
+# Give up waiting for a step after this many seconds.
+IDLE_TIMEOUT = 60.0
+
+
+def max_rss_mb():
+    """Peak resident set size of this process in MiB, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+class Step:
+    """
+    One UI action. `setup()` and `teardown(value)` run untimed around `action()`,
+    which may return an object (e.g. a dialog) handed to teardown for cleanup.
+    """
+
+    def __init__(self, name, action, setup=None, teardown=None):
+        self.name = name
+        self.action = action
+        self.setup = setup or (lambda: None)
+        self.teardown = teardown or (lambda value: None)
+
+
+class UiBenchmark:
+    def __init__(self, app, executor):
+        self.app = app
+        self.executor = executor
+
+    def wait_idle(self):
+        """Pumps the event loop until every background query has delivered its result."""
+        from PySide6.QtCore import QCoreApplication, QEvent
+        deadline = time.perf_counter() + IDLE_TIMEOUT
+        while True:
+            self.app.processEvents()
+            if self.executor.is_idle():
+                break
+            if time.perf_counter() > deadline:
+                raise TimeoutError("Background queries did not finish in time.")
+            self.executor.wait_for_done(5)
+        # Flush the follow-up work the callbacks posted (layouts, deleteLater()).
+        self.app.processEvents()
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    def time_step(self, step):
+        step.setup()
+        self.wait_idle()
+        started = time.perf_counter()
+        value = step.action()
+        self.wait_idle()
+        elapsed = time.perf_counter() - started
+        step.teardown(value)
+        self.wait_idle()
+        return elapsed
+
+    def measure_memory(self, step):
+        """Python heap peak (KiB) while the step runs, above what was allocated before it."""
+        step.setup()
+        self.wait_idle()
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        value = step.action()
+        self.wait_idle()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        step.teardown(value)
+        self.wait_idle()
+        return (peak - baseline) / 1024.0
+
+
+def build_steps(window, bench, busiest_project_id):
+    from ui.views.invoice_view import InvoiceView
+    from ui.views.project_hub_view import ProjectDialog
+    from ui.views.client_view import ClientDialog
+    from ui.views.expense_view import ExpenseDialog
+
+    steps = []
+    for index in range(window.content_stack.count()):
+        def switch(index=index):
+            window.switch_page(index)
+        view_name = window.view_name(index)
+        steps.append(Step(f"switch_page[{index}:{view_name}]", switch))
+
+    # Views are built on first use (see MainWindow.view), so look them up when the step runs.
+    def view(index):
+        return window.view(index)
+
+    def show_project_list():
+        window.switch_page(1)
+        bench.wait_idle()
+        view(1).view_tabs.setCurrentIndex(0)
+        view(1).projects_table.clearSelection()
+
+    def select_first_project():
+        view(1).projects_table.selectRow(0)
+
+    def show_kanban():
+        view(1).view_tabs.setCurrentIndex(1)
+
+    steps += [
+        Step("DashboardView.refresh_data", lambda: view(0).refresh_data(), setup=lambda: window.switch_page(0)),
+        Step("ProjectHubView.select_project", select_first_project, setup=show_project_list),
+        Step("ProjectHubView.kanban_tab", show_kanban, setup=show_project_list),
+    ]
+
+    def close_dialog(dialog):
+        dialog.reject()
+        dialog.deleteLater()
+
+    def invoice_dialog_for_busiest():
+        dialog = InvoiceView.CreateInvoiceDialog(view(3))
+        for i in range(dialog.project_combo.count()):
+            if dialog.project_combo.itemData(i)["id"] == busiest_project_id:
+                dialog.project_combo.setCurrentIndex(i)
+                break
+        return dialog
+
+    pending = {}
+    def generate_line_items():
+        pending["dialog"].generate_line_items()
+        return pending.pop("dialog")
+
+    steps += [
+        Step("dialog.CreateInvoiceDialog", lambda: InvoiceView.CreateInvoiceDialog(view(3)), teardown=close_dialog),
+        Step("dialog.CreateInvoiceDialog.generate_line_items", generate_line_items,
+             setup=lambda: pending.update(dialog=invoice_dialog_for_busiest()), teardown=close_dialog),
+        Step("dialog.ProjectDialog", lambda: ProjectDialog(view(1).controller, view(1)), teardown=close_dialog),
+        Step("dialog.ClientDialog", lambda: ClientDialog(view(5)), teardown=close_dialog),
+        Step("dialog.ExpenseDialog", lambda: ExpenseDialog(view(4)), teardown=close_dialog),
+    ]
+    return steps
+
+
+def summarize(samples):
+    p50 = percentile(samples, 0.50)
+    return {"p50_ms": p50 * 1000.0, "p95_ms": percentile(samples, 0.95) * 1000.0,
+            "max_ms": max(samples) * 1000.0, "runs": len(samples)}
+
+
+def check_budgets(results, budgets, max_rss):
+    violations = []
+    for name, modes in results.items():
+        stats = modes["ui"]
+        budget = budgets.get(name, budgets.get("*", {}))
+        if "p95_ms" in budget and stats["p95_ms"] > budget["p95_ms"]:
+            violations.append(f"{name}: p95 {stats['p95_ms']:.1f} ms > budget {budget['p95_ms']:.1f} ms")
+        peak = stats.get("python_peak_kib")
+        if "python_peak_kib" in budget and peak is not None and peak > budget["python_peak_kib"]:
+            violations.append(f"{name}: Python heap peak {peak:.0f} KiB > budget {budget['python_peak_kib']:.0f} KiB")
+    rss = max_rss_mb()
+    if max_rss is not None and rss is not None and rss > max_rss:
+        violations.append(f"process: peak RSS {rss:.0f} MiB > budget {max_rss:.0f} MiB")
+    return violations
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the UI offscreen against a synthetic database.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small", help="dataset preset (default: small)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per step")
+    parser.add_argument("--filter", default=None, help="only run steps whose name contains this text")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--db", default=None, help="reuse/create the synthetic database at this path instead of a temp file")
+    parser.add_argument("--budgets", default=None, help="JSON file with per-step budgets (replaces the defaults)")
+    parser.add_argument("--max-rss-mb", type=float, default=DEFAULT_MAX_RSS_MB, help="peak RSS budget in MiB")
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    parser.add_argument("--compare", default=None, help="baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed p50 slowdown as a fraction (default: 0.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    budgets = DEFAULT_BUDGETS
+    if args.budgets:
+        with open(args.budgets) as f:
+            budgets = json.load(f)
+
+    with tempfile.TemporaryDirectory(prefix="freelancer_hub_bench_ui_") as tmp:
+        db_path = args.db or os.path.join(tmp, "bench.db")
+        dataset = {"size": args.size, **SIZES[args.size], "seed": args.seed}
+        if not os.path.exists(db_path):
+            dataset.update(generate_database(db_path, seed=args.seed, **SIZES[args.size]))
+        # Must be set before database_manager is imported: it binds DB_FILE at import time.
+        os.environ["FREELANCER_HUB_DB"] = db_path
+
+        from PySide6.QtWidgets import QApplication
+        from database import database_manager as db
+        from shared.query_executor import get_query_executor
+        from ui.main_window import MainWindow
+        from ui.styles import MODERN_STYLESHEET
+        if os.path.abspath(db.DB_FILE) != os.path.abspath(db_path):
+            print("database_manager was already imported with another database; refusing to run.")
+            return 2
+        db.initialize_database()
+
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+        bench = UiBenchmark(app, get_query_executor())
+        conn = db.get_db_connection()
+        busiest = conn.execute("SELECT project_id FROM time_entries WHERE is_billed = 0 GROUP BY project_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+        conn.close()
+
+        results = {}
+        def build_window():
+            window = MainWindow()
+            window.setStyleSheet(MODERN_STYLESHEET)
+            window.show()
+            return window
+        def drop_window(window):
+            window.close()
+            window.deleteLater()
+        # The first construction pays for imports and Qt's first-use setup; it is reported separately.
+        first = Step("MainWindow()", build_window, teardown=drop_window)
+        window_samples = [bench.time_step(first) for _ in range(max(1, min(args.repeat, 3)))]
+        results["MainWindow()"] = {"ui": {**summarize(window_samples[1:] or window_samples),
+                                          "first_ms": window_samples[0] * 1000.0}}
+
+        window = build_window()
+        bench.wait_idle()
+        steps = build_steps(window, bench, busiest)
+        if args.filter:
+            steps = [s for s in steps if args.filter in s.name]
+
+        print(f"Running {len(steps)} UI steps x {args.repeat} runs on {db_path}")
+        for step in steps:
+            samples = [bench.time_step(step) for _ in range(args.repeat)]
+            results[step.name] = {"ui": summarize(samples)}
+            if not args.no_memory:
+                results[step.name]["ui"]["python_peak_kib"] = bench.measure_memory(step)
+            stats = results[step.name]["ui"]
+            peak = f"{stats['python_peak_kib']:10.0f} KiB" if "python_peak_kib" in stats else ""
+            print(f"  {step.name:<52} p50 {stats['p50_ms']:9.2f} ms   p95 {stats['p95_ms']:9.2f} ms   {peak}")
+
+        window.close()
+        bench.wait_idle()
+        db.connection_manager.close_all()
+
+    rss = max_rss_mb()
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "qpa_platform": os.environ.get("QT_QPA_PLATFORM"),
+        "dataset": dataset,
+        "peak_rss_mb": rss,
+        "results": results,
+    }
+    if rss is not None:
+        print(f"Peak RSS: {rss:.0f} MiB")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    status = 0
+    violations = check_budgets(results, budgets, args.max_rss_mb)
+    if violations:
+        print(f"{len(violations)} budget violation(s):")
+        for line in violations:
+            print(f"  {line}")
+        status = 1
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold * 100:.0f}%:")
+            for line in regressions:
+                print(f"  {line}")
+            status = 1
+        else:
+            print("No regressions against the baseline.")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# benchmarks/synthetic_data.py
+
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from database.migrations import apply_migrations
+
+# Preset dataset sizes. Every count is an absolute number of rows.
+SIZES = {
+    "tiny":   {"clients": 20,    "projects": 60,    "time_entries": 5_000,     "invoices": 200,    "expenses": 500},
+    "small":  {"clients": 100,   "projects": 300,   "time_entries": 50_000,    "invoices": 2_000,  "expenses": 5_000},
+    "medium": {"clients": 1_000, "projects": 3_000, "time_entries": 250_000,   "invoices": 10_000, "expenses": 20_000},
+    "large":  {"clients": 10_000, "projects": 30_000, "time_entries": 1_000_000, "invoices": 50_000, "expenses": 100_000},
+}
+
+PROJECT_STATUSES = ["Active", "Active", "Active", "Pending", "In Progress", "Completed"]
+INVOICE_STATUSES = ["Paid", "Paid", "Paid", "Sent", "Draft", "Overdue"]
+EXPENSE_CATEGORIES = ["Software", "Hardware", "Marketing", "Travel", "Office Supplies", "Other"]
+WORDS = ["api", "migration", "design", "review", "meeting", "bugfix", "deploy", "refactor", "research",
+         "frontend", "backend", "database", "report", "support", "planning", "testing", "#consulting", "#dev"]
+
+# Time entries span this many days back from the reference date.
+HISTORY_DAYS = 3 * 365
+
+
+def _description(rng, words=4):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, words))).capitalize()
+
+
+def generate_database(db_path, clients, projects, time_entries, invoices, expenses, seed=42, now=None, verbose=True):
+    """
+    Fills `db_path` (created if needed) with a deterministic synthetic dataset.
+    The same arguments and seed always produce the same rows.
+    Returns a dict with the row counts and the generation time in seconds.
+    """
+    rng = random.Random(seed)
+    now = now or datetime(2026, 6, 30, 18, 0, 0)
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA foreign_keys = ON")
+    apply_migrations(conn, verbose=False)
+
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO clients (id, name, email, address) VALUES (?, ?, ?, ?)",
+        ((i, f"Client {i:05d} {rng.choice(WORDS).capitalize()}", f"client{i}@example.com", f"{rng.randint(1, 999)} Main St, Town {i % 97}")
+         for i in range(1, clients + 1))
+    )
+    project_clients = [rng.randint(1, clients) for _ in range(projects)]
+    project_rates = [float(rng.choice([40, 55, 75, 90, 120, 150])) for _ in range(projects)]
+    conn.executemany(
+        "INSERT INTO projects (id, name, client_id, status, rate) VALUES (?, ?, ?, ?, ?)",
+        ((i + 1, f"{_description(rng, 2)} Project {i + 1}", project_clients[i], rng.choice(PROJECT_STATUSES), project_rates[i])
+         for i in range(projects))
+    )
+
+    # Invoices belong to a client; time entries of that client's projects get billed to them.
+    projects_by_client = {}
+    for project_index, client_id in enumerate(project_clients):
+        projects_by_client.setdefault(client_id, []).append(project_index + 1)
+    invoice_clients = [rng.choice(list(projects_by_client)) for _ in range(invoices)]
+    invoice_rows = []
+    for i in range(invoices):
+        issue = now - timedelta(days=rng.randint(0, HISTORY_DAYS))
+        invoice_rows.append((i + 1, f"INV-{issue.year}-{i + 1:06d}", invoice_clients[i], issue.date().isoformat(),
+                             (issue + timedelta(days=30)).date().isoformat(), rng.choice(INVOICE_STATUSES), 0.0))
+    conn.executemany(
+        "INSERT INTO invoices (id, invoice_number, client_id, issue_date, due_date, status, total_amount) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        invoice_rows
+    )
+    invoices_by_project = {}
+    for invoice_id, client_id in enumerate(invoice_clients, start=1):
+        for project_id in projects_by_client[client_id]:
+            invoices_by_project.setdefault(project_id, []).append(invoice_id)
+
+    def entry_rows():
+        for i in range(time_entries):
+            project_id = rng.randint(1, projects)
+            start = now - timedelta(days=rng.randint(0, HISTORY_DAYS), minutes=rng.randint(0, 600))
+            duration = rng.randint(5, 480)
+            candidates = invoices_by_project.get(project_id)
+            invoice_id = rng.choice(candidates) if candidates and rng.random() < 0.6 else None
+            yield (i + 1, project_id, start.isoformat(), (start + timedelta(minutes=duration)).isoformat(), duration,
+                   _description(rng), 1 if invoice_id else 0, invoice_id)
+    conn.executemany(
+        "INSERT INTO time_entries (id, project_id, start_time, end_time, duration_minutes, description, is_billed, invoice_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        entry_rows()
+    )
+
+    # One line item per (invoice, project) built from the billed minutes, then the invoice totals.
+    conn.execute("""
+        INSERT INTO invoice_items (invoice_id, description, quantity, rate, amount)
+        SELECT te.invoice_id, 'Work on ' || p.name, SUM(te.duration_minutes) / 60.0, p.rate, SUM(te.duration_minutes) / 60.0 * p.rate
+        FROM time_entries te JOIN projects p ON te.project_id = p.id
+        WHERE te.invoice_id IS NOT NULL
+        GROUP BY te.invoice_id, te.project_id
+    """)
+    conn.execute("UPDATE invoices SET total_amount = COALESCE((SELECT SUM(amount) FROM invoice_items WHERE invoice_id = invoices.id), 0.0)")
+
+    conn.executemany(
+        "INSERT INTO expenses (description, category, amount, expense_date) VALUES (?, ?, ?, ?)",
+        ((_description(rng, 3), rng.choice(EXPENSE_CATEGORIES), round(rng.uniform(5, 2500), 2),
+          (now - timedelta(days=rng.randint(0, HISTORY_DAYS))).date().isoformat())
+         for _ in range(expenses))
+    )
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('company_name', 'Benchmark Consulting LLC')")
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('company_address', '1 Benchmark Way')")
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+    elapsed = time.perf_counter() - started
+    if verbose:
+        print(f"Generated {clients} clients, {projects} projects, {time_entries} time entries, "
+              f"{invoices} invoices, {expenses} expenses in {elapsed:.1f} s")
+    return {"clients": clients, "projects": projects, "time_entries": time_entries, "invoices": invoices,
+            "expenses": expenses, "seed": seed, "generation_seconds": elapsed}
+
+
+def generate_preset(db_path, size="small", seed=42, verbose=True):
+    return generate_database(db_path, seed=seed, verbose=verbose, **SIZES[size])
@@ -1,16 +1,33 @@
 # controllers/project_controller.py
 
-from datetime import timedelta, datetime
+import threading
+import weakref
+from collections import OrderedDict
 from database.database_manager import (
     get_all_projects_with_client_name,
-    get_project_details,
-    get_project_financial_summary,
-    get_time_entries_for_project,
-    get_invoices_for_project,
+    get_project_dashboard_snapshot,
+    get_project_revision,
     add_project,
     delete_project,
     get_all_clients
 )
+from database.reference_cache import reference_cache
+from shared import backup_service
+
+# Number of project dashboards kept in memory.
+DASHBOARD_CACHE_SIZE = 64
+
+_controllers = weakref.WeakSet()
+
+
+def clear_dashboard_caches():
+    """Empties every controller's dashboard cache, e.g. after a restore swapped in another database."""
+    for controller in list(_controllers):
+        controller.clear_dashboard_cache()
+
+
+# A restored database starts its own revision counters, so cached dashboards could match it by accident.
+backup_service.add_restore_listener(clear_dashboard_caches)
 
 class ProjectController:
     """
@@ -18,6 +35,15 @@ class ProjectController:
     Interacts with the DatabaseManager and formats data for the View.
     """
 
+    def __init__(self):
+        self._dashboard_cache = OrderedDict()  # project_id -> (reference cache epoch, dashboard data with its revision)
+        self._dashboard_lock = threading.Lock()
+        _controllers.add(self)
+
+    def clear_dashboard_cache(self):
+        with self._dashboard_lock:
+            self._dashboard_cache.clear()
+
     def get_all_projects(self):
         """Returns a list of all projects with client names."""
         return get_all_projects_with_client_name()
@@ -36,55 +62,28 @@ class ProjectController:
 
     def get_project_dashboard_data(self, project_id):
         """
-        Fetches and aggregates all data needed for the Project Dashboard.
+        Fetches all data needed for the Project Dashboard, already formatted for the View.
         Returns a dictionary or None if project not found.
+
+        Results are memoized per project and reused while the project's revision
+        (bumped by database triggers on any relevant change) stays the same, so
+        revisiting a project costs one indexed lookup. Safe to call from worker threads.
         """
-        details = get_project_details(project_id)
-        if not details:
-            return None
+        # The epoch changes on a restore, so a load that was already running then is not served afterwards.
+        epoch = reference_cache.epoch
+        revision = get_project_revision(project_id)
+        with self._dashboard_lock:
+            cached = self._dashboard_cache.get(project_id)
+            if cached is not None and cached[0] == epoch and cached[1]["revision"] == revision:
+                self._dashboard_cache.move_to_end(project_id)
+                return cached[1]
 
-        financials = get_project_financial_summary(project_id)
-        time_entries = get_time_entries_for_project(project_id)
-        invoices = get_invoices_for_project(project_id)
-
-        # Process Time Entries (Format Duration)
-        formatted_time_entries = []
-        for entry in time_entries:
-            duration_minutes = entry.get('duration_minutes')
-            if duration_minutes is None:
-                duration_text = "Running..."
-            else:
-                duration_text = str(timedelta(minutes=duration_minutes))
-            
-            # Format Date
-            try:
-                date_obj = datetime.fromisoformat(entry['start_time'])
-                date_str = date_obj.strftime('%Y-%m-%d %H:%M')
-            except ValueError:
-                date_str = entry['start_time'] # Fallback
-
-            formatted_time_entries.append({
-                "date": date_str,
-                "duration": duration_text,
-                "description": entry.get('description', '')
-            })
-
-        # Process Invoices (Format Amount)
-        formatted_invoices = []
-        for inv in invoices:
-            formatted_invoices.append({
-                "number": inv['invoice_number'],
-                "date": inv['issue_date'],
-                "status": inv['status'],
-                "amount": f"${inv['total_amount']:.2f}"
-            })
-
-        return {
-            "details": details,
-            "financials": {
-                "total_hours": f"{financials['total_hours']:.2f} hrs",
-                "billed_amount": f"${financials['billed_amount']:.2f}"
-            },
-            "time_entries": formatted_time_entries,
-            "invoices": formatted_invoices
-        }
+        data = get_project_dashboard_snapshot(project_id)
+        if data is None:
+            return None
+        with self._dashboard_lock:
+            self._dashboard_cache[project_id] = (epoch, data)
+            self._dashboard_cache.move_to_end(project_id)
+            while len(self._dashboard_cache) > DASHBOARD_CACHE_SIZE:
+                self._dashboard_cache.popitem(last=False)
+        return data
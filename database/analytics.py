@@ -0,0 +1,272 @@
+# database/analytics.py
+
+# --- Time-Series Analytics ---
+# Dense series bucketed by day, week (Monday to Sunday), month or quarter, with
+# empty buckets filled with zeros:
+#   hours            logged time of finished entries, by start date
+#   billable_value   the same time at its project's current rate
+#   invoiced         invoice totals, by issue date
+#   paid             ... of invoices with status 'Paid'
+#   expenses         expense amounts, by expense date (only without a client/project filter,
+#                    since expenses belong to neither)
+# A project filter gives the project its share of each invoice it appears on,
+# split by billed minutes like financial_summary.py does.
+#
+# The rows are not aggregated in SQL for every request. ColumnStore keeps the
+# few columns the series need as NumPy arrays (days since 1970-01-01, minutes,
+# project and invoice ids, amounts). A series is then a boolean mask plus
+# np.bincount over bucket numbers, which takes milliseconds for years of data.
+# The columns are reloaded only when their tables change (the reference cache's
+# table generations). Time entries are reloaded per project: the
+# project_revisions counters (see migrations.py) show which projects changed,
+# and only their entries are read again. The app's store is `columns`.
+# `python -m database.analytics [granularity] [start] [end]` prints a series.
+
+import json
+import sys
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+from database.reference_cache import reference_cache
+
+GRANULARITIES = ("day", "week", "month", "quarter")
+SERIES = ("hours", "billable_value", "invoiced", "paid", "expenses")
+
+# Days since 1970-01-01 of an ISO date or timestamp (julianday of a bare date ends in .5); 0 if unparseable.
+_DAY = "COALESCE(CAST(julianday(substr({column}, 1, 10)) AS INTEGER) - 2440587, 0)"
+_ENTRIES = f"""SELECT project_id, {_DAY.format(column='start_time')}, duration_minutes, COALESCE(invoice_id, 0)
+    FROM time_entries WHERE duration_minutes IS NOT NULL"""
+_ENTRY_DTYPE = [("project", "i4"), ("day", "i4"), ("minutes", "i4"), ("invoice", "i4")]
+
+
+def _fetch(conn, sql, dtype, params=()):
+    """The query's rows as {column name: array}. Separate contiguous arrays mask and sum faster than one record array."""
+    cursor = conn.cursor()
+    cursor.row_factory = None  # plain tuples, which np.fromiter reads without building a list
+    rows = np.fromiter(cursor.execute(sql, params), dtype=dtype)
+    return {name: np.ascontiguousarray(rows[name]) for name in rows.dtype.names}
+
+
+def _select(table, mask):
+    return {name: values[mask] for name, values in table.items()}
+
+
+def _by_id(ids, values, dtype):
+    """An array indexed by id holding `values` (zero for ids that do not exist)."""
+    table = np.zeros(int(ids.max()) + 1 if len(ids) else 1, dtype=dtype)
+    table[ids] = values
+    return table
+
+
+def _lookup(table, ids):
+    """table[ids], with zero for ids past the end (rows added after the table was loaded)."""
+    return np.where(ids < len(table), table[np.minimum(ids, len(table) - 1)], 0)
+
+
+class ColumnStore:
+    """The columns the series are computed from, reloaded as their tables change."""
+
+    # part -> tables it is read from
+    PARTS = {"projects": ("projects",), "entries": ("time_entries", "projects", "clients", "invoices", "invoice_items"),
+             "invoices": ("invoices",), "expenses": ("expenses",)}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._epoch = reference_cache.epoch
+        self._generations = {}
+        self.revisions = np.zeros(1, dtype=np.int64)  # by project id
+        self.entries = {name: np.zeros(0, dtype) for name, dtype in _ENTRY_DTYPE}
+
+    def refresh(self, conn):
+        """Reloads whatever changed since the last call; returns the parts that were reloaded."""
+        with self._lock:
+            if reference_cache.epoch != self._epoch:
+                self._reset()  # e.g. a restore swapped in another database
+            reloaded = []
+            for part, tables in self.PARTS.items():
+                # Read before loading: a write during the load triggers another reload next time.
+                generations = reference_cache.table_generations(tables)
+                if self._generations.get(part) != generations:
+                    getattr(self, f"_load_{part}")(conn)
+                    self._generations[part] = generations
+                    reloaded.append(part)
+            return reloaded
+
+    def _load_projects(self, conn):
+        projects = _fetch(conn, "SELECT id, client_id, COALESCE(rate, 0.0) FROM projects", [("id", "i4"), ("client", "i4"), ("rate", "f8")])
+        self.project_client = _by_id(projects["id"], projects["client"], np.int32)
+        self.project_rate = _by_id(projects["id"], projects["rate"], np.float64)
+
+    def _load_entries(self, conn):
+        revisions = _fetch(conn, "SELECT project_id, revision FROM project_revisions", [("project", "i4"), ("revision", "i8")])
+        revisions = _by_id(revisions["project"], revisions["revision"], np.int64)
+        if not len(self.entries["day"]):
+            self.entries = _fetch(conn, _ENTRIES, _ENTRY_DTYPE)
+        else:
+            size = max(len(revisions), len(self.revisions))
+            old, new = np.zeros(size, np.int64), np.zeros(size, np.int64)
+            old[:len(self.revisions)], new[:len(revisions)] = self.revisions, revisions
+            changed = np.nonzero(old != new)[0]
+            if len(changed):
+                kept = _select(self.entries, ~np.isin(self.entries["project"], changed))
+                fresh = _fetch(conn, f"{_ENTRIES} AND project_id IN (SELECT value FROM json_each(?))", _ENTRY_DTYPE,
+                               (json.dumps(changed.tolist()),))
+                self.entries = {name: np.concatenate([kept[name], fresh[name]]) for name in kept}
+        self.revisions = revisions
+
+    def _load_invoices(self, conn):
+        self.invoices = _fetch(conn, f"""SELECT id, client_id, {_DAY.format(column='issue_date')}, COALESCE(total_amount, 0.0), status = 'Paid'
+            FROM invoices""", [("id", "i4"), ("client", "i4"), ("day", "i4"), ("amount", "f8"), ("paid", "?")])
+
+    def _load_expenses(self, conn):
+        self.expenses = _fetch(conn, f"SELECT {_DAY.format(column='expense_date')}, amount FROM expenses", [("day", "i4"), ("amount", "f8")])
+
+    def invoice_shares(self, project_id):
+        """By invoice id: the fraction of each invoice that belongs to `project_id`."""
+        entries = self.entries
+        billed = _select(entries, entries["invoice"] > 0)
+        size = int(max(self.invoices["id"].max(initial=0), billed["invoice"].max(initial=0))) + 1
+        total = np.bincount(billed["invoice"], weights=billed["minutes"], minlength=size)
+        mine_rows = _select(billed, billed["project"] == project_id)
+        mine = np.bincount(mine_rows["invoice"], weights=mine_rows["minutes"], minlength=size)
+        on_invoice = np.bincount(mine_rows["invoice"], minlength=size) > 0
+        shares = np.divide(mine, total, out=np.zeros(size), where=total > 0)
+        # Invoices without billed minutes are split evenly between their projects.
+        even = np.nonzero(on_invoice & (total == 0))[0]
+        if len(even):
+            rows = _select(billed, np.isin(billed["invoice"], even))
+            stride = int(rows["project"].max()) + 1
+            pairs = np.unique(rows["invoice"].astype(np.int64) * stride + rows["project"])
+            counts = np.bincount(pairs // stride, minlength=size)
+            shares[even] = 1.0 / counts[even]
+        return shares
+
+
+columns = ColumnStore()
+
+
+# --- Buckets ---
+def _day_number(value):
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return (value - date(1970, 1, 1)).days
+
+
+def _buckets(days, granularity):
+    """Bucket number of each day number: days, Monday-based weeks, months or quarters since 1970."""
+    if granularity == "day":
+        return days
+    if granularity == "week":
+        return (days + 3) // 7  # 1970-01-01 was a Thursday
+    days = np.asarray(days)
+    if days.size == 0:
+        return days
+    # Converting each distinct day once and gathering is much cheaper than converting every row.
+    low = days.min()
+    months = np.arange(low, days.max() + 1).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)[days - low]
+    return months if granularity == "month" else months // 3
+
+
+def _bucket_start(bucket, granularity):
+    if granularity == "day":
+        return date(1970, 1, 1) + timedelta(days=int(bucket))
+    if granularity == "week":
+        return date(1970, 1, 1) + timedelta(days=int(bucket) * 7 - 3)
+    months = int(bucket) * (3 if granularity == "quarter" else 1)
+    return date(1970 + months // 12, months % 12 + 1, 1)
+
+
+def _label(start, granularity):
+    if granularity == "week":
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    if granularity == "month":
+        return f"{start:%Y-%m}"
+    if granularity == "quarter":
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    return start.isoformat()
+
+
+def time_series(conn, start, end, granularity="month", client_id=None, project_id=None):
+    """
+    Series for the buckets touching start..end (dates or ISO strings, both inclusive).
+    Returns {"granularity", "labels", "starts" (bucket start dates), and one float
+    array per SERIES name}. The arrays are read-only.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity {granularity!r}; expected one of {', '.join(GRANULARITIES)}")
+    first_day, last_day = _day_number(start), _day_number(end)
+    if last_day < first_day:
+        raise ValueError("The end of the range is before its start")
+    columns.refresh(conn)
+    first, last = int(_buckets(first_day, granularity)), int(_buckets(last_day, granularity))
+    size = last - first + 1
+
+    def binned(days, weights):
+        return np.bincount(_buckets(days, granularity) - first, weights=weights, minlength=size)
+
+    def in_range(days):
+        return (days >= first_day) & (days <= last_day)
+
+    entries = columns.entries
+    keep = in_range(entries["day"])
+    if project_id is not None:
+        keep &= entries["project"] == project_id
+    elif client_id is not None:
+        keep &= _lookup(columns.project_client, entries["project"]) == client_id
+    entries = _select(entries, keep)
+    hours = entries["minutes"].astype(np.float64) / 60.0  # float32 loses cents on large totals
+    hours_series = binned(entries["day"], hours)
+    billable = binned(entries["day"], hours * _lookup(columns.project_rate, entries["project"]))
+
+    invoices = columns.invoices
+    keep = in_range(invoices["day"])
+    if client_id is not None and project_id is None:
+        keep &= invoices["client"] == client_id
+    invoices = _select(invoices, keep)
+    amounts = invoices["amount"]
+    if project_id is not None:
+        amounts = amounts * columns.invoice_shares(project_id)[invoices["id"]]
+    invoiced = binned(invoices["day"], amounts)
+    paid = binned(invoices["day"][invoices["paid"]], amounts[invoices["paid"]])
+
+    if client_id is None and project_id is None:
+        expenses = _select(columns.expenses, in_range(columns.expenses["day"]))
+        expenses = binned(expenses["day"], expenses["amount"])
+    else:
+        expenses = np.zeros(size)
+
+    starts = [_bucket_start(bucket, granularity) for bucket in range(first, last + 1)]
+    result = {"granularity": granularity, "labels": [_label(s, granularity) for s in starts], "starts": starts,
+              "hours": hours_series, "billable_value": billable, "invoiced": invoiced, "paid": paid, "expenses": expenses}
+    for name in SERIES:
+        result[name].flags.writeable = False  # cached results are shared between callers
+    return result
+
+
+def main(argv=None):
+    """Command line entry point: `python -m database.analytics [granularity] [start] [end]`."""
+    from database.database_manager import get_time_series, initialize_database
+
+    argv = sys.argv[1:] if argv is None else argv
+    granularity = argv[0] if argv else "month"
+    end = argv[2] if len(argv) > 2 else date.today().isoformat()
+    start = argv[1] if len(argv) > 1 else (date.fromisoformat(end) - timedelta(days=365)).isoformat()
+    if granularity not in GRANULARITIES:
+        print(f"Usage: python -m database.analytics [{' | '.join(GRANULARITIES)}] [start] [end]")
+        return 2
+    initialize_database()
+    series = get_time_series(start, end, granularity)
+    print(f"{'bucket':<12}" + "".join(f"{name:>16}" for name in SERIES))
+    for i, label in enumerate(series["labels"]):
+        print(f"{label:<12}" + "".join(f"{series[name][i]:>16,.2f}" for name in SERIES))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
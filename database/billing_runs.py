@@ -0,0 +1,155 @@
+# database/billing_runs.py
+
+# --- Billing Runs ---
+# A billing run invoices every client with unbilled time in a period at once:
+# one Draft invoice per client, with consolidated line items for each of its
+# projects (see line_items.py). All invoices of a run are created in a single
+# transaction with consecutive numbers, so a run either exists completely or not
+# at all. PDFs are rendered afterwards (shared/billing_run.py) and each invoice's
+# outcome is recorded in billing_run_invoices, which is what makes a run resumable:
+# resuming renders only the invoices that are still pending or failed.
+#
+#   billing_runs.status           'Rendering' -> 'Completed' or 'Failed' (some PDFs failed)
+#   billing_run_invoices.status   'Pending' -> 'Done' or 'Failed' (with the error)
+#
+# The functions take an open connection and leave committing to the caller.
+
+from datetime import date, datetime, timedelta
+from database.invoicing import allocate_invoice_numbers, insert_invoice
+from database.line_items import consolidate_unbilled
+
+BILLING_RUN_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS billing_runs (id INTEGER PRIMARY KEY, period_start TEXT NOT NULL, period_end TEXT NOT NULL,
+        issue_date TEXT NOT NULL, due_date TEXT NOT NULL, grouping TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'Rendering',
+        created_at TEXT NOT NULL, completed_at TEXT);""",
+    """CREATE TABLE IF NOT EXISTS billing_run_invoices (run_id INTEGER NOT NULL, invoice_id INTEGER NOT NULL,
+        status TEXT NOT NULL DEFAULT 'Pending', error TEXT, PRIMARY KEY (run_id, invoice_id),
+        FOREIGN KEY (run_id) REFERENCES billing_runs (id) ON DELETE CASCADE,
+        FOREIGN KEY (invoice_id) REFERENCES invoices (id) ON DELETE CASCADE) WITHOUT ROWID;""",
+    "CREATE INDEX IF NOT EXISTS idx_billing_run_invoices_invoice ON billing_run_invoices (invoice_id);",
+]
+
+_UNBILLED_IN_PERIOD = """
+    FROM time_entries te JOIN projects p ON p.id = te.project_id JOIN clients c ON c.id = p.client_id
+    WHERE te.is_billed = 0 AND te.duration_minutes IS NOT NULL AND te.start_time >= ? AND te.start_time < ?"""
+
+
+def period_bounds(period_start, period_end):
+    """ISO date strings [start, day after end) for comparing against start_time."""
+    end = date.fromisoformat(str(period_end)) + timedelta(days=1)
+    return str(period_start), end.isoformat()
+
+
+def preview(conn, period_start, period_end):
+    """Per-client unbilled entries, hours and amount in the period, ordered by client name."""
+    rows = conn.execute(
+        f"""SELECT c.id AS client_id, c.name AS client_name, COUNT(DISTINCT p.id) AS project_count,
+            COUNT(*) AS entry_count, SUM(te.duration_minutes) / 60.0 AS hours,
+            SUM(te.duration_minutes / 60.0 * COALESCE(p.rate, 0.0)) AS amount
+        {_UNBILLED_IN_PERIOD}
+        GROUP BY c.id ORDER BY c.name, c.id""", period_bounds(period_start, period_end)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def create_run(conn, period_start, period_end, issue_date, due_date, grouping="week"):
+    """
+    Records a run and creates its invoices. Must be called inside a transaction.
+    Returns the run id, or None if nothing in the period is unbilled.
+    """
+    since, until = period_bounds(period_start, period_end)
+    projects = conn.execute(
+        f"""SELECT DISTINCT p.id, p.name, p.client_id, COALESCE(p.rate, 0.0) AS rate, c.name AS client_name
+        {_UNBILLED_IN_PERIOD}
+        ORDER BY c.name, c.id, p.name, p.id""", (since, until)
+    ).fetchall()
+    if not projects:
+        return None
+    cursor = conn.execute(
+        "INSERT INTO billing_runs (period_start, period_end, issue_date, due_date, grouping, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (str(period_start), str(period_end), issue_date, due_date, grouping, datetime.now().isoformat(timespec='seconds'))
+    )
+    run_id = cursor.lastrowid
+    by_client = {}
+    for project in projects:
+        by_client.setdefault(project["client_id"], []).append(project)
+    # One reservation for the whole run keeps its numbers consecutive.
+    numbers = iter(allocate_invoice_numbers(conn, len(by_client), issue_date))
+    for client_id, client_projects in by_client.items():
+        items = []
+        for project in client_projects:
+            prefix = f"{project['name']}: " if len(client_projects) > 1 else ""
+            items += consolidate_unbilled(conn, project["id"], grouping, project["rate"], since, until, prefix)
+        invoice_data = {"invoice_number": next(numbers), "client_id": client_id, "issue_date": issue_date,
+                        "due_date": due_date, "total_amount": sum(item["amount"] for item in items)}
+        invoice_id = insert_invoice(conn, invoice_data, items, [entry_id for item in items for entry_id in item["entry_ids"]])
+        conn.execute("INSERT INTO billing_run_invoices (run_id, invoice_id) VALUES (?, ?)", (run_id, invoice_id))
+    return run_id
+
+
+def get_run(conn, run_id):
+    """The run with its invoice counts per status, or None."""
+    row = conn.execute(
+        """SELECT r.*, COUNT(bri.invoice_id) AS invoice_count,
+            COALESCE(SUM(bri.status = 'Done'), 0) AS done_count, COALESCE(SUM(bri.status = 'Failed'), 0) AS failed_count,
+            COALESCE(SUM(i.total_amount), 0.0) AS total_amount
+        FROM billing_runs r LEFT JOIN billing_run_invoices bri ON bri.run_id = r.id LEFT JOIN invoices i ON i.id = bri.invoice_id
+        WHERE r.id = ? GROUP BY r.id""", (run_id,)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def list_runs(conn, unfinished_only=False):
+    where = "WHERE status != 'Completed'" if unfinished_only else ""
+    return [dict(row) for row in conn.execute(f"SELECT * FROM billing_runs {where} ORDER BY id DESC").fetchall()]
+
+
+def pending_render_jobs(conn, run_id):
+    """
+    Everything create_invoice_pdf needs for each invoice of the run that has no PDF yet:
+    a list of {"invoice_id", "invoice_data", "line_items", "client_data"} dicts.
+    """
+    invoices = conn.execute(
+        """SELECT i.id, i.invoice_number, i.issue_date, i.due_date, i.total_amount, i.client_id
+        FROM billing_run_invoices bri JOIN invoices i ON i.id = bri.invoice_id
+        WHERE bri.run_id = ? AND bri.status != 'Done' ORDER BY i.id""", (run_id,)
+    ).fetchall()
+    if not invoices:
+        return []
+    items = {}
+    for row in conn.execute(
+            """SELECT ii.invoice_id, ii.description, ii.quantity, ii.rate, ii.amount FROM invoice_items ii
+            JOIN billing_run_invoices bri ON bri.invoice_id = ii.invoice_id
+            WHERE bri.run_id = ? AND bri.status != 'Done' ORDER BY ii.invoice_id, ii.id""", (run_id,)):
+        items.setdefault(row["invoice_id"], []).append({key: row[key] for key in ("description", "quantity", "rate", "amount")})
+    clients = {row["id"]: dict(row) for row in conn.execute(
+        "SELECT * FROM clients WHERE id IN (SELECT i.client_id FROM billing_run_invoices bri JOIN invoices i ON i.id = bri.invoice_id WHERE bri.run_id = ?)",
+        (run_id,))}
+    return [{"invoice_id": inv["id"],
+             "invoice_data": {key: inv[key] for key in ("invoice_number", "issue_date", "due_date", "total_amount", "client_id")},
+             "line_items": items.get(inv["id"], []),
+             "client_data": clients.get(inv["client_id"], {})} for inv in invoices]
+
+
+def record_render(conn, run_id, invoice_id, pdf_path=None, error=None):
+    """Stores one invoice's render outcome (a pdf_path, or the error)."""
+    if pdf_path:
+        conn.execute("UPDATE invoices SET pdf_path = ? WHERE id = ?", (pdf_path, invoice_id))
+    conn.execute("UPDATE billing_run_invoices SET status = ?, error = ? WHERE run_id = ? AND invoice_id = ?",
+                 ('Done' if pdf_path else 'Failed', None if pdf_path else (error or "PDF could not be saved"), run_id, invoice_id))
+
+
+def finish_run(conn, run_id):
+    """Sets the run's final status from its invoices; returns it."""
+    failed = conn.execute("SELECT COUNT(*) FROM billing_run_invoices WHERE run_id = ? AND status != 'Done'", (run_id,)).fetchone()[0]
+    status = 'Failed' if failed else 'Completed'
+    conn.execute("UPDATE billing_runs SET status = ?, completed_at = ? WHERE id = ?",
+                 (status, datetime.now().isoformat(timespec='seconds'), run_id))
+    return status
+
+
+def run_errors(conn, run_id):
+    """[(invoice_number, error)] for the run's failed invoices."""
+    return [tuple(row) for row in conn.execute(
+        """SELECT i.invoice_number, bri.error FROM billing_run_invoices bri JOIN invoices i ON i.id = bri.invoice_id
+        WHERE bri.run_id = ? AND bri.status = 'Failed' ORDER BY i.id""", (run_id,))]
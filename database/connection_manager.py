@@ -0,0 +1,209 @@
+# database/connection_manager.py
+
+import atexit
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Default pragma profile applied to every pooled connection.
+# Negative cache_size is in KiB (here 64 MiB); mmap_size is in bytes (256 MiB).
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "cache_size": -64000,
+    "mmap_size": 268435456,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+# Size of sqlite3's per-connection prepared statement cache (the stdlib default is 128).
+DEFAULT_STATEMENT_CACHE_SIZE = 512
+
+# Seconds exclusive() waits for queries in flight on other threads before closing their connections anyway.
+DRAIN_TIMEOUT = 10.0
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A long-lived connection handed out by the ConnectionManager.
+    Calling close() only releases it back to the pool: any uncommitted work is
+    rolled back (matching what a real close would do) but the connection and its
+    page cache stay open for the next caller on the same thread.
+    The pool counts the callers using it, so close_all() from another thread
+    leaves it open until the last of them has released it. As a context manager
+    it is released when the block exits, also when the block raises (unlike
+    sqlite3.Connection, it does not commit on exit).
+    """
+    pool = None
+    generation = 0
+    users = 0
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+        if self.pool is not None:
+            self.pool._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def really_close(self):
+        """Closes the underlying SQLite connection."""
+        super().close()
+
+
+class ConnectionManager:
+    """
+    Keeps one long-lived SQLite connection per thread for a database file.
+    Every connection gets the same pragma profile, so the page cache and
+    prepared statements survive between short queries.
+    """
+
+    def __init__(self, db_file, pragmas=None, cached_statements=DEFAULT_STATEMENT_CACHE_SIZE, factory=PooledConnection):
+        self.db_file = db_file
+        self.factory = factory
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        # Notified whenever a pooled connection is closed.
+        self._lock = threading.Condition()
+        self._connections = []
+        # Bumped by close_all(); threads holding an older connection reconnect.
+        self._generation = 0
+        # Cleared while exclusive() holds the file; connecting waits for it.
+        self._open_allowed = threading.Event()
+        self._open_allowed.set()
+
+    def connection(self):
+        """Returns this thread's pooled connection, opening it on first use. Release it with close()."""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        with self._lock:
+            if conn is not None and conn.generation == self._generation:
+                conn.users += 1
+                return conn
+        # A stale connection still in use here is closed when its last caller releases it.
+        conn = self._open()
+        local.conn = conn
+        return conn
+
+    def _open(self):
+        self._open_allowed.wait()
+        conn = sqlite3.connect(
+            self.db_file,
+            factory=self.factory,
+            cached_statements=self.cached_statements,
+            # Each connection is only used by the thread that opened it, but
+            # close_all() may be called from any thread.
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            conn.pool, conn.generation, conn.users = self, self._generation, 1
+            self._connections.append(conn)
+        return conn
+
+    def _release(self, conn):
+        with self._lock:
+            conn.users = max(conn.users - 1, 0)
+            if not conn.users and conn.generation != self._generation:
+                self._close(conn)
+
+    def _close(self, conn):
+        # Called with self._lock held.
+        if conn in self._connections:
+            self._connections.remove(conn)
+        try:
+            conn.really_close()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not close database connection. Error: {e}")
+        self._lock.notify_all()
+
+    def configure(self, db_file=None, cached_statements=None, factory=None, **pragmas):
+        """
+        Changes the database file, statement cache size, connection class
+        (a PooledConnection subclass) and/or pragma values.
+        Open connections are closed so the next call picks up the new settings.
+        """
+        if db_file is not None:
+            self.db_file = db_file
+        if cached_statements is not None:
+            self.cached_statements = cached_statements
+        if factory is not None:
+            self.factory = factory
+        self.pragmas.update(pragmas)
+        self.close_all()
+
+    def close_all(self):
+        """
+        Closes every pooled connection (on all threads). A connection in use, e.g. by a
+        query running on a worker thread, is closed once its thread releases it.
+        """
+        with self._lock:
+            self._generation += 1
+            for conn in [conn for conn in self._connections if not conn.users]:
+                self._close(conn)
+
+    def _drain(self, timeout):
+        """Closes every connection, waiting up to `timeout` seconds for the ones in use to be released."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                self.close_all()  # again each time, for connections opened while the gate was closing
+                remaining = deadline - time.monotonic()
+                if not self._connections or remaining <= 0:
+                    break
+                self._lock.wait(remaining)
+            for conn in list(self._connections):
+                print(f"Warning: Closing a database connection that was still in use after {timeout:g} seconds.")
+                self._close(conn)
+
+    @contextmanager
+    def exclusive(self, timeout=DRAIN_TIMEOUT):
+        """
+        Closes every pooled connection and keeps new ones from opening until the block
+        exits, so the caller can work on the database file alone (e.g. swap it for a restore).
+        Queries in flight on other threads are allowed to finish first (up to `timeout`
+        seconds); threads that need a new connection meanwhile wait.
+        """
+        self._open_allowed.clear()
+        try:
+            self._drain(timeout)
+            yield
+        finally:
+            # Connections opened just before the gate closed point at the old file.
+            self.close_all()
+            self._open_allowed.set()
+
+    def checkpoint(self, mode="TRUNCATE"):
+        """Folds the WAL file back into the main database file."""
+        conn = self.connection()
+        try:
+            conn.execute(f"PRAGMA wal_checkpoint({mode})")
+        finally:
+            conn.close()
+
+    def register_shutdown(self):
+        """Refreshes planner statistics, checkpoints and closes all connections at exit."""
+        def shutdown():
+            try:
+                conn = self.connection()
+                try:
+                    conn.execute("PRAGMA optimize")
+                finally:
+                    conn.close()
+                self.checkpoint()
+            except sqlite3.Error:
+                pass
+            self.close_all()
+        atexit.register(shutdown)
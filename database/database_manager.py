@@ -2,41 +2,52 @@
 
 import sqlite3
 import os
+import sys
 import bcrypt
 from datetime import datetime
+from database.connection_manager import ConnectionManager
+from database.migrations import apply_migrations
+from database import instrumentation
+from database.reference_cache import cached, writes
+from database import financial_summary
+from database import billing_runs
+from database import search
+from database.line_items import consolidate_unbilled
+from database.invoicing import SERIES_MODES, SERIES_SETTING, EntriesAlreadyBilled, allocate_invoice_numbers, insert_invoice, next_invoice_number
 
 # --- Database Setup ---
 DB_DIR = os.path.dirname(__file__)
 DB_FILE = os.path.join(DB_DIR, "freelancer_hub.db") # CORRECTED PATH
+# Tools such as the benchmarks point the app at a scratch database through this variable.
+DB_FILE = os.environ.get("FREELANCER_HUB_DB") or DB_FILE
+
+# One long-lived connection per thread (WAL + tuned pragmas, see connection_manager.py).
+connection_manager = ConnectionManager(DB_FILE)
+connection_manager.register_shutdown()
 
 def get_db_connection():
-    """Establishes and returns a connection to the SQLite database."""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
-    return conn
+    """
+    Returns this thread's pooled connection to the SQLite database.
+    Calling close() on it releases it back to the pool instead of closing it;
+    `with get_db_connection() as conn:` releases it (rolling back uncommitted work) even if the block raises.
+    """
+    return connection_manager.connection()
 
-# --- The rest of your file is unchanged until the delete section ---
+# --- Schema ---
 def initialize_database():
+    """Creates the schema or migrates it forward (see migrations.py). Returns the migration report."""
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, username TEXT UNIQUE NOT NULL, password_hash TEXT NOT NULL);")
-    cursor.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);")
-    cursor.execute("CREATE TABLE IF NOT EXISTS clients (id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT, address TEXT);")
-    cursor.execute("CREATE TABLE IF NOT EXISTS projects (id INTEGER PRIMARY KEY, name TEXT NOT NULL, client_id INTEGER NOT NULL, status TEXT DEFAULT 'Active', rate REAL DEFAULT 0.0, FOREIGN KEY (client_id) REFERENCES clients (id) ON DELETE CASCADE);")
-    cursor.execute("CREATE TABLE IF NOT EXISTS time_entries (id INTEGER PRIMARY KEY, project_id INTEGER NOT NULL, start_time TEXT NOT NULL, end_time TEXT, duration_minutes INTEGER, description TEXT, is_billed INTEGER DEFAULT 0, invoice_id INTEGER, FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE, FOREIGN KEY (invoice_id) REFERENCES invoices (id) ON DELETE SET NULL);")
-    cursor.execute("CREATE TABLE IF NOT EXISTS invoices (id INTEGER PRIMARY KEY, invoice_number TEXT UNIQUE NOT NULL, client_id INTEGER NOT NULL, issue_date TEXT NOT NULL, due_date TEXT NOT NULL, status TEXT DEFAULT 'Draft', total_amount REAL, pdf_path TEXT, FOREIGN KEY (client_id) REFERENCES clients (id) ON DELETE CASCADE);")
-    cursor.execute("CREATE TABLE IF NOT EXISTS invoice_items (id INTEGER PRIMARY KEY, invoice_id INTEGER NOT NULL, description TEXT NOT NULL, quantity REAL NOT NULL, rate REAL NOT NULL, amount REAL NOT NULL, FOREIGN KEY (invoice_id) REFERENCES invoices (id) ON DELETE CASCADE);")
-    cursor.execute("CREATE TABLE IF NOT EXISTS expenses (id INTEGER PRIMARY KEY, description TEXT NOT NULL, category TEXT, amount REAL NOT NULL, expense_date TEXT NOT NULL, receipt_path TEXT);")
-    conn.commit()
-    conn.close()
+    try:
+        return apply_migrations(conn)
+    finally:
+        conn.close()
 
 def user_exists():
-    conn = get_db_connection()
-    user = conn.execute("SELECT id FROM users LIMIT 1").fetchone()
-    conn.close()
+    with get_db_connection() as conn:
+        user = conn.execute("SELECT id FROM users LIMIT 1").fetchone()
     return user is not None
 
+@writes("users")
 def create_user(username, password):
     hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
     conn = get_db_connection()
@@ -48,86 +59,543 @@ def create_user(username, password):
     finally: conn.close()
 
 def check_user(username, password):
-    conn = get_db_connection()
-    user = conn.execute("SELECT password_hash FROM users WHERE username = ?", (username,)).fetchone()
-    conn.close()
+    with get_db_connection() as conn:
+        user = conn.execute("SELECT password_hash FROM users WHERE username = ?", (username,)).fetchone()
     if user and bcrypt.checkpw(password.encode('utf-8'), user['password_hash']):
         return True
     return False
 
+@cached("settings")
 def get_all_settings():
-    conn = get_db_connection()
-    settings = conn.execute("SELECT key, value FROM settings").fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        settings = conn.execute("SELECT key, value FROM settings").fetchall()
     return {row['key']: row['value'] for row in settings}
 
+@writes("settings")
 def save_setting(key, value):
+    with get_db_connection() as conn:
+        conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+        conn.commit()
+
+@writes("clients")
+def add_client(name, email, address):
+    with get_db_connection() as conn: conn.execute("INSERT INTO clients (name, email, address) VALUES (?, ?, ?)", (name, email, address)); conn.commit()
+@cached("clients")
+def get_all_clients():
+    with get_db_connection() as conn: clients = conn.execute("SELECT * FROM clients ORDER BY name ASC").fetchall()
+    return [dict(row) for row in clients]
+@cached("clients")
+def get_client_by_id(client_id):
+    with get_db_connection() as conn: client = conn.execute("SELECT * FROM clients WHERE id = ?", (client_id,)).fetchone()
+    return dict(client) if client else None
+@writes("projects")
+def add_project(name, client_id, rate):
+    with get_db_connection() as conn: conn.execute("INSERT INTO projects (name, client_id, rate) VALUES (?, ?, ?)", (name, client_id, rate)); conn.commit()
+@cached("projects", "clients")
+def get_all_projects_with_client_name():
+    with get_db_connection() as conn: projects = conn.execute("SELECT p.id, p.name, p.status, p.rate, c.name as client_name, p.client_id FROM projects p JOIN clients c ON p.client_id = c.id ORDER BY p.name ASC").fetchall()
+    return [dict(row) for row in projects]
+@cached("projects", "clients")
+def get_project_details(project_id):
+    with get_db_connection() as conn: project = conn.execute("SELECT p.id, p.name, p.status, p.rate, c.name as client_name FROM projects p JOIN clients c ON p.client_id = c.id WHERE p.id = ?", (project_id,)).fetchone()
+    return dict(project) if project else None
+@writes("time_entries")
+def start_time_entry(project_id, start_time):
+    with get_db_connection() as conn: cursor = conn.cursor(); cursor.execute("INSERT INTO time_entries (project_id, start_time) VALUES (?, ?)", (project_id, start_time.isoformat())); conn.commit(); entry_id = cursor.lastrowid
+    return entry_id
+@writes("time_entries")
+def stop_time_entry(entry_id, end_time, duration_minutes, description):
+    with get_db_connection() as conn: conn.execute("UPDATE time_entries SET end_time = ?, duration_minutes = ?, description = ? WHERE id = ?", (end_time.isoformat(), duration_minutes, description, entry_id)); conn.commit()
+def get_time_entries_for_project(project_id):
+    with get_db_connection() as conn: entries = conn.execute("SELECT * FROM time_entries WHERE project_id = ? ORDER BY start_time DESC", (project_id,)).fetchall()
+    return [dict(row) for row in entries]
+def get_unbilled_time_for_project(project_id):
+    with get_db_connection() as conn: entries = conn.execute("SELECT * FROM time_entries WHERE project_id = ? AND is_billed = 0 AND duration_minutes IS NOT NULL", (project_id,)).fetchall()
+    return [dict(row) for row in entries]
+def get_next_invoice_number(issue_date=None):
+    """The number the next invoice will probably get; the real one is allocated when it is saved."""
+    with get_db_connection() as conn:
+        number = next_invoice_number(conn, issue_date)
+    return number
+@writes("invoice_sequences")
+def reserve_invoice_numbers(count, issue_date=None):
+    """Takes `count` consecutive invoice numbers for the caller to use; numbers not used become gaps."""
     conn = get_db_connection()
-    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
-    conn.commit()
-    conn.close()
-
-def add_client(name, email, address): conn = get_db_connection(); conn.execute("INSERT INTO clients (name, email, address) VALUES (?, ?, ?)", (name, email, address)); conn.commit(); conn.close()
-def get_all_clients(): conn = get_db_connection(); clients = conn.execute("SELECT * FROM clients ORDER BY name ASC").fetchall(); conn.close(); return [dict(row) for row in clients]
-def get_client_by_id(client_id): conn = get_db_connection(); client = conn.execute("SELECT * FROM clients WHERE id = ?", (client_id,)).fetchone(); conn.close(); return dict(client) if client else None
-def add_project(name, client_id, rate): conn = get_db_connection(); conn.execute("INSERT INTO projects (name, client_id, rate) VALUES (?, ?, ?)", (name, client_id, rate)); conn.commit(); conn.close()
-def get_all_projects_with_client_name(): conn = get_db_connection(); projects = conn.execute("SELECT p.id, p.name, p.status, p.rate, c.name as client_name, p.client_id FROM projects p JOIN clients c ON p.client_id = c.id ORDER BY p.name ASC").fetchall(); conn.close(); return [dict(row) for row in projects]
-def get_project_details(project_id): conn = get_db_connection(); project = conn.execute("SELECT p.id, p.name, p.status, p.rate, c.name as client_name FROM projects p JOIN clients c ON p.client_id = c.id WHERE p.id = ?", (project_id,)).fetchone(); conn.close(); return dict(project) if project else None
-def start_time_entry(project_id, start_time): conn = get_db_connection(); cursor = conn.cursor(); cursor.execute("INSERT INTO time_entries (project_id, start_time) VALUES (?, ?)", (project_id, start_time.isoformat())); conn.commit(); entry_id = cursor.lastrowid; conn.close(); return entry_id
-def stop_time_entry(entry_id, end_time, duration_minutes, description): conn = get_db_connection(); conn.execute("UPDATE time_entries SET end_time = ?, duration_minutes = ?, description = ? WHERE id = ?", (end_time.isoformat(), duration_minutes, description, entry_id)); conn.commit(); conn.close()
-def get_time_entries_for_project(project_id): conn = get_db_connection(); entries = conn.execute("SELECT * FROM time_entries WHERE project_id = ? ORDER BY start_time DESC", (project_id,)).fetchall(); conn.close(); return [dict(row) for row in entries]
-def get_unbilled_time_for_project(project_id): conn = get_db_connection(); entries = conn.execute("SELECT * FROM time_entries WHERE project_id = ? AND is_billed = 0 AND duration_minutes IS NOT NULL", (project_id,)).fetchall(); conn.close(); return [dict(row) for row in entries]
-def get_next_invoice_number():
+    try:
+        numbers = allocate_invoice_numbers(conn, count, issue_date)
+        conn.commit()
+        return numbers
+    finally:
+        conn.close()
+@writes("settings", "invoice_sequences")
+def set_invoice_number_series(mode):
+    """Switches between 'yearly' and 'global' numbering; counters restart from the numbers in use."""
+    if mode not in SERIES_MODES:
+        raise ValueError(f"Unknown invoice number series '{mode}'")
     conn = get_db_connection()
-    last_inv = conn.execute("SELECT invoice_number FROM invoices ORDER BY id DESC LIMIT 1").fetchone()
-    conn.close()
-    if not last_inv:
-        return f"INV-{datetime.now().year}-001"
-    last_num = int(last_inv['invoice_number'].split('-')[-1])
-    return f"INV-{datetime.now().year}-{last_num + 1:03d}"
+    try:
+        conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (SERIES_SETTING, mode))
+        # Counters of the other mode may lag behind numbers issued since; they reseed on next use.
+        conn.execute("DELETE FROM invoice_sequences")
+        conn.commit()
+    finally:
+        conn.close()
+def get_unbilled_line_items(project_id, grouping="entry", rate=None):
+    """
+    Consolidated invoice line items for a project's unbilled time (see database/line_items.py).
+    `rate` defaults to the project's rate. Each item lists the entry_ids it bills.
+    """
+    conn = get_db_connection()
+    try:
+        if rate is None:
+            row = conn.execute("SELECT rate FROM projects WHERE id = ?", (project_id,)).fetchone()
+            rate = (row["rate"] if row else None) or 0.0
+        return consolidate_unbilled(conn, project_id, grouping, rate)
+    finally:
+        conn.close()
+@writes("invoices", "invoice_items", "time_entries", "invoice_sequences")
 def create_invoice_from_time_entries(invoice_data, line_items, time_entry_ids):
+    """Saves the invoice and returns its id; a missing invoice_data['invoice_number'] is allocated and filled in."""
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO invoices (invoice_number, client_id, issue_date, due_date, status, total_amount) VALUES (?, ?, ?, ?, ?, ?)",
-        (invoice_data['invoice_number'], invoice_data['client_id'], invoice_data['issue_date'], invoice_data['due_date'], 'Draft', invoice_data['total_amount'])
-    )
-    invoice_id = cursor.lastrowid
-    for item in line_items:
-        cursor.execute(
-            "INSERT INTO invoice_items (invoice_id, description, quantity, rate, amount) VALUES (?, ?, ?, ?, ?)",
-            (invoice_id, item['description'], item['quantity'], item['rate'], item['amount'])
-        )
-    if time_entry_ids:
-        cursor.execute(
-            f"UPDATE time_entries SET is_billed = 1, invoice_id = ? WHERE id IN ({','.join('?' for _ in time_entry_ids)})",
-            [invoice_id] + time_entry_ids
-        )
-    conn.commit()
-    conn.close()
+    try:
+        invoice_id = insert_invoice(conn, invoice_data, line_items, time_entry_ids)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
     return invoice_id
-def update_invoice_pdf_path(invoice_id, pdf_path): conn = get_db_connection(); conn.execute("UPDATE invoices SET pdf_path = ? WHERE id = ?", (pdf_path, invoice_id)); conn.commit(); conn.close()
-def get_all_invoices_with_details(): conn = get_db_connection(); invoices = conn.execute("SELECT i.id, i.invoice_number, i.status, i.total_amount, i.issue_date, c.name as client_name FROM invoices i JOIN clients c ON i.client_id = c.id ORDER BY i.id DESC").fetchall(); conn.close(); return [dict(row) for row in invoices]
-def get_invoices_for_project(project_id): conn = get_db_connection(); invoices = conn.execute("SELECT DISTINCT i.* FROM invoices i JOIN time_entries te ON i.id = te.invoice_id WHERE te.project_id = ? ORDER BY i.issue_date DESC", (project_id,)).fetchall(); conn.close(); return [dict(row) for row in invoices]
-def add_expense(description, category, amount, expense_date, receipt_path=None): conn = get_db_connection(); conn.execute("INSERT INTO expenses (description, category, amount, expense_date, receipt_path) VALUES (?, ?, ?, ?, ?)", (description, category, amount, expense_date, receipt_path)); conn.commit(); conn.close()
-def get_all_expenses(): conn = get_db_connection(); expenses = conn.execute("SELECT * FROM expenses ORDER BY expense_date DESC").fetchall(); conn.close(); return [dict(row) for row in expenses]
-def get_project_financial_summary(project_id): conn = get_db_connection(); total_hours_data = conn.execute("SELECT SUM(duration_minutes) as total FROM time_entries WHERE project_id = ?", (project_id,)).fetchone(); total_hours = (total_hours_data['total'] / 60.0) if total_hours_data['total'] else 0.0; billed_amount_data = conn.execute("SELECT SUM(ii.amount) as total FROM invoice_items ii JOIN invoices i ON ii.invoice_id = i.id JOIN time_entries te ON i.id = te.invoice_id WHERE te.project_id = ?", (project_id,)).fetchone(); billed_amount = billed_amount_data['total'] if billed_amount_data['total'] else 0.0; conn.close(); return {"total_hours": total_hours, "billed_amount": billed_amount}
-def get_dashboard_kpis(): conn = get_db_connection(); total_revenue_data = conn.execute("SELECT SUM(total_amount) FROM invoices WHERE status = 'Paid'").fetchone(); total_revenue = total_revenue_data[0] if total_revenue_data[0] else 0.0; total_unpaid_data = conn.execute("SELECT SUM(total_amount) FROM invoices WHERE status IN ('Draft', 'Sent', 'Overdue')").fetchone(); total_unpaid = total_unpaid_data[0] if total_unpaid_data[0] else 0.0; active_projects_data = conn.execute("SELECT COUNT(id) FROM projects WHERE status = 'Active'").fetchone(); active_projects = active_projects_data[0] if active_projects_data[0] else 0; this_month = datetime.now().strftime('%Y-%m'); logged_hours_data = conn.execute("SELECT SUM(duration_minutes) FROM time_entries WHERE strftime('%Y-%m', start_time) = ?", (this_month,)).fetchone(); logged_hours_this_month = (logged_hours_data[0] / 60.0) if logged_hours_data[0] else 0.0; conn.close(); return {"total_revenue": total_revenue, "total_unpaid": total_unpaid, "active_projects": active_projects, "logged_hours_this_month": logged_hours_this_month}
-def get_recent_activity(limit=5): conn = get_db_connection(); activity = conn.execute("SELECT te.start_time, te.duration_minutes, te.description, p.name as project_name FROM time_entries te JOIN projects p ON te.project_id = p.id WHERE te.duration_minutes IS NOT NULL ORDER BY te.start_time DESC LIMIT ?", (limit,)).fetchall(); conn.close(); return [dict(row) for row in activity]
-def get_monthly_income_summary(months=6): conn = get_db_connection(); summary = conn.execute("SELECT strftime('%Y-%m', issue_date) as month, SUM(total_amount) as total FROM invoices WHERE status = 'Paid' AND issue_date >= date('now', '-' || ? || ' months') GROUP BY month ORDER BY month ASC", (months,)).fetchall(); conn.close(); return {row['month']: row['total'] for row in summary}
+@writes("invoices")
+def update_invoice_pdf_path(invoice_id, pdf_path):
+    with get_db_connection() as conn: conn.execute("UPDATE invoices SET pdf_path = ? WHERE id = ?", (pdf_path, invoice_id)); conn.commit()
+def get_all_invoices_with_details():
+    with get_db_connection() as conn: invoices = conn.execute("SELECT i.id, i.invoice_number, i.status, i.total_amount, i.issue_date, c.name as client_name FROM invoices i JOIN clients c ON i.client_id = c.id ORDER BY i.id DESC").fetchall()
+    return [dict(row) for row in invoices]
+def get_invoice_render_data(invoice_id):
+    """What create_invoice_pdf needs for a saved invoice: {"invoice_data", "line_items", "client_data"}, or None."""
+    conn = get_db_connection()
+    try:
+        invoice = conn.execute("SELECT invoice_number, client_id, issue_date, due_date, total_amount FROM invoices WHERE id = ?", (invoice_id,)).fetchone()
+        if invoice is None:
+            return None
+        items = conn.execute("SELECT description, quantity, rate, amount FROM invoice_items WHERE invoice_id = ? ORDER BY id", (invoice_id,)).fetchall()
+        client = conn.execute("SELECT * FROM clients WHERE id = ?", (invoice["client_id"],)).fetchone()
+        return {"invoice_data": dict(invoice), "line_items": [dict(row) for row in items], "client_data": dict(client) if client else {}}
+    finally:
+        conn.close()
+def get_invoices_for_project(project_id):
+    with get_db_connection() as conn: invoices = conn.execute("SELECT DISTINCT i.* FROM invoices i JOIN time_entries te ON i.id = te.invoice_id WHERE te.project_id = ? ORDER BY i.issue_date DESC", (project_id,)).fetchall()
+    return [dict(row) for row in invoices]
+@writes("expenses")
+def add_expense(description, category, amount, expense_date, receipt_path=None):
+    with get_db_connection() as conn: conn.execute("INSERT INTO expenses (description, category, amount, expense_date, receipt_path) VALUES (?, ?, ?, ?, ?)", (description, category, amount, expense_date, receipt_path)); conn.commit()
+def get_all_expenses():
+    with get_db_connection() as conn: expenses = conn.execute("SELECT * FROM expenses ORDER BY expense_date DESC").fetchall()
+    return [dict(row) for row in expenses]
+def get_project_financial_summary(project_id):
+    """
+    Hours and billed/unbilled/paid/outstanding amounts for one project (see financial_summary.py).
+    Keeps the original "total_hours" and "billed_amount" keys.
+    """
+    with get_db_connection() as conn:
+        summary = financial_summary.project_summary(conn, project_id)
+    return summary
+
+def get_all_project_financial_summaries(client_id=None):
+    """{project_id: summary} for all projects (or one client's) in a single query."""
+    with get_db_connection() as conn:
+        summaries = financial_summary.project_summaries(conn, client_id)
+    return summaries
+
+def get_client_financial_summaries(client_id=None):
+    """{client_id: summary} summed over each client's projects."""
+    with get_db_connection() as conn:
+        summaries = financial_summary.client_summaries(conn, client_id)
+    return summaries
+def get_dashboard_kpis():
+    """Reads the dashboard KPIs from the trigger-maintained rollup tables (see rollups.py)."""
+    with get_db_connection() as conn:
+        kpis = conn.execute(
+            """SELECT
+                (SELECT total_amount FROM rollup_invoice_status WHERE status = 'Paid'),
+                (SELECT SUM(total_amount) FROM rollup_invoice_status WHERE status IN ('Draft', 'Sent', 'Overdue')),
+                (SELECT project_count FROM rollup_project_status WHERE status = 'Active'),
+                (SELECT SUM(minutes) FROM rollup_project_month_hours WHERE month = ?)""",
+            (datetime.now().strftime('%Y-%m'),)
+        ).fetchone()
+    return {
+        "total_revenue": kpis[0] if kpis[0] else 0.0,
+        "total_unpaid": kpis[1] if kpis[1] else 0.0,
+        "active_projects": kpis[2] if kpis[2] else 0,
+        "logged_hours_this_month": (kpis[3] / 60.0) if kpis[3] else 0.0
+    }
+def get_recent_activity(limit=5):
+    with get_db_connection() as conn: activity = conn.execute("SELECT te.start_time, te.duration_minutes, te.description, p.name as project_name FROM time_entries te JOIN projects p ON te.project_id = p.id WHERE te.duration_minutes IS NOT NULL ORDER BY te.start_time DESC LIMIT ?", (limit,)).fetchall()
+    return [dict(row) for row in activity]
+def get_monthly_income_summary(months=6):
+    with get_db_connection() as conn: summary = conn.execute("SELECT strftime('%Y-%m', issue_date) as month, SUM(total_amount) as total FROM invoices WHERE status = 'Paid' AND issue_date >= date('now', '-' || ? || ' months') GROUP BY month ORDER BY month ASC", (months,)).fetchall()
+    return {row['month']: row['total'] for row in summary}
+
+# --- Project Dashboard ---
+# str(timedelta(minutes=m)) in SQL: "H:MM:00", or "N day(s), H:MM:00" from 24 hours up.
+_DURATION_TEXT = """CASE WHEN te.duration_minutes IS NULL THEN 'Running...'
+    WHEN te.duration_minutes >= 1440 THEN printf('%d day%s, %d:%02d:00', te.duration_minutes / 1440, CASE WHEN te.duration_minutes / 1440 = 1 THEN '' ELSE 's' END, (te.duration_minutes % 1440) / 60, te.duration_minutes % 60)
+    ELSE printf('%d:%02d:00', te.duration_minutes / 60, te.duration_minutes % 60) END"""
+
+def get_project_revision(project_id):
+    """The project's revision counter; triggers bump it whenever anything shown on its dashboard changes."""
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT revision FROM project_revisions WHERE project_id = ?", (project_id,)).fetchone()
+    return row['revision'] if row else 0
+
+def get_project_dashboard_snapshot(project_id):
+    """
+    Everything the project dashboard shows, read in one transaction so all parts come
+    from the same snapshot, with aggregation and most display formatting done in SQL.
+    Returns None if the project does not exist, otherwise a dict with the revision the
+    data was read at, "details", "financials", "time_entries" and "invoices".
+    """
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN")
+        details = conn.execute(
+            """SELECT p.id, p.name, p.status, p.rate, c.name AS client_name,
+                COALESCE((SELECT revision FROM project_revisions WHERE project_id = p.id), 0) AS revision
+            FROM projects p JOIN clients c ON p.client_id = c.id WHERE p.id = ?""", (project_id,)
+        ).fetchone()
+        if details is None:
+            return None
+        summary = financial_summary.project_summary(conn, project_id)
+        time_entries = conn.execute(
+            f"""SELECT COALESCE(strftime('%Y-%m-%d %H:%M', te.start_time), te.start_time) AS date,
+                {_DURATION_TEXT} AS duration, te.description
+            FROM time_entries te WHERE te.project_id = ? ORDER BY te.start_time DESC, te.id DESC""", (project_id,)
+        ).fetchall()
+        invoices = conn.execute(
+            """SELECT i.invoice_number AS number, i.issue_date AS date, i.status, printf('$%.2f', COALESCE(i.total_amount, 0.0)) AS amount
+            FROM invoices i WHERE i.id IN (SELECT invoice_id FROM time_entries WHERE project_id = ? AND invoice_id IS NOT NULL)
+            ORDER BY i.issue_date DESC""", (project_id,)
+        ).fetchall()
+    finally:
+        if conn.in_transaction:
+            conn.rollback()  # read-only; just ends the snapshot
+        conn.close()
+    return {
+        "revision": details['revision'],
+        "details": {key: details[key] for key in ("id", "name", "status", "rate", "client_name")},
+        "financials": {"total_hours": f"{summary['total_hours']:.2f} hrs", "billed_amount": f"${summary['billed_amount']:.2f}"},
+        "time_entries": [dict(row) for row in time_entries],
+        "invoices": [dict(row) for row in invoices],
+    }
+
+# --- Billing Runs (see billing_runs.py; rendering lives in shared/billing_run.py) ---
+def preview_billing_run(period_start, period_end):
+    conn = get_db_connection()
+    try:
+        return billing_runs.preview(conn, period_start, period_end)
+    finally:
+        conn.close()
+@writes("invoices", "invoice_items", "time_entries", "invoice_sequences", "billing_runs", "billing_run_invoices")
+def create_billing_run(period_start, period_end, issue_date, due_date, grouping="week"):
+    """Creates every invoice of the run in one transaction; returns the run id (None if there was nothing to bill)."""
+    conn = get_db_connection()
+    try:
+        # IMMEDIATE takes the write lock up front, so no other writer can take an invoice number mid-run.
+        conn.execute("BEGIN IMMEDIATE")
+        run_id = billing_runs.create_run(conn, period_start, period_end, issue_date, due_date, grouping)
+        conn.commit()
+        return run_id
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+def get_billing_run(run_id):
+    with get_db_connection() as conn: run = billing_runs.get_run(conn, run_id)
+    return run
+def get_billing_runs(unfinished_only=False):
+    with get_db_connection() as conn: runs = billing_runs.list_runs(conn, unfinished_only)
+    return runs
+def get_billing_run_render_jobs(run_id):
+    with get_db_connection() as conn: jobs = billing_runs.pending_render_jobs(conn, run_id)
+    return jobs
+def get_billing_run_errors(run_id):
+    with get_db_connection() as conn: errors = billing_runs.run_errors(conn, run_id)
+    return errors
+@writes("invoices", "billing_run_invoices")
+def record_billing_run_render(run_id, invoice_id, pdf_path=None, error=None):
+    with get_db_connection() as conn: billing_runs.record_render(conn, run_id, invoice_id, pdf_path, error); conn.commit()
+@writes("billing_runs")
+def finish_billing_run(run_id):
+    with get_db_connection() as conn: status = billing_runs.finish_run(conn, run_id); conn.commit()
+    return status
+
+# --- Search (see search.py) ---
+def search_all(query, kinds=None, limit=50):
+    """Ranked full-text matches across time entries, invoice items, clients, projects and expenses."""
+    conn = get_db_connection()
+    try:
+        return search.search(conn, query, kinds, limit)
+    finally:
+        conn.close()
+
+# Hits that are not rows of a list of their own are shown under their project or invoice.
+_SEARCH_RESULT_PARENTS = {"time_entry": "SELECT project_id FROM time_entries WHERE id = ?",
+                          "invoice_item": "SELECT invoice_id FROM invoice_items WHERE id = ?"}
+
+def get_search_result_parent(kind, record_id):
+    """Returns the project id of a time entry or the invoice id of an invoice item (None if it no longer exists)."""
+    with get_db_connection() as conn: row = conn.execute(_SEARCH_RESULT_PARENTS[kind], (record_id,)).fetchone()
+    return row[0] if row else None
+
+# --- Analytics (see analytics.py) ---
+@cached("time_entries", "projects", "clients", "invoices", "invoice_items", "expenses")
+def get_time_series(start, end, granularity="month", client_id=None, project_id=None):
+    """Zero-filled hours, billable value, invoiced, paid and expense series per day/week/month/quarter bucket."""
+    from database import analytics  # pulls in NumPy, so it is imported on first use rather than at startup
+    conn = get_db_connection()
+    try:
+        return analytics.time_series(conn, start, end, granularity, client_id, project_id)
+    finally:
+        conn.close()
+
+# --- Keyset Pagination & Streaming ---
+# The *_page functions take the sort key of the last row already shown (a keyset cursor)
+# instead of an OFFSET, so every page costs one index seek no matter how deep it is.
+# Pass the returned rows' last values back as after_* to get the next page.
+# The iter_* generators stream rows from a single cursor in fixed-size batches.
+
+def _iter_query(sql, params=(), batch_size=500):
+    with get_db_connection() as conn:
+        cursor = conn.execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def get_clients_page(page_size=100, after_name=None, after_id=None):
+        conn = get_db_connection()
+        if after_id is None:
+            clients = conn.execute("SELECT * FROM clients ORDER BY name ASC, id ASC LIMIT ?", (page_size,)).fetchall()
+        else:
+            clients = conn.execute("SELECT * FROM clients WHERE (name, id) > (?, ?) ORDER BY name ASC, id ASC LIMIT ?", (after_name, after_id, page_size)).fetchall()
+    return [dict(row) for row in clients]
+
+def iter_clients(batch_size=500):
+    return _iter_query("SELECT * FROM clients ORDER BY name ASC, id ASC", (), batch_size)
+
+def get_time_entries_page(project_id, page_size=100, after_start_time=None, after_id=None):
+    with get_db_connection() as conn:
+        if after_id is None:
+            entries = conn.execute("SELECT * FROM time_entries WHERE project_id = ? ORDER BY start_time DESC, id DESC LIMIT ?", (project_id, page_size)).fetchall()
+        else:
+            entries = conn.execute("SELECT * FROM time_entries WHERE project_id = ? AND (start_time, id) < (?, ?) ORDER BY start_time DESC, id DESC LIMIT ?", (project_id, after_start_time, after_id, page_size)).fetchall()
+    return [dict(row) for row in entries]
+
+def iter_time_entries_for_project(project_id, batch_size=500):
+    return _iter_query("SELECT * FROM time_entries WHERE project_id = ? ORDER BY start_time DESC, id DESC", (project_id,), batch_size)
+
+def get_invoices_page(page_size=100, after_id=None):
+    with get_db_connection() as conn:
+        if after_id is None:
+            invoices = conn.execute("SELECT i.id, i.invoice_number, i.status, i.total_amount, i.issue_date, c.name as client_name FROM invoices i JOIN clients c ON i.client_id = c.id ORDER BY i.id DESC LIMIT ?", (page_size,)).fetchall()
+        else:
+            invoices = conn.execute("SELECT i.id, i.invoice_number, i.status, i.total_amount, i.issue_date, c.name as client_name FROM invoices i JOIN clients c ON i.client_id = c.id WHERE i.id < ? ORDER BY i.id DESC LIMIT ?", (after_id, page_size)).fetchall()
+    return [dict(row) for row in invoices]
+
+def iter_invoice_items(invoice_id, batch_size=500):
+    return _iter_query("SELECT description, quantity, rate, amount FROM invoice_items WHERE invoice_id = ? ORDER BY id", (invoice_id,), batch_size)
+
+def iter_invoices_with_details(batch_size=500):
+    return _iter_query("SELECT i.id, i.invoice_number, i.status, i.total_amount, i.issue_date, c.name as client_name FROM invoices i JOIN clients c ON i.client_id = c.id ORDER BY i.id DESC", (), batch_size)
+
+def get_expenses_page(page_size=100, after_expense_date=None, after_id=None):
+    with get_db_connection() as conn:
+        if after_id is None:
+            expenses = conn.execute("SELECT * FROM expenses ORDER BY expense_date DESC, id DESC LIMIT ?", (page_size,)).fetchall()
+        else:
+            expenses = conn.execute("SELECT * FROM expenses WHERE (expense_date, id) < (?, ?) ORDER BY expense_date DESC, id DESC LIMIT ?", (after_expense_date, after_id, page_size)).fetchall()
+    return [dict(row) for row in expenses]
+
+def iter_expenses(batch_size=500):
+    return _iter_query("SELECT * FROM expenses ORDER BY expense_date DESC, id DESC", (), batch_size)
+
+# Full-table streams for the CSV exporters (shared/export_manager.py).
+def iter_projects_with_client_name(batch_size=500):
+    return _iter_query("SELECT p.id, p.name, p.status, p.rate, c.name as client_name, p.client_id FROM projects p JOIN clients c ON p.client_id = c.id ORDER BY p.name ASC, p.id ASC", (), batch_size)
+
+def iter_time_entries(batch_size=500):
+    return _iter_query("SELECT te.*, p.name as project_name, c.name as client_name FROM time_entries te JOIN projects p ON p.id = te.project_id JOIN clients c ON c.id = p.client_id ORDER BY te.start_time ASC, te.id ASC", (), batch_size)
+
+def iter_all_invoice_items(batch_size=500):
+    return _iter_query("SELECT ii.*, i.invoice_number FROM invoice_items ii JOIN invoices i ON i.id = ii.invoice_id ORDER BY ii.invoice_id ASC, ii.id ASC", (), batch_size)
+
+_COUNTABLE_TABLES = {"clients", "projects", "time_entries", "invoices", "invoice_items", "expenses"}
+
+def count_rows(table):
+    if table not in _COUNTABLE_TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    with get_db_connection() as conn: count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    return count
+
+# --- Table Sources ---
+# Row sources for the SQL-backed table models (ui/widgets/sql_table_model.py).
+# Each source has the columns to select (the first is the row id), the FROM clause,
+# the SQL expressions it may be sorted by, its default sort and the columns it may be
+# filtered on. Sort keys over nullable columns use IFNULL so keyset comparisons work.
+# Sort and filter names are looked up here, so no caller-supplied text reaches the SQL.
+TABLE_SOURCES = {
+    "clients": {
+        "columns": "id, name, email, address",
+        "from": "clients",
+        "sort_keys": {"id": "id", "name": "name", "email": "IFNULL(email, '')", "address": "IFNULL(address, '')"},
+        "default_sort": ("name", False),
+        "filters": {},
+    },
+    "projects": {
+        "columns": "p.id, p.name, c.name AS client_name, p.status, p.rate, p.client_id",
+        "from": "projects p JOIN clients c ON p.client_id = c.id",
+        "sort_keys": {"id": "p.id", "name": "p.name", "client_name": "c.name", "status": "IFNULL(p.status, '')", "rate": "IFNULL(p.rate, 0)"},
+        "default_sort": ("name", False),
+        "filters": {"client_id": "p.client_id", "status": "p.status"},
+    },
+    "invoices": {
+        "columns": "i.id, i.invoice_number, c.name AS client_name, i.issue_date, i.status, i.total_amount",
+        "from": "invoices i JOIN clients c ON i.client_id = c.id",
+        "sort_keys": {"id": "i.id", "invoice_number": "i.invoice_number", "client_name": "c.name", "issue_date": "i.issue_date", "status": "IFNULL(i.status, '')", "total_amount": "IFNULL(i.total_amount, 0)"},
+        "default_sort": ("id", True),
+        "filters": {"client_id": "i.client_id", "status": "i.status"},
+    },
+    "expenses": {
+        "columns": "id, expense_date, description, category, amount",
+        "from": "expenses",
+        "sort_keys": {"id": "id", "expense_date": "expense_date", "description": "description", "category": "IFNULL(category, '')", "amount": "amount"},
+        "default_sort": ("expense_date", True),
+        "filters": {"category": "category"},
+    },
+    "time_entries": {
+        "columns": "id, start_time, duration_minutes, description, is_billed, project_id",
+        "from": "time_entries",
+        "sort_keys": {"id": "id", "start_time": "start_time", "duration_minutes": "IFNULL(duration_minutes, -1)", "description": "IFNULL(description, '')", "is_billed": "IFNULL(is_billed, 0)"},
+        "default_sort": ("start_time", True),
+        "filters": {"project_id": "project_id", "is_billed": "is_billed"},
+    },
+}
+
+def _table_source_where(source, filters):
+    spec = TABLE_SOURCES[source]
+    clauses, params = [], []
+    for name, value in (filters or {}).items():
+        clauses.append(f"{spec['filters'][name]} = ?")
+        params.append(value)
+    return clauses, params
+
+def get_table_source_columns(source):
+    """Returns the column names of a table source, in SELECT order."""
+    spec = TABLE_SOURCES[source]
+    with get_db_connection() as conn:
+        cursor = conn.execute(f"SELECT {spec['columns']} FROM {spec['from']} LIMIT 0")
+        columns = [description[0] for description in cursor.description]
+    return columns
+
+def count_table_rows(source, filters=None):
+    """Returns the number of rows in a table source (after filters)."""
+    spec = TABLE_SOURCES[source]
+    clauses, params = _table_source_where(source, filters)
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    with get_db_connection() as conn:
+        count = conn.execute(f"SELECT COUNT(*) FROM {spec['from']}{where}", params).fetchone()[0]
+    return count
+
+def _table_source_order(source, sort_key, descending):
+    """Returns the sort expression, id column and direction of a table source (its default sort for None)."""
+    spec = TABLE_SOURCES[source]
+    default_key, default_desc = spec['default_sort']
+    sort_key = sort_key or default_key
+    descending = default_desc if descending is None else descending
+    return spec['sort_keys'][sort_key], spec['sort_keys']['id'], descending
+
+def get_table_page(source, sort_key=None, descending=None, limit=200, after=None, filters=None):
+    """
+    Returns one page of a table source as a list of tuples: the source's columns
+    followed by the row's sort value. Sorting is done in SQL with the row id as a
+    tie-breaker. `after` is the (sort value, id) of the last row of the previous
+    page (keyset pagination), or None for the first page.
+    """
+    spec = TABLE_SOURCES[source]
+    sort_expr, id_column, descending = _table_source_order(source, sort_key, descending)
+    direction, comparison = ("DESC", "<") if descending else ("ASC", ">")
+    clauses, params = _table_source_where(source, filters)
+    if after is not None:
+        clauses.append(f"({sort_expr}, {id_column}) {comparison} (?, ?)")
+        params.extend(after)
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    sql = (f"SELECT {spec['columns']}, {sort_expr} FROM {spec['from']}{where} "
+           f"ORDER BY {sort_expr} {direction}, {id_column} {direction} LIMIT ?")
+    with get_db_connection() as conn:
+        rows = conn.execute(sql, params + [limit]).fetchall()
+    return [tuple(row) for row in rows]
+
+def get_table_row_position(source, row_id, sort_key=None, descending=None, filters=None):
+    """
+    Returns how many rows of a table source come before the row with id `row_id` in the
+    given order, or None if the source (after filters) has no such row. Both lookups use
+    the same (sort value, id) comparison as the keyset pages.
+    """
+    spec = TABLE_SOURCES[source]
+    sort_expr, id_column, descending = _table_source_order(source, sort_key, descending)
+    clauses, params = _table_source_where(source, filters)
+    where = "".join(f" AND {clause}" for clause in clauses)
+    conn = get_db_connection()
+    try:
+        row = conn.execute(f"SELECT {sort_expr} FROM {spec['from']} WHERE {id_column} = ?{where}", [row_id] + params).fetchone()
+        if row is None:
+            return None
+        before = f"({sort_expr}, {id_column}) {'>' if descending else '<'} (?, ?)"
+        return conn.execute(f"SELECT COUNT(*) FROM {spec['from']} WHERE {before}{where}", [row[0], row_id] + params).fetchone()[0]
+    finally:
+        conn.close()
+
+def get_table_page_through(source, row_id, sort_key=None, descending=None, limit=200, after=None, loaded=0, filters=None):
+    """
+    Like get_table_page, but long enough to reach the row with id `row_id` (`loaded` rows
+    are loaded already, up to `after`), plus `limit` rows past it.
+    """
+    position = get_table_row_position(source, row_id, sort_key, descending, filters)
+    if position is not None:
+        limit += max(position + 1 - loaded, 0)
+    return get_table_page(source, sort_key, descending, limit, after, filters)
 
 # --- Delete Functions ---
-def delete_client(client_id): conn = get_db_connection(); conn.execute("DELETE FROM clients WHERE id = ?", (client_id,)); conn.commit(); conn.close()
-def delete_project(project_id): conn = get_db_connection(); conn.execute("DELETE FROM projects WHERE id = ?", (project_id,)); conn.commit(); conn.close()
-def delete_invoice(invoice_id): conn = get_db_connection(); conn.execute("UPDATE time_entries SET is_billed = 0, invoice_id = NULL WHERE invoice_id = ?", (invoice_id,)); conn.execute("DELETE FROM invoices WHERE id = ?", (invoice_id,)); conn.commit(); conn.close()
-def delete_expense(expense_id): conn = get_db_connection(); conn.execute("DELETE FROM expenses WHERE id = ?", (expense_id,)); conn.commit(); conn.close()
+@writes("clients", "projects", "time_entries", "invoices", "invoice_items", "billing_run_invoices")
+def delete_client(client_id):
+    with get_db_connection() as conn: conn.execute("DELETE FROM clients WHERE id = ?", (client_id,)); conn.commit()
+@writes("projects", "time_entries")
+def delete_project(project_id):
+    with get_db_connection() as conn: conn.execute("DELETE FROM projects WHERE id = ?", (project_id,)); conn.commit()
+@writes("invoices", "invoice_items", "time_entries", "billing_run_invoices")
+def delete_invoice(invoice_id):
+    with get_db_connection() as conn: conn.execute("UPDATE time_entries SET is_billed = 0, invoice_id = NULL WHERE invoice_id = ?", (invoice_id,)); conn.execute("DELETE FROM invoices WHERE id = ?", (invoice_id,)); conn.commit()
+@writes("expenses")
+def delete_expense(expense_id):
+    with get_db_connection() as conn: conn.execute("DELETE FROM expenses WHERE id = ?", (expense_id,)); conn.commit()
 
 # --- NEW: Function to delete a time entry ---
+@writes("time_entries")
 def delete_time_entry(entry_id):
     """Deletes a single time entry record from the database."""
-    conn = get_db_connection()
-    conn.execute("DELETE FROM time_entries WHERE id = ?", (entry_id,))
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM time_entries WHERE id = ?", (entry_id,))
+        conn.commit()
 
-initialize_database()
\ No newline at end of file
+# --- Opt-in instrumentation (FREELANCER_HUB_PROFILE=1, see instrumentation.py) ---
+# Runs before any other module imports these functions by name, so they get the wrapped versions.
+if instrumentation.is_enabled():
+    instrumentation.install(sys.modules[__name__], connection_manager)
@@ -0,0 +1,109 @@
+# database/financial_summary.py
+
+# --- Financial Summaries ---
+# Hours and money per project (and per client) computed in one set-based query.
+# Invoices are linked to projects only through their time entries, so the query
+# first reduces time_entries to distinct (invoice, project) pairs with the minutes
+# each project contributed, and sums every invoice's items exactly once. An invoice
+# that spans several projects is split between them by billed minutes (evenly if it
+# has no minutes), so per-project amounts always add up to the invoice totals.
+#
+#   total_hours        all logged time
+#   unbilled_hours     finished entries not yet on an invoice
+#   unbilled_amount    unbilled_hours at the project's rate
+#   billed_amount      the project's share of every invoice it appears on
+#   paid_amount        ... of invoices with status 'Paid'
+#   outstanding_amount billed_amount - paid_amount
+#   invoice_count      distinct invoices the project appears on
+#
+# The functions take an open connection; database_manager wraps them.
+
+SUMMARY_FIELDS = ("total_hours", "unbilled_hours", "unbilled_amount", "billed_amount",
+                  "paid_amount", "outstanding_amount", "invoice_count")
+
+
+def _project_summary_sql(scope):
+    """Builds the summary query for scope None (all projects), 'project' or 'client'."""
+    if scope == "project":
+        projects = "SELECT ?"
+    elif scope == "client":
+        projects = "SELECT id FROM projects WHERE client_id = ?"
+    else:
+        projects = None
+    entry_filter = f"WHERE project_id IN ({projects})" if projects else ""
+    # Pairs for every invoice touching the selected projects, including the other
+    # projects on those invoices, which the minute shares need.
+    invoice_filter = (f"AND invoice_id IN (SELECT invoice_id FROM time_entries WHERE project_id IN ({projects}) AND invoice_id IS NOT NULL)"
+                      if projects else "")
+    project_filter = f"WHERE p.id IN ({projects})" if projects else ""
+    return f"""
+        WITH pairs AS (
+            SELECT invoice_id, project_id, SUM(COALESCE(duration_minutes, 0)) AS minutes
+            FROM time_entries WHERE invoice_id IS NOT NULL {invoice_filter}
+            GROUP BY invoice_id, project_id
+        ), invoice_minutes AS (
+            SELECT invoice_id, SUM(minutes) AS minutes, COUNT(*) AS project_count FROM pairs GROUP BY invoice_id
+        ), item_totals AS (
+            SELECT invoice_id, SUM(amount) AS amount FROM invoice_items
+            WHERE invoice_id IN (SELECT invoice_id FROM invoice_minutes) GROUP BY invoice_id
+        ), shares AS (
+            SELECT pairs.project_id, i.status,
+                COALESCE(item_totals.amount, i.total_amount, 0.0)
+                    * CASE WHEN im.minutes > 0 THEN pairs.minutes * 1.0 / im.minutes ELSE 1.0 / im.project_count END AS amount
+            FROM pairs
+            JOIN invoice_minutes im ON im.invoice_id = pairs.invoice_id
+            JOIN invoices i ON i.id = pairs.invoice_id
+            LEFT JOIN item_totals ON item_totals.invoice_id = pairs.invoice_id
+        ), billing AS (
+            SELECT project_id, COUNT(*) AS invoice_count, SUM(amount) AS billed,
+                SUM(CASE WHEN status = 'Paid' THEN amount ELSE 0.0 END) AS paid
+            FROM shares GROUP BY project_id
+        ), hours AS (
+            SELECT project_id, SUM(duration_minutes) AS minutes,
+                SUM(CASE WHEN is_billed = 0 THEN duration_minutes END) AS unbilled_minutes
+            FROM time_entries {entry_filter} GROUP BY project_id
+        )
+        SELECT p.id AS project_id, p.client_id,
+            COALESCE(hours.minutes, 0) / 60.0 AS total_hours,
+            COALESCE(hours.unbilled_minutes, 0) / 60.0 AS unbilled_hours,
+            COALESCE(hours.unbilled_minutes, 0) / 60.0 * COALESCE(p.rate, 0.0) AS unbilled_amount,
+            COALESCE(billing.billed, 0.0) AS billed_amount,
+            COALESCE(billing.paid, 0.0) AS paid_amount,
+            COALESCE(billing.billed, 0.0) - COALESCE(billing.paid, 0.0) AS outstanding_amount,
+            COALESCE(billing.invoice_count, 0) AS invoice_count
+        FROM projects p
+        LEFT JOIN hours ON hours.project_id = p.id
+        LEFT JOIN billing ON billing.project_id = p.id
+        {project_filter}
+    """
+
+
+def _params(scope, value):
+    # The scope's placeholder appears once in each of the three filters.
+    return (value,) * 3 if scope else ()
+
+
+def empty_summary():
+    return {field: 0 if field == "invoice_count" else 0.0 for field in SUMMARY_FIELDS}
+
+
+def project_summary(conn, project_id):
+    """Summary dict for one project (all zeros if it does not exist)."""
+    row = conn.execute(_project_summary_sql("project"), _params("project", project_id)).fetchone()
+    return {field: row[field] for field in SUMMARY_FIELDS} if row else empty_summary()
+
+
+def project_summaries(conn, client_id=None):
+    """{project_id: summary} for every project, or for one client's projects."""
+    scope = "client" if client_id is not None else None
+    rows = conn.execute(_project_summary_sql(scope), _params(scope, client_id)).fetchall()
+    return {row["project_id"]: {"client_id": row["client_id"], **{field: row[field] for field in SUMMARY_FIELDS}} for row in rows}
+
+
+def client_summaries(conn, client_id=None):
+    """{client_id: summary} summed over each client's projects (clients without projects are omitted)."""
+    scope = "client" if client_id is not None else None
+    sums = ", ".join(f"SUM({field}) AS {field}" for field in SUMMARY_FIELDS)
+    rows = conn.execute(f"SELECT client_id, {sums} FROM ({_project_summary_sql(scope)}) GROUP BY client_id",
+                        _params(scope, client_id)).fetchall()
+    return {row["client_id"]: {field: row[field] for field in SUMMARY_FIELDS} for row in rows}
@@ -0,0 +1,332 @@
+# database/instrumentation.py
+
+# --- Query Instrumentation (opt-in) ---
+# Set FREELANCER_HUB_PROFILE=1 to record, for every public database_manager function
+# and for every SQL statement, the call count, cumulative and max latency and the
+# rows returned. Statements slower than FREELANCER_HUB_SLOW_QUERY_MS (default 50 ms)
+# are written with their EXPLAIN QUERY PLAN to a rotating slow-query log.
+# The stats are shown in Settings > Query Statistics and written as JSON at exit
+# (to FREELANCER_HUB_PROFILE_DUMP, default query_stats.json next to the database).
+# When the variable is unset nothing is wrapped and there is no overhead.
+
+import atexit
+import functools
+import inspect
+import json
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from database.connection_manager import PooledConnection
+
+PROFILE_ENV = "FREELANCER_HUB_PROFILE"
+SLOW_QUERY_MS_ENV = "FREELANCER_HUB_SLOW_QUERY_MS"
+DUMP_ENV = "FREELANCER_HUB_PROFILE_DUMP"
+SLOW_LOG_ENV = "FREELANCER_HUB_SLOW_QUERY_LOG"
+
+DEFAULT_SLOW_QUERY_MS = 50.0
+SLOW_LOG_MAX_BYTES = 1024 * 1024
+SLOW_LOG_BACKUPS = 3
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def is_enabled():
+    return os.environ.get(PROFILE_ENV, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def normalize_sql(sql):
+    """Collapses whitespace so the same statement is always counted under one key."""
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class _Stat:
+    __slots__ = ("calls", "errors", "rows", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def as_dict(self, name):
+        return {"name": name, "calls": self.calls, "errors": self.errors, "rows": self.rows,
+                "total_ms": self.total * 1000.0, "max_ms": self.max * 1000.0,
+                "mean_ms": self.total / self.calls * 1000.0 if self.calls else 0.0}
+
+
+class QueryStats:
+    """Thread-safe per-function and per-SQL counters, shared by all pooled connections."""
+
+    def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self.slow_log = None
+        self.started = datetime.now()
+        self._lock = threading.Lock()
+        self._functions = {}
+        self._statements = {}
+        self.slow_queries = 0
+
+    def _get(self, table, name):
+        stat = table.get(name)
+        if stat is None:
+            stat = table[name] = _Stat()
+        return stat
+
+    def add_call(self, kind, name):
+        with self._lock:
+            self._get(self._functions if kind == "function" else self._statements, name).calls += 1
+
+    def add_time(self, kind, name, seconds, call_elapsed, rows=0):
+        with self._lock:
+            stat = self._get(self._functions if kind == "function" else self._statements, name)
+            stat.total += seconds
+            stat.rows += rows
+            if call_elapsed > stat.max:
+                stat.max = call_elapsed
+
+    def add_error(self, kind, name):
+        with self._lock:
+            self._get(self._functions if kind == "function" else self._statements, name).errors += 1
+
+    def snapshot(self):
+        """Returns {"functions": [...], "statements": [...]} sorted by cumulative time."""
+        with self._lock:
+            functions = [stat.as_dict(name) for name, stat in self._functions.items()]
+            statements = [stat.as_dict(name) for name, stat in self._statements.items()]
+        functions.sort(key=lambda s: s["total_ms"], reverse=True)
+        statements.sort(key=lambda s: s["total_ms"], reverse=True)
+        return {"started": self.started.isoformat(timespec="seconds"), "slow_query_ms": self.slow_query_ms,
+                "slow_queries": self.slow_queries, "functions": functions, "statements": statements}
+
+    def reset(self):
+        with self._lock:
+            self._functions.clear()
+            self._statements.clear()
+            self.slow_queries = 0
+            self.started = datetime.now()
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def log_slow_query(self, conn, sql, parameters, elapsed):
+        with self._lock:
+            self.slow_queries += 1
+        if self.slow_log is None:
+            return
+        plan = explain_query_plan(conn, sql, parameters)
+        self.slow_log.warning("%.1f ms on %s\n  SQL: %s\n  Parameters: %r\n  Plan:\n%s",
+                              elapsed * 1000.0, threading.current_thread().name, normalize_sql(sql),
+                              parameters, "\n".join(f"    {line}" for line in plan) or "    (unavailable)")
+
+
+def explain_query_plan(conn, sql, parameters=()):
+    """Returns EXPLAIN QUERY PLAN output as indented lines (empty if it cannot be explained)."""
+    if not normalize_sql(sql).upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")):
+        return []
+    try:
+        # The plain sqlite3 method, so the EXPLAIN itself is not recorded.
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    except (sqlite3.Error, ValueError):
+        return []
+    depth = {0: 0}
+    lines = []
+    for row in rows:
+        node_id, parent_id, detail = row[0], row[1], row[-1]
+        depth[node_id] = depth.get(parent_id, 0) + 1
+        lines.append("  " * (depth[node_id] - 1) + detail)
+    return lines
+
+
+_stats = None
+
+def get_stats():
+    """The process-wide QueryStats, or None when instrumentation is disabled."""
+    return _stats
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Times execute() and every fetch, and counts the rows fetched. The time of one
+    call is everything from execute() until the next execute() on the cursor.
+    """
+
+    def _begin(self, sql, call):
+        self._sql = normalize_sql(sql)
+        self._call_elapsed = 0.0
+        self._slow_logged = False
+        _stats.add_call("statement", self._sql)
+        started = time.perf_counter()
+        try:
+            return call()
+        except Exception:
+            _stats.add_error("statement", self._sql)
+            raise
+        finally:
+            self._record(time.perf_counter() - started, 0)
+
+    def _record(self, seconds, rows):
+        self._call_elapsed += seconds
+        _stats.add_time("statement", self._sql, seconds, self._call_elapsed, rows)
+        if not self._slow_logged and self._call_elapsed * 1000.0 >= _stats.slow_query_ms:
+            self._slow_logged = True
+            _stats.log_slow_query(self.connection, self._sql, self._parameters, self._call_elapsed)
+
+    def _timed_fetch(self, fetch, single, *args):
+        if getattr(self, "_sql", None) is None:
+            return fetch(*args)
+        started = time.perf_counter()
+        result = fetch(*args)
+        rows = (0 if result is None else 1) if single else len(result)
+        self._record(time.perf_counter() - started, rows)
+        return result
+
+    def execute(self, sql, parameters=()):
+        self._parameters = parameters
+        return self._begin(sql, lambda: super(InstrumentedCursor, self).execute(sql, parameters))
+
+    def executemany(self, sql, seq_of_parameters):
+        self._parameters = "(executemany)"
+        return self._begin(sql, lambda: super(InstrumentedCursor, self).executemany(sql, seq_of_parameters))
+
+    def executescript(self, sql_script):
+        self._parameters = ()
+        return self._begin(sql_script, lambda: super(InstrumentedCursor, self).executescript(sql_script))
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone, True)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, False, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall, False)
+
+    def __next__(self):
+        if getattr(self, "_sql", None) is None:
+            return super().__next__()
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._record(time.perf_counter() - started, 0)
+            raise
+        self._record(time.perf_counter() - started, 1)
+        return row
+
+
+class InstrumentedConnection(PooledConnection):
+    """A pooled connection whose statements all run through InstrumentedCursor."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def _count_rows(result):
+    if isinstance(result, (list, tuple, dict)):
+        return len(result)
+    return 0 if result is None else 1
+
+
+def _timed_iteration(name, gen, elapsed):
+    """Re-yields `gen`, timing only the work inside it (not the consumer's time between rows)."""
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(gen)
+        except StopIteration:
+            step = time.perf_counter() - started
+            _stats.add_time("function", name, step, elapsed + step)
+            return
+        except Exception:
+            _stats.add_error("function", name)
+            raise
+        step = time.perf_counter() - started
+        elapsed += step
+        _stats.add_time("function", name, step, elapsed, 1)
+        yield item
+
+
+def _instrument_function(name, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _stats.add_call("function", name)
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            elapsed = time.perf_counter() - started
+            _stats.add_error("function", name)
+            _stats.add_time("function", name, elapsed, elapsed)
+            raise
+        elapsed = time.perf_counter() - started
+        if inspect.isgenerator(result):
+            # Streaming functions (iter_*): rows and time are recorded as the caller iterates.
+            _stats.add_time("function", name, elapsed, elapsed)
+            return _timed_iteration(name, result, elapsed)
+        _stats.add_time("function", name, elapsed, elapsed, _count_rows(result))
+        return result
+    return wrapper
+
+
+# Plumbing rather than queries; wrapping it would only add noise.
+_NOT_INSTRUMENTED = {"get_db_connection"}
+
+
+def install(module, connection_manager):
+    """
+    Wraps the public functions defined in `module` and switches `connection_manager`
+    to instrumented connections. Must run before other modules import the functions
+    by name (database_manager calls it while it is being imported).
+    """
+    global _stats
+    if _stats is not None:
+        return _stats
+    slow_ms = float(os.environ.get(SLOW_QUERY_MS_ENV) or DEFAULT_SLOW_QUERY_MS)
+    _stats = QueryStats(slow_ms)
+
+    db_dir = os.path.dirname(os.path.abspath(connection_manager.db_file))
+    log_path = os.environ.get(SLOW_LOG_ENV) or os.path.join(db_dir, "slow_queries.log")
+    logger = logging.getLogger("freelancer_hub.slow_queries")
+    logger.propagate = False
+    logger.setLevel(logging.WARNING)
+    try:
+        handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=SLOW_LOG_MAX_BYTES, backupCount=SLOW_LOG_BACKUPS)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        _stats.slow_log = logger
+    except OSError as e:
+        print(f"Warning: Could not open slow-query log '{log_path}'. Error: {e}")
+
+    for name, fn in list(vars(module).items()):
+        if name.startswith("_") or name in _NOT_INSTRUMENTED or not inspect.isfunction(fn) or fn.__module__ != module.__name__:
+            continue
+        setattr(module, name, _instrument_function(name, fn))
+
+    connection_manager.configure(factory=InstrumentedConnection)
+
+    dump_path = os.environ.get(DUMP_ENV) or os.path.join(db_dir, "query_stats.json")
+    def dump_at_exit():
+        try:
+            _stats.dump(dump_path)
+            print(f"Query statistics written to {dump_path}")
+        except OSError as e:
+            print(f"Warning: Could not write query statistics. Error: {e}")
+    atexit.register(dump_at_exit)
+    print(f"Query instrumentation enabled (slow-query threshold {slow_ms:g} ms, log: {log_path}).")
+    return _stats
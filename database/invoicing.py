@@ -0,0 +1,126 @@
+# database/invoicing.py
+
+# --- Invoices ---
+# Invoice numbering and inserts, shared by the invoice dialog
+# (database_manager.create_invoice_from_time_entries) and bulk billing runs
+# (database/billing_runs.py). The functions take an open connection and never
+# commit, so callers can put several invoices in one transaction.
+
+import sqlite3
+from datetime import date
+
+# --- Invoice Numbers ---
+# Numbers come from invoice_sequences: one counter row per series, advanced with a
+# single UPSERT ... RETURNING inside the transaction that inserts the invoice, so
+# concurrent windows and billing runs can never be handed the same number.
+# The "invoice_number_series" setting picks the series:
+#   yearly (default)  one counter per issue year: INV-2026-001, ..., INV-2027-001
+#   global            one counter for all years:  ..., INV-2026-214, INV-2027-215
+# A series that has no row yet starts after the highest number already in use.
+
+SERIES_SETTING = "invoice_number_series"
+SERIES_MODES = ("yearly", "global")
+INVOICE_SEQUENCE_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS invoice_sequences (series TEXT PRIMARY KEY, last_value INTEGER NOT NULL) WITHOUT ROWID;",
+]
+
+
+def series_mode(conn):
+    row = conn.execute("SELECT value FROM settings WHERE key = ?", (SERIES_SETTING,)).fetchone()
+    return row["value"] if row and row["value"] in SERIES_MODES else SERIES_MODES[0]
+
+
+def _issue_year(issue_date):
+    return date.fromisoformat(str(issue_date)[:10]).year if issue_date else date.today().year
+
+
+def _series(conn, issue_date):
+    """(series key, year) for an invoice issued on `issue_date` (default today)."""
+    year = _issue_year(issue_date)
+    return (f"yearly:{year}" if series_mode(conn) == "yearly" else "global"), year
+
+
+def _highest_number_in_use(conn, series, year):
+    """The largest numeric suffix among existing invoices of the series (0 if none); scanned once per series."""
+    if series == "global":
+        rows = conn.execute("SELECT invoice_number FROM invoices")
+    else:
+        # Range on the UNIQUE index instead of LIKE: '.' sorts right after '-'.
+        rows = conn.execute("SELECT invoice_number FROM invoices WHERE invoice_number >= ? AND invoice_number < ?",
+                            (f"INV-{year}-", f"INV-{year}."))
+    highest = 0
+    for (number,) in rows:
+        suffix = number.rsplit('-', 1)[-1]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+def _format(year, value):
+    return f"INV-{year}-{value:03d}"
+
+
+def allocate_invoice_numbers(conn, count=1, issue_date=None):
+    """
+    Takes the next `count` numbers of the series in one statement and returns them.
+    Call it inside the write transaction that uses them; if that rolls back, so does the allocation.
+    """
+    series, year = _series(conn, issue_date)
+    row = conn.execute("UPDATE invoice_sequences SET last_value = last_value + ? WHERE series = ? RETURNING last_value",
+                       (count, series)).fetchone()
+    if row is None:
+        # First number of the series. The UPDATE above already holds the write lock, and the
+        # upsert keeps this correct even for a caller outside a transaction.
+        row = conn.execute(
+            "INSERT INTO invoice_sequences (series, last_value) VALUES (?, ?) "
+            "ON CONFLICT (series) DO UPDATE SET last_value = last_value + ? RETURNING last_value",
+            (series, _highest_number_in_use(conn, series, year) + count, count)
+        ).fetchone()
+    last = row[0]
+    return [_format(year, value) for value in range(last - count + 1, last + 1)]
+
+
+def next_invoice_number(conn, issue_date=None):
+    """The number the next invoice would get, without taking it (for display only)."""
+    series, year = _series(conn, issue_date)
+    row = conn.execute("SELECT last_value FROM invoice_sequences WHERE series = ?", (series,)).fetchone()
+    return _format(year, (row[0] if row else _highest_number_in_use(conn, series, year)) + 1)
+
+
+class EntriesAlreadyBilled(sqlite3.IntegrityError):
+    """Some of the time entries were billed on another invoice after they were read."""
+
+
+def insert_invoice(conn, invoice_data, line_items, time_entry_ids, status='Draft'):
+    """
+    Inserts a Draft invoice with its line items and marks the time entries billed on it.
+    Without an invoice_data['invoice_number'] one is allocated and stored back into invoice_data.
+    Raises EntriesAlreadyBilled if any entry is billed already (e.g. by a billing run that
+    committed in the meantime); rolling back then releases the allocated number.
+    """
+    if not invoice_data.get('invoice_number'):
+        invoice_data['invoice_number'] = allocate_invoice_numbers(conn, 1, invoice_data.get('issue_date'))[0]
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO invoices (invoice_number, client_id, issue_date, due_date, status, total_amount) VALUES (?, ?, ?, ?, ?, ?)",
+        (invoice_data['invoice_number'], invoice_data['client_id'], invoice_data['issue_date'], invoice_data['due_date'], status, invoice_data['total_amount'])
+    )
+    invoice_id = cursor.lastrowid
+    cursor.executemany(
+        "INSERT INTO invoice_items (invoice_id, description, quantity, rate, amount) VALUES (?, ?, ?, ?, ?)",
+        ((invoice_id, item['description'], item['quantity'], item['rate'], item['amount']) for item in line_items)
+    )
+    if time_entry_ids:
+        # Staged in a temp table so one UPDATE bills any number of entries
+        # without hitting SQLite's bound-parameter limit.
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS billing_entry_ids (id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp.billing_entry_ids")
+        cursor.executemany("INSERT OR IGNORE INTO temp.billing_entry_ids (id) VALUES (?)", ((entry_id,) for entry_id in time_entry_ids))
+        expected = cursor.execute("SELECT COUNT(*) FROM temp.billing_entry_ids").fetchone()[0]
+        cursor.execute("UPDATE time_entries SET is_billed = 1, invoice_id = ? WHERE id IN (SELECT id FROM temp.billing_entry_ids) AND is_billed = 0",
+                       (invoice_id,))
+        billed = cursor.rowcount
+        cursor.execute("DELETE FROM temp.billing_entry_ids")
+        if billed != expected:
+            raise EntriesAlreadyBilled(f"{expected - billed} of the {expected} time entries are already billed on another invoice")
+    return invoice_id
@@ -0,0 +1,91 @@
+# database/line_items.py
+
+# --- Invoice Line Item Consolidation ---
+# Turns a project's unbilled time entries into invoice line items, grouped in SQL:
+#   entry        one line per time entry (the original behaviour)
+#   day          one line per calendar day
+#   week         one line per week (Monday to Sunday)
+#   description  one line per distinct description (case-insensitive)
+#   tag          one line per task tag: the first "#word" in the description
+# Every line item carries "entry_ids", the time entries it covers, so the caller can
+# mark exactly those entries as billed. The functions take an open connection.
+
+from datetime import datetime
+
+GROUPINGS = {
+    "entry": "Per time entry",
+    "day": "Per day",
+    "week": "Per week",
+    "description": "Per description",
+    "tag": "Per task tag",
+}
+
+_DESCRIPTION = "COALESCE(NULLIF(TRIM(description), ''), 'General Work')"
+# Offset of the first '#' and the length of the tag that starts there.
+_TAG_START = "instr(description, '#')"
+_TAG_REST = f"substr(description, {_TAG_START})"
+_TAG = (f"CASE WHEN {_TAG_START} > 0 THEN lower(substr({_TAG_REST}, 1, "
+        f"CASE WHEN instr({_TAG_REST}, ' ') > 0 THEN instr({_TAG_REST}, ' ') - 1 ELSE length({_TAG_REST}) END)) ELSE '' END")
+
+_GROUP_KEYS = {
+    "entry": "id",
+    "day": "date(start_time)",
+    # 'weekday 0' moves to the next Sunday (or stays on one); six days back is that week's Monday.
+    "week": "date(start_time, 'weekday 0', '-6 days')",
+    "description": f"lower({_DESCRIPTION})",
+    "tag": _TAG,
+}
+
+
+def _describe(grouping, row):
+    entries = row["entry_count"]
+    suffix = "" if entries == 1 else f" ({entries} entries)"
+    if grouping == "entry":
+        try:
+            day = datetime.fromisoformat(row["first_start"]).strftime('%Y-%m-%d')
+        except (TypeError, ValueError):
+            day = row["first_start"]
+        return f"Work from {day}: {row['description']}"
+    if grouping == "day":
+        return f"Work on {row['group_key']}{suffix}"
+    if grouping == "week":
+        return f"Work in the week of {row['group_key']}{suffix}"
+    if grouping == "tag":
+        return f"{row['group_key'] or 'Untagged work'}{suffix}"
+    return f"{row['description']}{suffix}"
+
+
+def consolidate_unbilled(conn, project_id, grouping="entry", rate=0.0, since=None, until=None, prefix=""):
+    """
+    Returns the project's unbilled, finished time entries as line items grouped by
+    `grouping` (a GROUPINGS key), ordered by their first entry. Each item is a dict
+    with description, quantity (hours), rate, amount and entry_ids.
+    `since`/`until` (ISO dates, `until` exclusive) restrict the entries by start time;
+    `prefix` is prepended to every description.
+    """
+    if grouping not in _GROUP_KEYS:
+        raise ValueError(f"Unknown line item grouping '{grouping}'")
+    period, params = "", [project_id]
+    if since:
+        period += " AND start_time >= ?"; params.append(since)
+    if until:
+        period += " AND start_time < ?"; params.append(until)
+    rows = conn.execute(
+        f"""SELECT {_GROUP_KEYS[grouping]} AS group_key, MIN(start_time) AS first_start,
+            MIN({_DESCRIPTION}) AS description, SUM(duration_minutes) AS minutes,
+            COUNT(*) AS entry_count, group_concat(id) AS entry_ids
+        FROM time_entries
+        WHERE project_id = ? AND is_billed = 0 AND duration_minutes IS NOT NULL{period}
+        GROUP BY 1 ORDER BY MIN(start_time), MIN(id)""", params
+    ).fetchall()
+    items = []
+    for row in rows:
+        hours = row["minutes"] / 60.0
+        items.append({
+            "description": prefix + _describe(grouping, row),
+            "quantity": hours,
+            "rate": rate,
+            "amount": hours * rate,
+            "entry_ids": [int(entry_id) for entry_id in row["entry_ids"].split(",")],
+        })
+    return items
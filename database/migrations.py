@@ -0,0 +1,125 @@
+# database/migrations.py
+
+import time
+from database.rollups import ROLLUP_SCHEMA, rebuild_rollups
+from database.billing_runs import BILLING_RUN_SCHEMA
+from database.invoicing import INVOICE_SEQUENCE_SCHEMA
+from database.search import SEARCH_SCHEMA, rebuild_search_index
+
+# --- Schema Migrations ---
+# Each migration is (version, name, statements). They are applied in order, each in
+# its own transaction, and PRAGMA user_version records the last one applied.
+# Statements must be idempotent (IF NOT EXISTS, etc.) so a database created by an
+# older build without a user_version can be brought forward safely.
+
+# Per-project revision counters for memoizing the project dashboard (ProjectController).
+# Every change to a project, its client, its time entries or the invoices/items they are
+# billed on bumps the revision in the same transaction as the change itself.
+_BUMP_PROJECT = "INSERT INTO project_revisions (project_id, revision) VALUES ({id}, 1) ON CONFLICT (project_id) DO UPDATE SET revision = revision + 1;"
+_BUMP_INVOICE_PROJECTS = ("INSERT INTO project_revisions (project_id, revision) SELECT DISTINCT project_id, 1 FROM time_entries WHERE invoice_id = {id} "
+                          "ON CONFLICT (project_id) DO UPDATE SET revision = revision + 1;")
+PROJECT_REVISION_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS project_revisions (project_id INTEGER PRIMARY KEY, revision INTEGER NOT NULL DEFAULT 0);",
+    f"CREATE TRIGGER IF NOT EXISTS trg_revision_time_entries_insert AFTER INSERT ON time_entries BEGIN {_BUMP_PROJECT.format(id='NEW.project_id')} END;",
+    f"CREATE TRIGGER IF NOT EXISTS trg_revision_time_entries_update AFTER UPDATE ON time_entries BEGIN {_BUMP_PROJECT.format(id='OLD.project_id')} {_BUMP_PROJECT.format(id='NEW.project_id')} END;",
+    f"CREATE TRIGGER IF NOT EXISTS trg_revision_time_entries_delete AFTER DELETE ON time_entries BEGIN {_BUMP_PROJECT.format(id='OLD.project_id')} END;",
+    f"CREATE TRIGGER IF NOT EXISTS trg_revision_projects_update AFTER UPDATE ON projects BEGIN {_BUMP_PROJECT.format(id='NEW.id')} END;",
+    f"CREATE TRIGGER IF NOT EXISTS trg_revision_projects_delete AFTER DELETE ON projects BEGIN {_BUMP_PROJECT.format(id='OLD.id')} END;",
+    ("CREATE TRIGGER IF NOT EXISTS trg_revision_clients_update AFTER UPDATE ON clients BEGIN "
+     "INSERT INTO project_revisions (project_id, revision) SELECT id, 1 FROM projects WHERE client_id = NEW.id "
+     "ON CONFLICT (project_id) DO UPDATE SET revision = revision + 1; END;"),
+    f"CREATE TRIGGER IF NOT EXISTS trg_revision_invoices_update AFTER UPDATE ON invoices BEGIN {_BUMP_INVOICE_PROJECTS.format(id='NEW.id')} END;",
+    f"CREATE TRIGGER IF NOT EXISTS trg_revision_invoices_delete BEFORE DELETE ON invoices BEGIN {_BUMP_INVOICE_PROJECTS.format(id='OLD.id')} END;",
+    f"CREATE TRIGGER IF NOT EXISTS trg_revision_invoice_items_insert AFTER INSERT ON invoice_items BEGIN {_BUMP_INVOICE_PROJECTS.format(id='NEW.invoice_id')} END;",
+    f"CREATE TRIGGER IF NOT EXISTS trg_revision_invoice_items_update AFTER UPDATE ON invoice_items BEGIN {_BUMP_INVOICE_PROJECTS.format(id='OLD.invoice_id')} {_BUMP_INVOICE_PROJECTS.format(id='NEW.invoice_id')} END;",
+    f"CREATE TRIGGER IF NOT EXISTS trg_revision_invoice_items_delete AFTER DELETE ON invoice_items BEGIN {_BUMP_INVOICE_PROJECTS.format(id='OLD.invoice_id')} END;",
+]
+
+MIGRATIONS = [
+    (1, "initial schema", [
+        "CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, username TEXT UNIQUE NOT NULL, password_hash TEXT NOT NULL);",
+        "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);",
+        "CREATE TABLE IF NOT EXISTS clients (id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT, address TEXT);",
+        "CREATE TABLE IF NOT EXISTS projects (id INTEGER PRIMARY KEY, name TEXT NOT NULL, client_id INTEGER NOT NULL, status TEXT DEFAULT 'Active', rate REAL DEFAULT 0.0, FOREIGN KEY (client_id) REFERENCES clients (id) ON DELETE CASCADE);",
+        "CREATE TABLE IF NOT EXISTS time_entries (id INTEGER PRIMARY KEY, project_id INTEGER NOT NULL, start_time TEXT NOT NULL, end_time TEXT, duration_minutes INTEGER, description TEXT, is_billed INTEGER DEFAULT 0, invoice_id INTEGER, FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE, FOREIGN KEY (invoice_id) REFERENCES invoices (id) ON DELETE SET NULL);",
+        "CREATE TABLE IF NOT EXISTS invoices (id INTEGER PRIMARY KEY, invoice_number TEXT UNIQUE NOT NULL, client_id INTEGER NOT NULL, issue_date TEXT NOT NULL, due_date TEXT NOT NULL, status TEXT DEFAULT 'Draft', total_amount REAL, pdf_path TEXT, FOREIGN KEY (client_id) REFERENCES clients (id) ON DELETE CASCADE);",
+        "CREATE TABLE IF NOT EXISTS invoice_items (id INTEGER PRIMARY KEY, invoice_id INTEGER NOT NULL, description TEXT NOT NULL, quantity REAL NOT NULL, rate REAL NOT NULL, amount REAL NOT NULL, FOREIGN KEY (invoice_id) REFERENCES invoices (id) ON DELETE CASCADE);",
+        "CREATE TABLE IF NOT EXISTS expenses (id INTEGER PRIMARY KEY, description TEXT NOT NULL, category TEXT, amount REAL NOT NULL, expense_date TEXT NOT NULL, receipt_path TEXT);",
+    ]),
+    (2, "indexes for hot query paths", [
+        # get_unbilled_time_for_project: project_id = ? AND is_billed = 0
+        "CREATE INDEX IF NOT EXISTS idx_time_entries_project_billed_start ON time_entries (project_id, is_billed, start_time);",
+        # get_time_entries_for_project: project_id = ? ORDER BY start_time DESC
+        "CREATE INDEX IF NOT EXISTS idx_time_entries_project_start ON time_entries (project_id, start_time);",
+        # get_invoices_for_project / delete_invoice / financial summary joins on invoice_id
+        "CREATE INDEX IF NOT EXISTS idx_time_entries_invoice_project ON time_entries (invoice_id, project_id);",
+        # get_recent_activity and the monthly hours range
+        "CREATE INDEX IF NOT EXISTS idx_time_entries_start ON time_entries (start_time);",
+        # Status filters in get_dashboard_kpis and the issue_date range in get_monthly_income_summary (covering)
+        "CREATE INDEX IF NOT EXISTS idx_invoices_status_issue_date ON invoices (status, issue_date, total_amount);",
+        "CREATE INDEX IF NOT EXISTS idx_invoices_client ON invoices (client_id);",
+        "CREATE INDEX IF NOT EXISTS idx_invoice_items_invoice ON invoice_items (invoice_id);",
+        "CREATE INDEX IF NOT EXISTS idx_projects_client ON projects (client_id);",
+        "CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (status);",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (expense_date);",
+    ]),
+    (3, "dashboard rollup tables", ROLLUP_SCHEMA + [rebuild_rollups]),
+    (4, "keyset pagination indexes", [
+        # get_clients_page / iter_clients: ORDER BY name, id
+        "CREATE INDEX IF NOT EXISTS idx_clients_name ON clients (name);",
+        "CREATE INDEX IF NOT EXISTS idx_projects_name ON projects (name);",
+    ]),
+    (5, "project dashboard revisions", PROJECT_REVISION_SCHEMA),
+    (6, "billing runs", BILLING_RUN_SCHEMA),
+    (7, "invoice number sequences", INVOICE_SEQUENCE_SCHEMA),
+    (8, "full-text search index", SEARCH_SCHEMA + [rebuild_search_index]),
+]
+
+# Report of the migrations applied by the last call to apply_migrations().
+last_migration_report = []
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_schema_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def apply_migrations(conn, migrations=None, verbose=True):
+    """
+    Brings the database up to the latest schema version.
+
+    Returns a list of {"version", "name", "duration_ms"} dicts, one per migration
+    that actually ran (empty if the schema was already current).
+    """
+    global last_migration_report
+    migrations = MIGRATIONS if migrations is None else migrations
+    current = get_schema_version(conn)
+    report = []
+
+    for version, name, steps in sorted(migrations, key=lambda m: m[0]):
+        if version <= current:
+            continue
+        started = time.perf_counter()
+        conn.execute("BEGIN")
+        try:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        duration_ms = (time.perf_counter() - started) * 1000.0
+        report.append({"version": version, "name": name, "duration_ms": duration_ms})
+        if verbose:
+            print(f"Applied migration {version} ({name}) in {duration_ms:.1f} ms")
+        current = version
+
+    last_migration_report = report
+    return report
@@ -0,0 +1,133 @@
+# database/reference_cache.py
+
+# --- Reference Data Cache ---
+# In-process cache for small, often re-read datasets (clients, projects, settings).
+# Every mutating database_manager function is decorated with @writes(...), which bumps
+# a global write generation and the generation of each table it changes. A cached
+# result remembers the generations of the tables it was read from and is only
+# served while none of them has changed, so a write is visible on the very next read.
+# Cached values are shared between callers and must be treated as read-only.
+# Set FREELANCER_HUB_REFERENCE_CACHE=0 (or call set_enabled(False)) to turn it off.
+
+import functools
+import os
+import threading
+from collections import OrderedDict
+
+CACHE_ENV = "FREELANCER_HUB_REFERENCE_CACHE"
+
+# Maximum number of cached results (distinct function/argument combinations).
+DEFAULT_MAX_ENTRIES = 128
+
+
+class ReferenceCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, enabled=True):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (table generations, value), least recently used first
+        self._generation = 0
+        self._table_generations = {}
+        self.epoch = 0  # bumped by invalidate_all(); caches that update incrementally start over when it changes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --- Generations ---
+    @property
+    def generation(self):
+        """Number of writes recorded so far; changes whenever any table changes."""
+        return self._generation
+
+    def table_generations(self, tables):
+        with self._lock:
+            return tuple(self._table_generations.get(t, 0) for t in tables)
+
+    def record_write(self, tables):
+        """Marks `tables` as changed, invalidating every result read from them."""
+        with self._lock:
+            self._generation += 1
+            for table in tables:
+                self._table_generations[table] = self._table_generations.get(table, 0) + 1
+
+    def invalidate_all(self):
+        """Drops every cached result and bumps the write generation (e.g. after a restore)."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.epoch += 1
+            for table in self._table_generations:
+                self._table_generations[table] += 1
+
+    # --- Lookups ---
+    def get_or_load(self, key, tables, load):
+        if not self.enabled:
+            return load()
+        with self._lock:
+            current = tuple(self._table_generations.get(t, 0) for t in tables)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == current:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        # Generations are read before loading: a write that lands while the query
+        # runs leaves this entry stale-stamped, so it is reloaded next time.
+        value = load()
+        with self._lock:
+            self._entries[key] = (current, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"enabled": self.enabled, "entries": len(self._entries), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": self.hits / lookups if lookups else 0.0, "generation": self._generation}
+
+
+reference_cache = ReferenceCache(enabled=os.environ.get(CACHE_ENV, "1").strip().lower() not in ("0", "false", "no", "off"))
+
+
+def set_enabled(enabled):
+    reference_cache.enabled = enabled
+    if not enabled:
+        reference_cache.clear()
+
+
+def write_generation():
+    """The global write generation; other caches can key on it."""
+    return reference_cache.generation
+
+
+def cached(*tables):
+    """Caches a read function's result until one of `tables` is written."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            return reference_cache.get_or_load(key, tables, lambda: fn(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def writes(*tables):
+    """Declares the tables a mutating function changes (including ON DELETE CASCADE targets)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                # Also bumped on failure: a partial write may have been committed.
+                reference_cache.record_write(tables)
+        return wrapper
+    return decorator
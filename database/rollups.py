@@ -0,0 +1,146 @@
+# database/rollups.py
+
+# --- Dashboard Rollups ---
+# Trigger-maintained summary tables for the dashboard:
+#   rollup_invoice_status       invoice count and total amount per invoice status
+#   rollup_project_month_hours  logged minutes per (month, project)
+#   rollup_project_status       project count per project status
+# Triggers on invoices, time_entries and projects keep them current, so
+# get_dashboard_kpis() reads a handful of rows no matter how much history exists.
+# `python -m database.rollups verify` checks them against the base tables and
+# `python -m database.rollups rebuild` recomputes them from scratch.
+
+import sys
+
+ROLLUP_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS rollup_invoice_status (status TEXT PRIMARY KEY, invoice_count INTEGER NOT NULL DEFAULT 0, total_amount REAL NOT NULL DEFAULT 0.0);",
+    "CREATE TABLE IF NOT EXISTS rollup_project_month_hours (month TEXT NOT NULL, project_id INTEGER NOT NULL, entry_count INTEGER NOT NULL DEFAULT 0, minutes INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (month, project_id)) WITHOUT ROWID;",
+    "CREATE TABLE IF NOT EXISTS rollup_project_status (status TEXT PRIMARY KEY, project_count INTEGER NOT NULL DEFAULT 0);",
+
+    # --- invoices -> rollup_invoice_status ---
+    """CREATE TRIGGER IF NOT EXISTS trg_rollup_invoices_insert AFTER INSERT ON invoices BEGIN
+        INSERT INTO rollup_invoice_status (status, invoice_count, total_amount) VALUES (COALESCE(NEW.status, ''), 1, COALESCE(NEW.total_amount, 0.0))
+            ON CONFLICT (status) DO UPDATE SET invoice_count = invoice_count + 1, total_amount = total_amount + excluded.total_amount;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS trg_rollup_invoices_delete AFTER DELETE ON invoices BEGIN
+        UPDATE rollup_invoice_status SET invoice_count = invoice_count - 1,
+            total_amount = CASE WHEN invoice_count = 1 THEN 0.0 ELSE total_amount - COALESCE(OLD.total_amount, 0.0) END
+            WHERE status = COALESCE(OLD.status, '');
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS trg_rollup_invoices_update AFTER UPDATE OF status, total_amount ON invoices BEGIN
+        UPDATE rollup_invoice_status SET invoice_count = invoice_count - 1,
+            total_amount = CASE WHEN invoice_count = 1 THEN 0.0 ELSE total_amount - COALESCE(OLD.total_amount, 0.0) END
+            WHERE status = COALESCE(OLD.status, '');
+        INSERT INTO rollup_invoice_status (status, invoice_count, total_amount) VALUES (COALESCE(NEW.status, ''), 1, COALESCE(NEW.total_amount, 0.0))
+            ON CONFLICT (status) DO UPDATE SET invoice_count = invoice_count + 1, total_amount = total_amount + excluded.total_amount;
+    END;""",
+
+    # --- time_entries -> rollup_project_month_hours ---
+    """CREATE TRIGGER IF NOT EXISTS trg_rollup_time_entries_insert AFTER INSERT ON time_entries BEGIN
+        INSERT INTO rollup_project_month_hours (month, project_id, entry_count, minutes) VALUES (COALESCE(strftime('%Y-%m', NEW.start_time), ''), NEW.project_id, 1, COALESCE(NEW.duration_minutes, 0))
+            ON CONFLICT (month, project_id) DO UPDATE SET entry_count = entry_count + 1, minutes = minutes + excluded.minutes;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS trg_rollup_time_entries_delete AFTER DELETE ON time_entries BEGIN
+        UPDATE rollup_project_month_hours SET entry_count = entry_count - 1, minutes = minutes - COALESCE(OLD.duration_minutes, 0)
+            WHERE month = COALESCE(strftime('%Y-%m', OLD.start_time), '') AND project_id = OLD.project_id;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS trg_rollup_time_entries_update AFTER UPDATE OF project_id, start_time, duration_minutes ON time_entries BEGIN
+        UPDATE rollup_project_month_hours SET entry_count = entry_count - 1, minutes = minutes - COALESCE(OLD.duration_minutes, 0)
+            WHERE month = COALESCE(strftime('%Y-%m', OLD.start_time), '') AND project_id = OLD.project_id;
+        INSERT INTO rollup_project_month_hours (month, project_id, entry_count, minutes) VALUES (COALESCE(strftime('%Y-%m', NEW.start_time), ''), NEW.project_id, 1, COALESCE(NEW.duration_minutes, 0))
+            ON CONFLICT (month, project_id) DO UPDATE SET entry_count = entry_count + 1, minutes = minutes + excluded.minutes;
+    END;""",
+
+    # --- projects -> rollup_project_status ---
+    """CREATE TRIGGER IF NOT EXISTS trg_rollup_projects_insert AFTER INSERT ON projects BEGIN
+        INSERT INTO rollup_project_status (status, project_count) VALUES (COALESCE(NEW.status, ''), 1)
+            ON CONFLICT (status) DO UPDATE SET project_count = project_count + 1;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS trg_rollup_projects_delete AFTER DELETE ON projects BEGIN
+        UPDATE rollup_project_status SET project_count = project_count - 1 WHERE status = COALESCE(OLD.status, '');
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS trg_rollup_projects_update AFTER UPDATE OF status ON projects BEGIN
+        UPDATE rollup_project_status SET project_count = project_count - 1 WHERE status = COALESCE(OLD.status, '');
+        INSERT INTO rollup_project_status (status, project_count) VALUES (COALESCE(NEW.status, ''), 1)
+            ON CONFLICT (status) DO UPDATE SET project_count = project_count + 1;
+    END;""",
+]
+
+# Aggregates over the base tables, in the same shape as the rollup tables.
+_BASE_INVOICE_STATUS = "SELECT COALESCE(status, '') AS status, COUNT(*) AS invoice_count, COALESCE(SUM(total_amount), 0.0) AS total_amount FROM invoices GROUP BY 1"
+_BASE_PROJECT_MONTH_HOURS = "SELECT COALESCE(strftime('%Y-%m', start_time), '') AS month, project_id, COUNT(*) AS entry_count, COALESCE(SUM(duration_minutes), 0) AS minutes FROM time_entries GROUP BY 1, 2"
+_BASE_PROJECT_STATUS = "SELECT COALESCE(status, '') AS status, COUNT(*) AS project_count FROM projects GROUP BY 1"
+
+# Float sums maintained incrementally can drift by rounding error.
+AMOUNT_TOLERANCE = 0.005
+
+
+def rebuild_rollups(conn):
+    """Recomputes every rollup table from the base tables. The caller commits."""
+    conn.execute("DELETE FROM rollup_invoice_status")
+    conn.execute(f"INSERT INTO rollup_invoice_status (status, invoice_count, total_amount) {_BASE_INVOICE_STATUS}")
+    conn.execute("DELETE FROM rollup_project_month_hours")
+    conn.execute(f"INSERT INTO rollup_project_month_hours (month, project_id, entry_count, minutes) {_BASE_PROJECT_MONTH_HOURS}")
+    conn.execute("DELETE FROM rollup_project_status")
+    conn.execute(f"INSERT INTO rollup_project_status (status, project_count) {_BASE_PROJECT_STATUS}")
+
+
+def verify_rollups(conn):
+    """
+    Compares the rollup tables with the base tables.
+    Returns a list of human-readable mismatch descriptions (empty if consistent).
+    """
+    checks = [
+        ("rollup_invoice_status", ("status",), ("invoice_count", "total_amount"), _BASE_INVOICE_STATUS,
+         "SELECT status, invoice_count, total_amount FROM rollup_invoice_status"),
+        ("rollup_project_month_hours", ("month", "project_id"), ("entry_count", "minutes"), _BASE_PROJECT_MONTH_HOURS,
+         "SELECT month, project_id, entry_count, minutes FROM rollup_project_month_hours"),
+        ("rollup_project_status", ("status",), ("project_count",), _BASE_PROJECT_STATUS,
+         "SELECT status, project_count FROM rollup_project_status"),
+    ]
+    mismatches = []
+    for table, key_cols, value_cols, expected_sql, actual_sql in checks:
+        expected = {tuple(row[c] for c in key_cols): tuple(row[c] for c in value_cols) for row in conn.execute(expected_sql)}
+        actual = {tuple(row[c] for c in key_cols): tuple(row[c] for c in value_cols) for row in conn.execute(actual_sql)}
+        zero = tuple(0 for _ in value_cols)
+        for key in sorted(set(expected) | set(actual), key=repr):
+            want = expected.get(key, zero)
+            have = actual.get(key, zero)
+            if any(abs((w or 0) - (h or 0)) > AMOUNT_TOLERANCE for w, h in zip(want, have)):
+                mismatches.append(f"{table} {dict(zip(key_cols, key))}: expected {dict(zip(value_cols, want))}, found {dict(zip(value_cols, have))}")
+    return mismatches
+
+
+def main(argv=None):
+    """Command line entry point: `python -m database.rollups [verify|rebuild]`."""
+    from database.database_manager import get_db_connection, initialize_database
+
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "verify"
+    if command not in ("verify", "rebuild"):
+        print("Usage: python -m database.rollups [verify|rebuild]")
+        return 2
+
+    initialize_database()
+    conn = get_db_connection()
+    try:
+        if command == "rebuild":
+            rebuild_rollups(conn)
+            conn.commit()
+            print("Rollup tables rebuilt.")
+        mismatches = verify_rollups(conn)
+    finally:
+        conn.close()
+
+    if mismatches:
+        print(f"{len(mismatches)} rollup mismatch(es) found:")
+        for line in mismatches:
+            print(f"  {line}")
+        print("Run `python -m database.rollups rebuild` to repair them.")
+        return 1
+    print("Rollup tables are consistent with the base tables.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+# database/search.py
+
+# --- Full-Text Search ---
+# One FTS5 table, search_index, holds a row per searchable record:
+#   time entry     body = description           context = project and client name
+#   invoice item   body = description           context = invoice number and client name
+#   client         title = name, body = email and address
+#   project        title = name                 context = client name
+#   expense        title = category, body = description
+# The row's rowid encodes where it came from: source id * KIND_SLOTS + kind code.
+# Triggers can then add, replace or drop the row of one record by rowid, which is
+# a b-tree lookup, in the same transaction as the change itself. Renaming a
+# client or project re-indexes the records that show its name as context.
+#
+# Queries are prefix matches on every word ("api mig" finds "API migration"),
+# with quoted phrases kept as phrases, ranked by bm25 with title > context > body.
+# Scoring every match is what makes a search slow. A word found in most rows
+# ("re", a client's name) would mean ranking hundreds of thousands of rows for
+# 50 results. So bm25 only ranks the newest RANK_WINDOW matches, plus the
+# best-scoring clients and projects, which have to stay findable however much
+# time is logged against them. Below RANK_WINDOW matches the ranking is exact.
+# `python -m database.search rebuild` refills the index from the base tables and
+# `python -m database.search query <words>` runs a search.
+
+import re
+import sys
+
+KIND_SLOTS = 8
+RANK_WINDOW = 2000
+KINDS = {1: "time_entry", 2: "invoice_item", 3: "client", 4: "project", 5: "expense"}
+KIND_CODES = {name: code for code, name in KINDS.items()}
+KIND_LABELS = {"time_entry": "Time Entry", "invoice_item": "Invoice Item", "client": "Client", "project": "Project", "expense": "Expense"}
+
+# (rowid, title, body, context) for each kind; the trigger bodies append a WHERE on the alias.
+_SOURCES = {
+    "time_entry": """SELECT te.id * 8 + 1, NULL, te.description, p.name || ' · ' || c.name
+        FROM time_entries te JOIN projects p ON p.id = te.project_id JOIN clients c ON c.id = p.client_id""",
+    "invoice_item": """SELECT ii.id * 8 + 2, NULL, ii.description, i.invoice_number || ' · ' || c.name
+        FROM invoice_items ii JOIN invoices i ON i.id = ii.invoice_id JOIN clients c ON c.id = i.client_id""",
+    "client": """SELECT c.id * 8 + 3, c.name, COALESCE(c.email, '') || ' ' || COALESCE(c.address, ''), NULL FROM clients c""",
+    "project": """SELECT p.id * 8 + 4, p.name, NULL, c.name FROM projects p JOIN clients c ON c.id = p.client_id""",
+    "expense": """SELECT e.id * 8 + 5, e.category, e.description, NULL FROM expenses e""",
+}
+_INDEX = "INSERT OR REPLACE INTO search_index (rowid, title, body, context) "
+
+
+def _reindex(kind, where):
+    return f"{_INDEX}{_SOURCES[kind]} WHERE {where};"
+
+
+def _drop(kind, id_expr):
+    return f"DELETE FROM search_index WHERE rowid = {id_expr} * 8 + {KIND_CODES[kind]};"
+
+
+SEARCH_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(title, body, context,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3');""",
+
+    f"CREATE TRIGGER IF NOT EXISTS trg_search_time_entries_insert AFTER INSERT ON time_entries BEGIN {_reindex('time_entry', 'te.id = NEW.id')} END;",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_search_time_entries_update AFTER UPDATE OF description, project_id ON time_entries BEGIN
+        {_reindex('time_entry', 'te.id = NEW.id')} END;""",
+    f"CREATE TRIGGER IF NOT EXISTS trg_search_time_entries_delete AFTER DELETE ON time_entries BEGIN {_drop('time_entry', 'OLD.id')} END;",
+
+    f"CREATE TRIGGER IF NOT EXISTS trg_search_invoice_items_insert AFTER INSERT ON invoice_items BEGIN {_reindex('invoice_item', 'ii.id = NEW.id')} END;",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_search_invoice_items_update AFTER UPDATE OF description, invoice_id ON invoice_items BEGIN
+        {_reindex('invoice_item', 'ii.id = NEW.id')} END;""",
+    f"CREATE TRIGGER IF NOT EXISTS trg_search_invoice_items_delete AFTER DELETE ON invoice_items BEGIN {_drop('invoice_item', 'OLD.id')} END;",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_search_invoices_update AFTER UPDATE OF invoice_number, client_id ON invoices BEGIN
+        {_reindex('invoice_item', 'ii.invoice_id = NEW.id')} END;""",
+
+    f"CREATE TRIGGER IF NOT EXISTS trg_search_clients_insert AFTER INSERT ON clients BEGIN {_reindex('client', 'c.id = NEW.id')} END;",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_search_clients_update AFTER UPDATE OF name, email, address ON clients BEGIN
+        {_reindex('client', 'c.id = NEW.id')} END;""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_search_clients_rename AFTER UPDATE OF name ON clients WHEN NEW.name IS NOT OLD.name BEGIN
+        {_reindex('project', 'p.client_id = NEW.id')}
+        {_reindex('time_entry', 'p.client_id = NEW.id')}
+        {_reindex('invoice_item', 'i.client_id = NEW.id')} END;""",
+    f"CREATE TRIGGER IF NOT EXISTS trg_search_clients_delete AFTER DELETE ON clients BEGIN {_drop('client', 'OLD.id')} END;",
+
+    f"CREATE TRIGGER IF NOT EXISTS trg_search_projects_insert AFTER INSERT ON projects BEGIN {_reindex('project', 'p.id = NEW.id')} END;",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_search_projects_update AFTER UPDATE OF name, client_id ON projects BEGIN
+        {_reindex('project', 'p.id = NEW.id')}
+        {_reindex('time_entry', 'te.project_id = NEW.id')} END;""",
+    f"CREATE TRIGGER IF NOT EXISTS trg_search_projects_delete AFTER DELETE ON projects BEGIN {_drop('project', 'OLD.id')} END;",
+
+    f"CREATE TRIGGER IF NOT EXISTS trg_search_expenses_insert AFTER INSERT ON expenses BEGIN {_reindex('expense', 'e.id = NEW.id')} END;",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_search_expenses_update AFTER UPDATE OF description, category ON expenses BEGIN
+        {_reindex('expense', 'e.id = NEW.id')} END;""",
+    f"CREATE TRIGGER IF NOT EXISTS trg_search_expenses_delete AFTER DELETE ON expenses BEGIN {_drop('expense', 'OLD.id')} END;",
+]
+
+
+def rebuild_search_index(conn):
+    """Refills search_index from the base tables. The caller commits."""
+    conn.execute("DELETE FROM search_index")
+    for source in _SOURCES.values():
+        conn.execute(f"{_INDEX}{source}")
+    conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+
+# Column weights: title, body, context.
+_SCORE = "bm25(search_index, 10.0, 1.0, 3.0)"
+_NAMED_KINDS = (KIND_CODES["client"], KIND_CODES["project"])
+
+_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+
+def match_expression(query):
+    """
+    Turns what the user typed into an FTS5 MATCH expression, or None if nothing is searchable.
+    Every bare word becomes a prefix term; "quoted text" stays a phrase. All of them must match.
+    """
+    terms = []
+    for phrase, bare in _TOKEN.findall(query or ""):
+        words = _WORD.findall(phrase if phrase else bare)
+        if not words:
+            continue
+        if phrase:
+            terms.append('"' + " ".join(words) + '"')
+        else:
+            terms.extend(f'"{word}"*' for word in words)
+    return " ".join(terms) or None
+
+
+def search(conn, query, kinds=None, limit=50, highlight=("[", "]")):
+    """
+    Best matches first: dicts with kind, id, title, context, snippet (the matched text
+    with the hits wrapped in `highlight`) and rank (lower is better).
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    codes = [KIND_CODES[kind] for kind in kinds] if kinds else list(KINDS)
+    select = f"""SELECT rowid, {_SCORE} AS score, title, context, snippet(search_index, -1, ?, ?, '…', 12) AS snippet
+        FROM search_index WHERE search_index MATCH ? AND rowid % {KIND_SLOTS} IN ({{codes}})"""
+    hits = {}
+    newest = f"SELECT * FROM ({select.format(codes=', '.join('?' * len(codes)))} ORDER BY rowid DESC LIMIT ?) ORDER BY score LIMIT ?"
+    for row in conn.execute(newest, [*highlight, expression, *codes, RANK_WINDOW, limit]):
+        hits[row[0]] = row
+    named = [code for code in _NAMED_KINDS if code in codes]
+    if named:
+        for row in conn.execute(f"{select.format(codes=', '.join('?' * len(named)))} ORDER BY score LIMIT ?",
+                                [*highlight, expression, *named, limit]):
+            hits[row[0]] = row
+    best = sorted(hits.values(), key=lambda row: row[1])[:limit]
+    return [{"kind": KINDS[row[0] % KIND_SLOTS], "id": row[0] // KIND_SLOTS, "title": row[2], "context": row[3],
+             "snippet": row[4], "rank": row[1]} for row in best]
+
+
+def main(argv=None):
+    """Command line entry point: `python -m database.search [rebuild | query <words>]`."""
+    from database.database_manager import get_db_connection, initialize_database
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in ("rebuild", "query") or (argv[0] == "query" and len(argv) < 2):
+        print("Usage: python -m database.search [rebuild | query <words>]")
+        return 2
+
+    initialize_database()
+    conn = get_db_connection()
+    try:
+        if argv[0] == "rebuild":
+            rebuild_search_index(conn)
+            conn.commit()
+            print(f"Search index rebuilt: {conn.execute('SELECT COUNT(*) FROM search_index').fetchone()[0]} rows.")
+        else:
+            for hit in search(conn, " ".join(argv[1:]), limit=20):
+                print(f"{KIND_LABELS[hit['kind']]:<13} #{hit['id']:<7} {hit['title'] or hit['context'] or '':<30.30} {hit['snippet']}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,24 @@
 # main.py
 
 import sys
+from shared import startup_timeline
+startup_timeline.enable()  # FREELANCER_HUB_STARTUP_TIMELINE=1 prints where startup time goes
+
 from PySide6.QtWidgets import QApplication, QDialog, QMessageBox
-from database.database_manager import user_exists
+from PySide6.QtCore import QTimer
+from database.database_manager import initialize_database, user_exists
 from ui.login_window import LoginWindow
 from ui.main_window import MainWindow
 from ui.styles import MODERN_STYLESHEET
 
 if __name__ == '__main__':
+    startup_timeline.mark("imports")
     app = QApplication(sys.argv)
+    startup_timeline.mark("QApplication")
+
+    # Create or migrate the schema before anything touches the database
+    initialize_database()
+    startup_timeline.mark("database initialized")
     
     # --- NO GLOBAL STYLESHEET IS SET HERE ---
 
@@ -22,15 +32,26 @@ if __name__ == '__main__':
 
     # 1. Create your custom LoginWindow. It will handle its own styling internally.
     login_dialog = LoginWindow()
+    startup_timeline.mark("login window created")
     
     if login_dialog.exec() == QDialog.Accepted:
+        startup_timeline.mark("login accepted (includes time spent typing)")
         # 2. Only after a successful login, create the MainWindow.
         main_window = MainWindow()
+        startup_timeline.mark("MainWindow created")
         
         # 3. Apply the modern dark theme ONLY to the MainWindow.
         main_window.setStyleSheet(MODERN_STYLESHEET)
         
         main_window.show()
+        # Scheduled snapshots run on a daemon thread (see shared/backup_store.py).
+        from shared.backup_store import scheduler
+        scheduler.start()
+        # Runs once the event loop has painted the window for the first time.
+        def first_paint():
+            startup_timeline.mark("dashboard painted")
+            startup_timeline.print_report()
+        QTimer.singleShot(0, first_paint)
         sys.exit(app.exec())
     else:
-        sys.exit(0)
\ No newline at end of file
+        sys.exit(0)
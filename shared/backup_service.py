@@ -0,0 +1,214 @@
+# shared/backup_service.py
+
+# --- Online Backups ---
+# Backups go through SQLite's online backup API rather than copying the file, so
+# they are a consistent snapshot even while the app keeps writing. They also
+# include whatever is still in the WAL. Pages are copied in steps of
+# PAGES_PER_STEP with a short pause in between. The source connection keeps one
+# read transaction open for the whole copy. In WAL mode this pins a snapshot
+# without blocking writers. Without it, every write made by the app during the
+# copy would send the backup back to page one, and a busy app could keep a
+# large backup restarting forever.
+#
+# Each copy is checked with PRAGMA integrity_check before it is moved into place,
+# and it is stored as a single self-contained file (journal_mode=DELETE).
+# A target ending in ".gz" is gzip-compressed. Restores read such files as well.
+
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from database import database_manager
+from database.migrations import apply_migrations, get_schema_version, latest_schema_version
+from database.reference_cache import reference_cache
+from shared.pdf_cache import pdf_cache
+
+PAGES_PER_STEP = 1024  # 4 MiB with the default 4 KiB pages
+STEP_PAUSE = 0.005     # seconds between steps, lets other connections take the write lock
+
+
+class BackupError(Exception):
+    pass
+
+
+class BackupCancelled(BackupError):
+    pass
+
+
+def integrity_errors(conn):
+    """PRAGMA integrity_check's findings; empty if the database is intact."""
+    rows = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    return [] if rows == ["ok"] else rows
+
+
+def _copy(source, target, progress=None, should_stop=None, pages_per_step=PAGES_PER_STEP):
+    def step(status, remaining, total):
+        if progress:
+            progress(total - remaining, total)
+        if should_stop and should_stop():
+            raise BackupCancelled("Backup cancelled")
+        if remaining and STEP_PAUSE:
+            time.sleep(STEP_PAUSE)
+    source.backup(target, pages=pages_per_step, progress=step)
+
+
+def _compress(path, target):
+    with open(path, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+
+
+def backup_database(target_path, progress=None, should_stop=None, db_file=None):
+    """
+    Writes a verified copy of the live database to `target_path`; returns a summary dict.
+    progress(pages_copied, total_pages); should_stop() is checked after every step.
+    """
+    started = time.perf_counter()
+    db_file = db_file or database_manager.DB_FILE
+    directory = os.path.dirname(os.path.abspath(target_path))
+    fd, tmp = tempfile.mkstemp(prefix=".backup_", suffix=".db", dir=directory)
+    os.close(fd)
+    packed = f"{tmp}.gz"
+    try:
+        source = sqlite3.connect(db_file, isolation_level=None)
+        target = sqlite3.connect(tmp)
+        try:
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()  # starts the read transaction
+            _copy(source, target, progress, should_stop)
+            source.execute("COMMIT")
+            target.execute("PRAGMA journal_mode = DELETE")
+            errors = integrity_errors(target)
+            pages = target.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            target.close()
+            source.close()
+        if errors:
+            raise BackupError("The backup failed its integrity check:\n" + "\n".join(errors[:10]))
+        compressed = target_path.lower().endswith(".gz")
+        if compressed:
+            _compress(tmp, packed)
+            os.replace(packed, target_path)
+        else:
+            os.replace(tmp, target_path)
+        return {"path": target_path, "pages": pages, "bytes": os.path.getsize(target_path),
+                "compressed": compressed, "seconds": time.perf_counter() - started}
+    finally:
+        for path in (tmp, packed):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+# --- Restore ---
+# A restore never writes into the live database. The backup is unpacked into a
+# temporary file next to it, and that copy is checked: it must be an intact
+# Freelancer Hub database whose schema is not newer than this build, with no
+# broken foreign keys. Older schemas are migrated forward. The copy is then
+# renamed over the live file, which is atomic, and every pooled connection is
+# reopened on the new file. The replaced database is kept as
+# "<db>.pre-restore" (a hard link, so it costs no extra space) until the next
+# restore. Restore listeners, e.g. the main window reloading its views, are
+# called once the new database is in place.
+
+REQUIRED_TABLES = {"settings", "clients", "projects", "time_entries", "invoices", "invoice_items", "expenses"}
+RESTORE_STEPS = 4
+
+_restore_listeners = []
+_swap_lock = threading.Lock()
+
+
+def add_restore_listener(callback):
+    """callback() runs after every restore, on the thread that did the restore."""
+    _restore_listeners.append(callback)
+
+
+def validate_candidate(path):
+    """Checks a database file and migrates it to the current schema in place; returns its original schema version."""
+    conn = sqlite3.connect(path)
+    try:
+        try:
+            errors = integrity_errors(conn)
+        except sqlite3.DatabaseError as e:
+            raise BackupError(f"Not a valid database backup: {e}")
+        if errors:
+            raise BackupError("The backup failed its integrity check:\n" + "\n".join(errors[:10]))
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if not REQUIRED_TABLES <= tables:
+            raise BackupError("This file is not a Freelancer Hub database.")
+        version, latest = get_schema_version(conn), latest_schema_version()
+        if version > latest:
+            raise BackupError(f"The backup was made by a newer version of the app (schema {version}, this version supports up to {latest}).")
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            raise BackupError(f"The backup has {len(violations)} rows with broken references "
+                              f"(first: row {violations[0][1]} of {violations[0][0]}).")
+        apply_migrations(conn, verbose=False)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        return version
+    finally:
+        conn.close()
+
+
+def _swap_in(candidate, db_file):
+    """Renames `candidate` over the live database once no connection is using it."""
+    with _swap_lock, database_manager.connection_manager.exclusive():
+        swap = sqlite3.connect(db_file, timeout=5, isolation_level=None)
+        try:
+            # Leaving WAL mode only works once every other connection is closed. It also folds
+            # the WAL into the file and deletes it, so no stale WAL can be replayed onto the new file.
+            try:
+                mode = swap.execute("PRAGMA journal_mode = DELETE").fetchone()[0]
+                if mode.lower() == "delete":
+                    swap.execute("BEGIN EXCLUSIVE")  # keeps other connections out until the new file is in place
+            except sqlite3.OperationalError:
+                mode = None
+            if mode is None or mode.lower() != "delete":
+                raise BackupError("The database is in use by another program. Close it and try again.")
+            previous = f"{db_file}.pre-restore"
+            try:
+                link = f"{previous}.{os.getpid()}.tmp"
+                os.link(db_file, link)
+                os.replace(link, previous)
+            except OSError as e:
+                print(f"Warning: Could not keep the replaced database. Error: {e}")
+            os.replace(candidate, db_file)
+        finally:
+            swap.close()
+
+
+def restore_database(backup_path, progress=None, db_file=None):
+    """
+    Replaces the live database with a backup (plain or .gz) after validating and migrating a copy of it.
+    progress(step, RESTORE_STEPS) reports the stages.
+    """
+    db_file = db_file or database_manager.DB_FILE
+    report = progress or (lambda done, total: None)
+    fd, candidate = tempfile.mkstemp(prefix=".restore_", suffix=".db", dir=os.path.dirname(os.path.abspath(db_file)))
+    os.close(fd)
+    try:
+        if backup_path.lower().endswith(".gz"):
+            with gzip.open(backup_path, "rb") as src, open(candidate, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+        else:
+            shutil.copyfile(backup_path, candidate)
+        report(1, RESTORE_STEPS)
+        validate_candidate(candidate)
+        report(2, RESTORE_STEPS)
+        _swap_in(candidate, db_file)
+        report(3, RESTORE_STEPS)
+    finally:
+        if os.path.exists(candidate):
+            os.remove(candidate)
+    # Cached results describe the old database. The listeners clear the caches kept elsewhere
+    # (project dashboards, queued PDF jobs).
+    reference_cache.invalidate_all()
+    pdf_cache.clear()
+    for callback in list(_restore_listeners):
+        try:
+            callback()
+        except Exception as e:
+            print(f"Warning: Restore listener failed. Error: {e}")
+    report(RESTORE_STEPS, RESTORE_STEPS)
@@ -0,0 +1,320 @@
+# shared/backup_store.py
+
+# --- Snapshot Backup Store ---
+# A deduplicating history of database backups. Each snapshot starts as a verified
+# online backup (backup_service.py). That copy is cut into fixed CHUNK_SIZE
+# pieces, and each piece is stored once under its SHA-256. SQLite never moves
+# pages around, so an unchanged page range produces the same chunk every day. A
+# snapshot of a mostly unchanged database then costs only the chunks that
+# changed, plus a small manifest.
+#
+#   <root>/chunks/ab/abcdef...    zlib-compressed chunk, named by the hash of its plain bytes
+#   <root>/snapshots/<id>.json    manifest: the chunk hashes in file order, size and hash of the whole file
+#
+# Retention is grandfather-father-son: the newest snapshot of each of the last
+# `daily` days, `weekly` ISO weeks and `monthly` months is kept (plus the newest
+# overall). prune() deletes the rest and then every chunk no remaining manifest
+# uses. Every file is written under a temporary name and renamed into place, so
+# an interrupted snapshot never leaves a broken chunk or manifest behind.
+#
+# The scheduler takes a snapshot once the newest one is older than the
+# "backup_interval_hours" setting (default 24, 0 turns it off), then prunes.
+#
+#   FREELANCER_HUB_BACKUP_DIR    store location (default data/backups)
+#
+#   python -m shared.backup_store snapshot | list | prune | stats | restore <id> [--to PATH]
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+from shared import backup_service
+
+STORE_ENV = "FREELANCER_HUB_BACKUP_DIR"
+INTERVAL_SETTING = "backup_interval_hours"
+DEFAULT_INTERVAL_HOURS = 24
+CHUNK_SIZE = 64 * 1024  # a whole number of pages for every SQLite page size
+RETENTION = {"daily": 7, "weekly": 4, "monthly": 12}
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def retention_plan(snapshots, daily=RETENTION["daily"], weekly=RETENTION["weekly"], monthly=RETENTION["monthly"]):
+    """Splits manifests (any order) into (keep, remove) lists by the grandfather-father-son rule."""
+    newest_first = sorted(snapshots, key=lambda s: s["created_at"], reverse=True)
+    keep = set(s["id"] for s in newest_first[:1])
+    for limit, bucket in ((daily, lambda d: d.date()), (weekly, lambda d: d.isocalendar()[:2]), (monthly, lambda d: (d.year, d.month))):
+        seen = []
+        for snapshot in newest_first:
+            key = bucket(datetime.fromisoformat(snapshot["created_at"]))
+            if key not in seen:
+                if len(seen) == limit:
+                    break
+                seen.append(key)
+                keep.add(snapshot["id"])
+    return ([s for s in newest_first if s["id"] in keep], [s for s in newest_first if s["id"] not in keep])
+
+
+class BackupStore:
+    def __init__(self, root):
+        self.root = root
+        self.chunk_dir = os.path.join(root, "chunks")
+        self.snapshot_dir = os.path.join(root, "snapshots")
+        # Snapshots, restores and pruning of one store never overlap (pruning must not
+        # delete chunks that a snapshot in progress has written but not yet listed).
+        self._lock = threading.Lock()
+
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def _manifest_path(self, snapshot_id):
+        return os.path.join(self.snapshot_dir, f"{snapshot_id}.json")
+
+    def snapshots(self):
+        """Manifests, oldest first."""
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        manifests = []
+        for name in os.listdir(self.snapshot_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(self.snapshot_dir, name), encoding="utf-8") as f:
+                    manifests.append(json.load(f))
+        return sorted(manifests, key=lambda m: m["created_at"])
+
+    def latest(self):
+        snapshots = self.snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def get(self, snapshot_id):
+        with open(self._manifest_path(snapshot_id), encoding="utf-8") as f:
+            return json.load(f)
+
+    def snapshot(self, progress=None, should_stop=None, now=None):
+        """
+        Backs up the live database into the store; returns the manifest.
+        progress(done, total) covers the page copy and then the chunking.
+        """
+        with self._lock:
+            created = now or datetime.now()
+            snapshot_id = created.strftime("%Y-%m-%dT%H-%M-%S")
+            while os.path.exists(self._manifest_path(snapshot_id)):
+                snapshot_id += "_"
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            fd, copy = tempfile.mkstemp(prefix=".snapshot_", suffix=".db", dir=self.root)
+            os.close(fd)
+            try:
+                report = (lambda done, total: progress(done, total * 2)) if progress else None
+                backup_service.backup_database(copy, report, should_stop)
+                size = os.path.getsize(copy)
+                file_hash = hashlib.sha256()
+                chunks, new_chunks, stored_bytes = [], 0, 0
+                with open(copy, "rb") as f:
+                    while data := f.read(CHUNK_SIZE):
+                        digest = hashlib.sha256(data).hexdigest()
+                        file_hash.update(data)
+                        chunks.append(digest)
+                        path = self._chunk_path(digest)
+                        if not os.path.exists(path):
+                            packed = zlib.compress(data, 6)
+                            _write_atomic(path, packed)
+                            new_chunks += 1
+                            stored_bytes += len(packed)
+                        if progress and len(chunks) % 64 == 0:
+                            total = -(-size // CHUNK_SIZE)
+                            progress(total + len(chunks), total * 2)
+                        if should_stop and should_stop():
+                            raise backup_service.BackupCancelled("Snapshot cancelled")
+            finally:
+                os.remove(copy)
+            manifest = {"id": snapshot_id, "created_at": created.isoformat(timespec="seconds"), "size": size,
+                        "sha256": file_hash.hexdigest(), "chunk_size": CHUNK_SIZE, "chunks": chunks,
+                        "new_chunks": new_chunks, "stored_bytes": stored_bytes}
+            _write_atomic(self._manifest_path(snapshot_id), json.dumps(manifest).encode("utf-8"))
+            return manifest
+
+    def extract(self, snapshot_id, target_path, progress=None):
+        """Reassembles a snapshot into `target_path` and checks it against the manifest's hash."""
+        with self._lock:
+            manifest = self.get(snapshot_id)
+            file_hash = hashlib.sha256()
+            tmp = f"{target_path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, "wb") as out:
+                    for i, digest in enumerate(manifest["chunks"], 1):
+                        try:
+                            with open(self._chunk_path(digest), "rb") as f:
+                                data = zlib.decompress(f.read())
+                        except (OSError, zlib.error) as e:
+                            raise backup_service.BackupError(f"Snapshot {snapshot_id} is damaged: chunk {digest[:12]} ({e})")
+                        if hashlib.sha256(data).hexdigest() != digest:
+                            raise backup_service.BackupError(f"Snapshot {snapshot_id} is damaged: chunk {digest[:12]} does not match its hash")
+                        file_hash.update(data)
+                        out.write(data)
+                        if progress and i % 64 == 0:
+                            progress(i, len(manifest["chunks"]))
+                if file_hash.hexdigest() != manifest["sha256"]:
+                    raise backup_service.BackupError(f"Snapshot {snapshot_id} does not match its manifest")
+                os.replace(tmp, target_path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            return target_path
+
+    def restore(self, snapshot_id, progress=None):
+        """Restores the live database to a snapshot."""
+        os.makedirs(self.root, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix=".restore_", suffix=".db", dir=self.root)
+        os.close(fd)
+        try:
+            self.extract(snapshot_id, path)
+            backup_service.restore_database(path, progress)
+        finally:
+            os.remove(path)
+
+    def prune(self, **retention):
+        """Applies the retention policy and deletes unused chunks; returns (snapshots removed, chunks removed)."""
+        with self._lock:
+            _, remove = retention_plan(self.snapshots(), **{**RETENTION, **retention})
+            for manifest in remove:
+                os.remove(self._manifest_path(manifest["id"]))
+            return len(remove), self._collect_garbage()
+
+    def _collect_garbage(self):
+        used = set()
+        for manifest in self.snapshots():
+            used.update(manifest["chunks"])
+        removed = 0
+        if os.path.isdir(self.chunk_dir):
+            for prefix in os.listdir(self.chunk_dir):
+                directory = os.path.join(self.chunk_dir, prefix)
+                for name in os.listdir(directory):
+                    if name not in used:
+                        os.remove(os.path.join(directory, name))
+                        removed += 1
+        return removed
+
+    def stats(self):
+        """Snapshot count, the bytes they represent and the bytes actually stored."""
+        snapshots = self.snapshots()
+        chunks = stored = 0
+        if os.path.isdir(self.chunk_dir):
+            for prefix in os.listdir(self.chunk_dir):
+                with os.scandir(os.path.join(self.chunk_dir, prefix)) as entries:
+                    for entry in entries:
+                        chunks += 1
+                        stored += entry.stat().st_size
+        return {"snapshots": len(snapshots), "logical_bytes": sum(s["size"] for s in snapshots),
+                "chunks": chunks, "stored_bytes": stored}
+
+
+backup_store = BackupStore(os.environ.get(STORE_ENV) or os.path.join(os.getcwd(), 'data', 'backups'))
+
+
+# --- Scheduled Snapshots ---
+class BackupScheduler:
+    """Daemon thread that takes a snapshot whenever the newest one is older than the configured interval."""
+
+    def __init__(self, store=backup_store, check_seconds=600):
+        self.store = store
+        self.check_seconds = check_seconds
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+    def interval(self):
+        from database.database_manager import get_all_settings
+        try:
+            return float(get_all_settings().get(INTERVAL_SETTING, DEFAULT_INTERVAL_HOURS))
+        except (TypeError, ValueError):
+            return DEFAULT_INTERVAL_HOURS
+
+    def due(self, now=None):
+        hours = self.interval()
+        if hours <= 0:
+            return False
+        latest = self.store.latest()
+        return latest is None or datetime.fromisoformat(latest["created_at"]) + timedelta(hours=hours) <= (now or datetime.now())
+
+    def run_once(self):
+        """Takes a snapshot and prunes if one is due; returns the manifest or None."""
+        if not self.due():
+            return None
+        manifest = self.store.snapshot(should_stop=self._stop.is_set)
+        self.store.prune()
+        return manifest
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Warning: Scheduled backup failed. Error: {e}")
+            self._stop.wait(self.check_seconds)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="backup-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+scheduler = BackupScheduler()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deduplicating database snapshot store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("snapshot", help="back up the database now")
+    sub.add_parser("list", help="list snapshots")
+    sub.add_parser("prune", help="apply the retention policy and delete unused chunks")
+    sub.add_parser("stats", help="show how much space the store uses")
+    restore = sub.add_parser("restore", help="restore the database (or, with --to, write the snapshot to a file)")
+    restore.add_argument("snapshot_id")
+    restore.add_argument("--to", help="write the snapshot's database file here instead of restoring it")
+    args = parser.parse_args(argv)
+
+    if args.command == "snapshot":
+        m = backup_store.snapshot()
+        print(f"Snapshot {m['id']}: {m['size'] / 1e6:.1f} MB database, {m['new_chunks']} new chunks ({m['stored_bytes'] / 1e6:.2f} MB stored)")
+    elif args.command == "list":
+        for m in backup_store.snapshots():
+            print(f"{m['id']}  {m['size'] / 1e6:9.1f} MB  +{m['stored_bytes'] / 1e6:.2f} MB")
+    elif args.command == "prune":
+        snapshots, chunks = backup_store.prune()
+        print(f"Removed {snapshots} snapshots and {chunks} chunks")
+    elif args.command == "stats":
+        s = backup_store.stats()
+        print(f"{s['snapshots']} snapshots covering {s['logical_bytes'] / 1e6:.1f} MB, stored in {s['chunks']} chunks ({s['stored_bytes'] / 1e6:.1f} MB)")
+    elif args.command == "restore":
+        if args.to:
+            backup_store.extract(args.snapshot_id, args.to)
+            print(f"Snapshot {args.snapshot_id} written to {args.to}")
+        else:
+            backup_store.restore(args.snapshot_id)
+            print(f"Database restored to snapshot {args.snapshot_id}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# shared/billing_run.py
+
+# --- Month-End Billing Runs ---
+# Invoices every client with unbilled time in a period (database/billing_runs.py)
+# and renders the PDFs in a process pool. Each finished PDF is recorded as soon as
+# it arrives, so an interrupted run is picked up where it stopped with
+# render_run(run_id); failed invoices are retried the same way.
+#
+#   python -m shared.billing_run 2026-09                   bill September 2026
+#   python -m shared.billing_run --start 2026-09-01 --end 2026-09-15 --grouping day
+#   python -m shared.billing_run --list                    runs that are not completed
+#   python -m shared.billing_run --resume 12               render what run 12 is missing
+
+import argparse
+import calendar
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from database.database_manager import (create_billing_run, finish_billing_run, get_all_settings, get_billing_run,
+                                       get_billing_run_errors, get_billing_run_render_jobs, get_billing_runs,
+                                       initialize_database, record_billing_run_render)
+
+DEFAULT_DUE_DAYS = 30
+
+
+def month_period(month):
+    """'YYYY-MM' -> (first day, last day) as ISO strings."""
+    year, month = (int(part) for part in month.split("-"))
+    return date(year, month, 1).isoformat(), date(year, month, calendar.monthrange(year, month)[1]).isoformat()
+
+
+def default_workers(job_count):
+    return max(1, min(job_count, os.cpu_count() or 1))
+
+
+def _render(job, company_details):
+    """Runs in a worker process; returns (invoice_id, pdf_path, error)."""
+    try:
+        from shared.pdf_generator import create_invoice_pdf
+        pdf_path = create_invoice_pdf(job["invoice_data"], job["line_items"], job["client_data"], company_details)
+        return job["invoice_id"], pdf_path, None if pdf_path else "PDF could not be saved"
+    except Exception as e:
+        return job["invoice_id"], None, f"{type(e).__name__}: {e}"
+
+
+def render_run(run_id, workers=None, progress=None, should_stop=None):
+    """
+    Renders every PDF of the run that is still pending or failed.
+    progress(done, total, invoice_number, error) is called after each invoice, in this
+    process; should_stop() is polled between invoices to abandon the rest (the run
+    stays resumable). Returns the run's status: 'Completed', 'Failed' or 'Rendering'.
+    """
+    jobs = get_billing_run_render_jobs(run_id)
+    if not jobs:
+        return finish_billing_run(run_id)
+    company_details = get_all_settings()
+    numbers = {job["invoice_id"]: job["invoice_data"]["invoice_number"] for job in jobs}
+    workers = workers or default_workers(len(jobs))
+    done = 0
+
+    def record(invoice_id, pdf_path, error):
+        nonlocal done
+        record_billing_run_render(run_id, invoice_id, pdf_path, error)
+        done += 1
+        if progress:
+            progress(done, len(jobs), numbers[invoice_id], error)
+
+    if workers == 1:
+        for job in jobs:
+            if should_stop and should_stop():
+                return 'Rendering'
+            record(*_render(job, company_details))
+        return finish_billing_run(run_id)
+
+    # 'spawn' keeps workers clear of the GUI's threads and Qt state.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_render, job, company_details) for job in jobs]
+        for future in as_completed(futures):
+            record(*future.result())
+            if should_stop and should_stop():
+                pool.shutdown(cancel_futures=True)
+                return 'Rendering'
+    return finish_billing_run(run_id)
+
+
+def run(period_start, period_end, issue_date=None, due_date=None, grouping="week", workers=None, progress=None, should_stop=None):
+    """Creates the run's invoices and renders them; returns (run_id, status), or (None, None) if nothing was unbilled."""
+    issue_date = issue_date or date.today().isoformat()
+    due_date = due_date or (date.fromisoformat(issue_date) + timedelta(days=DEFAULT_DUE_DAYS)).isoformat()
+    run_id = create_billing_run(period_start, period_end, issue_date, due_date, grouping)
+    if run_id is None:
+        return None, None
+    return run_id, render_run(run_id, workers, progress, should_stop)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Invoice every client with unbilled time in a period.")
+    parser.add_argument("month", nargs="?", help="period as YYYY-MM (or use --start/--end)")
+    parser.add_argument("--start", help="first day of the period (YYYY-MM-DD)")
+    parser.add_argument("--end", help="last day of the period (YYYY-MM-DD)")
+    parser.add_argument("--issue-date", help="defaults to today")
+    parser.add_argument("--due-date", help=f"defaults to the issue date + {DEFAULT_DUE_DAYS} days")
+    parser.add_argument("--grouping", default="week", choices=["entry", "day", "week", "description", "tag"])
+    parser.add_argument("--workers", type=int, help="PDF worker processes (default: one per CPU)")
+    parser.add_argument("--resume", type=int, metavar="RUN_ID", help="render the PDFs an interrupted run is missing")
+    parser.add_argument("--list", action="store_true", help="list runs that are not completed")
+    args = parser.parse_args(argv)
+    initialize_database()
+
+    if args.list:
+        for billing_run in get_billing_runs(unfinished_only=True):
+            print(f"Run {billing_run['id']}: {billing_run['period_start']} .. {billing_run['period_end']}  {billing_run['status']}")
+        return 0
+
+    def progress(done, total, invoice_number, error):
+        print(f"[{done}/{total}] {invoice_number}: {'FAILED - ' + error if error else 'ok'}")
+
+    if args.resume:
+        run_id, status = args.resume, render_run(args.resume, args.workers, progress)
+    else:
+        if args.month:
+            period_start, period_end = month_period(args.month)
+        elif args.start and args.end:
+            period_start, period_end = args.start, args.end
+        else:
+            parser.error("give a month (YYYY-MM) or both --start and --end")
+        run_id, status = run(period_start, period_end, args.issue_date, args.due_date, args.grouping, args.workers, progress)
+        if run_id is None:
+            print(f"Nothing unbilled between {period_start} and {period_end}.")
+            return 0
+
+    summary = get_billing_run(run_id)
+    print(f"Run {run_id}: {summary['invoice_count']} invoices, ${summary['total_amount']:.2f}, {status}")
+    for invoice_number, error in get_billing_run_errors(run_id):
+        print(f"  {invoice_number}: {error}")
+    return 0 if status == 'Completed' else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,184 @@
 # shared/export_manager.py
 
+# --- CSV Export ---
+# Exports stream rows from a database cursor (the iter_* generators in
+# database_manager.py) straight to disk, so memory use does not grow with the
+# table. Rows are written in chunks on a worker thread, with a progress dialog
+# that can cancel the export. The file is written under a temporary name and
+# renamed into place at the end, so a cancelled or failed export never leaves a
+# truncated CSV behind. A target ending in ".gz" is gzip-compressed.
+
 import csv
+import gzip
 import os
 from datetime import datetime
-from PySide6.QtWidgets import QFileDialog, QMessageBox
+from PySide6.QtCore import QThread, Signal
+from PySide6.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+
+from database import database_manager as db
+
+CHUNK_ROWS = 1000
+FILE_FILTER = "CSV Files (*.csv);;Gzip-compressed CSV (*.csv.gz);;All Files (*)"
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def write_csv(path, headers, rows, progress=None, should_stop=None, chunk_rows=CHUNK_ROWS):
+    """
+    Writes `rows` (any iterable of sequences) to `path` atomically; returns the number of rows.
+    progress(rows_written) is called after each chunk; should_stop() is checked between chunks
+    and raises ExportCancelled if it returns True.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    try:
+        with opener(tmp, mode='wt', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(headers)
+            count, chunk = 0, []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= chunk_rows:
+                    writer.writerows(chunk)
+                    count += len(chunk); chunk.clear()
+                    if progress: progress(count)
+                    if should_stop and should_stop():
+                        raise ExportCancelled()
+            writer.writerows(chunk)
+            count += len(chunk)
+            if progress: progress(count)
+        os.replace(tmp, path)
+        return count
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _money(value): return f"{value or 0:.2f}"
+
+# name -> title, default file name, table (for the progress total), headers, row source, row -> CSV values
+EXPORTERS = {
+    "clients": {"title": "Clients", "filename": "clients_export.csv", "table": "clients",
+                "headers": ["Client ID", "Name", "Email", "Address"],
+                "source": db.iter_clients,
+                "row": lambda c: (c["id"], c["name"], c["email"], c["address"])},
+    "projects": {"title": "Projects", "filename": "projects_export.csv", "table": "projects",
+                 "headers": ["Project ID", "Name", "Client", "Rate", "Status"],
+                 "source": db.iter_projects_with_client_name,
+                 "row": lambda p: (p["id"], p["name"], p["client_name"], f"${p['rate'] or 0}/hr", p["status"] or "Pending")},
+    "time_entries": {"title": "Time Entries", "filename": "time_entries_export.csv", "table": "time_entries",
+                     "headers": ["Entry ID", "Client", "Project", "Start", "End", "Minutes", "Description", "Billed", "Invoice ID"],
+                     "source": db.iter_time_entries,
+                     "row": lambda t: (t["id"], t["client_name"], t["project_name"], t["start_time"], t["end_time"], t["duration_minutes"],
+                                       t["description"], "Yes" if t["is_billed"] else "No", t["invoice_id"])},
+    "invoices": {"title": "Invoices", "filename": "invoices_export.csv", "table": "invoices",
+                 "headers": ["Invoice ID", "Invoice #", "Client", "Issue Date", "Status", "Amount"],
+                 "source": db.iter_invoices_with_details,
+                 "row": lambda i: (i["id"], i["invoice_number"], i["client_name"], i["issue_date"], i["status"], _money(i["total_amount"]))},
+    "invoice_items": {"title": "Invoice Items", "filename": "invoice_items_export.csv", "table": "invoice_items",
+                      "headers": ["Item ID", "Invoice #", "Description", "Quantity", "Rate", "Amount"],
+                      "source": db.iter_all_invoice_items,
+                      "row": lambda i: (i["id"], i["invoice_number"], i["description"], i["quantity"], _money(i["rate"]), _money(i["amount"]))},
+    "expenses": {"title": "Expenses", "filename": "expenses_export.csv", "table": "expenses",
+                 "headers": ["Expense ID", "Date", "Description", "Category", "Amount", "Receipt"],
+                 "source": db.iter_expenses,
+                 "row": lambda e: (e["id"], e["expense_date"], e["description"], e["category"], _money(e["amount"]), e["receipt_path"])},
+}
+
+
+def export_table(name, path, progress=None, should_stop=None):
+    """Runs one of the EXPORTERS; progress(rows_written, total_rows)."""
+    exporter = EXPORTERS[name]
+    total = db.count_rows(exporter["table"])
+    report = (lambda count: progress(count, total)) if progress else None
+    rows = map(exporter["row"], exporter["source"]())
+    return write_csv(path, exporter["headers"], rows, report, should_stop)
+
+
+class ExportThread(QThread):
+    """Runs an export off the GUI thread. The rows are produced on this thread too."""
+    progress = Signal(int, int)  # rows written, total (0 if unknown)
+    completed = Signal(str, int)  # path, rows
+    failed = Signal(str)
+    cancelled = Signal()
+
+    def __init__(self, path, headers=None, rows=None, exporter=None, parent=None):
+        super().__init__(parent)
+        self.path, self.headers, self.rows, self.exporter = path, headers, rows, exporter
+
+    def run(self):
+        try:
+            if self.exporter:
+                count = export_table(self.exporter, self.path, self.progress.emit, self.isInterruptionRequested)
+            else:
+                count = write_csv(self.path, self.headers, self.rows, lambda n: self.progress.emit(n, 0), self.isInterruptionRequested)
+        except ExportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(self.path, count)
+
+
+def _ask_path(parent_widget, default_filename):
+    file_path, selected_filter = QFileDialog.getSaveFileName(parent_widget, "Export to CSV", default_filename, FILE_FILTER)
+    if file_path and selected_filter.startswith("Gzip") and not file_path.lower().endswith(".gz"):
+        file_path += ".gz"
+    return file_path
+
+
+def _run(parent_widget, thread, title):
+    """Shows a cancellable progress dialog while `thread` runs; returns immediately."""
+    dialog = QProgressDialog(f"Exporting {title}...", "Cancel", 0, 0, parent_widget)
+    dialog.setWindowTitle("Export to CSV"); dialog.setMinimumDuration(300); dialog.setAutoClose(False); dialog.setAutoReset(False)
+
+    def on_progress(done, total):
+        dialog.setMaximum(max(total, done) if total else 0)
+        dialog.setValue(done)
+        dialog.setLabelText(f"Exporting {title}... {done:,} rows")
+
+    def on_completed(path, count):
+        dialog.close()
+        QMessageBox.information(parent_widget, "Export Successful", f"{count:,} rows exported to:\n{path}")
+
+    def on_failed(message):
+        dialog.close()
+        QMessageBox.critical(parent_widget, "Export Error", f"Failed to export data:\n{message}")
+
+    thread.progress.connect(on_progress)
+    thread.completed.connect(on_completed)
+    thread.failed.connect(on_failed)
+    thread.cancelled.connect(dialog.close)
+    thread.finished.connect(thread.deleteLater)
+    dialog.canceled.connect(thread.requestInterruption)
+    thread.start()
+    dialog.show()
+    return thread
+
+
+def export_data(parent_widget, name):
+    """Asks for a file and exports one of the EXPORTERS in the background; returns the thread, or None if cancelled."""
+    exporter = EXPORTERS[name]
+    stem, ext = os.path.splitext(exporter["filename"])
+    file_path = _ask_path(parent_widget, f"{stem}_{datetime.now():%Y-%m-%d}{ext}")
+    if not file_path:
+        return None
+    return _run(parent_widget, ExportThread(file_path, exporter=name, parent=parent_widget), exporter["title"])
+
 
 def export_to_csv(parent_widget, headers, data, default_filename="export.csv"):
     """
-    Exports a list of lists (data) to a CSV file.
-    
+    Exports rows to a CSV file chosen by the user, in the background.
+
     Args:
         parent_widget (QWidget): Parent for the file dialog.
         headers (list): List of column names.
-        data (list): List of rows, where each row is a list/tuple of values.
+        data (iterable): Rows (lists/tuples); a generator is consumed on the worker thread.
         default_filename (str): Default name for the file.
     """
-    options = QFileDialog.Options()
-    file_path, _ = QFileDialog.getSaveFileName(
-        parent_widget,
-        "Export to CSV",
-        default_filename,
-        "CSV Files (*.csv);;All Files (*)",
-        options=options
-    )
-
+    file_path = _ask_path(parent_widget, default_filename)
     if not file_path:
-        return False # User canceled
-
-    try:
-        with open(file_path, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(headers)
-            writer.writerows(data)
-        
-        QMessageBox.information(parent_widget, "Export Successful", f"Data exported to:\n{file_path}")
-        return True
-    
-    except Exception as e:
-        QMessageBox.critical(parent_widget, "Export Error", f"Failed to export data:\n{e}")
-        return False
+        return None # User canceled
+    return _run(parent_widget, ExportThread(file_path, headers, data, parent=parent_widget), os.path.basename(file_path))
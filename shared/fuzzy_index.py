@@ -0,0 +1,265 @@
+# shared/fuzzy_index.py
+
+# --- Command Palette Index ---
+# An in-memory index of the things the Ctrl+K palette can jump to: sidebar pages,
+# clients, projects and invoice numbers. Each entity gets a slot number. Its
+# searchable text (label and detail, case-folded) is indexed in two ways:
+#   trigrams              "acme" -> "acm", "cme"          queries of 3+ characters
+#   word prefixes         "acme corp" -> "a", "ac", "c", "co"   1-2 character queries
+# Postings are array('I') lists of slots, in slot order. Detail strings (client
+# names, repeated on every project and invoice) are interned, so 100k entities
+# share a few thousand of them.
+#
+# A query is split into words. Every word must occur in the entity's text. The
+# candidates are the slots of the rarest trigram (or of the word prefix). They
+# are checked with plain substring tests, SCAN_CHUNK slots at a time, and the
+# scan stops after the chunk that brings it to MATCH_LIMIT matches. Slots are in
+# pages, clients, projects, invoices order, so the kinds that usually matter
+# most are seen first. When the new query only narrows the previous one
+# (another letter typed), only the previous matches are rechecked. A query that
+# matches nothing falls back to counting shared trigrams, so small typos still
+# find something, and pages also match abbreviations ("tm trk").
+#
+# Updates are incremental. sync() compares a source's rows with what is indexed
+# and only re-indexes the entities that changed. A changed or deleted entity
+# leaves a dead slot behind that searches skip. The postings are compacted once
+# a quarter of the slots are dead. PaletteIndex.refresh() re-syncs only the
+# sources whose tables were written since the last sync, using the reference
+# cache's table generations (database/reference_cache.py).
+
+import sys
+import threading
+from array import array
+
+from database import database_manager as db
+from database.reference_cache import reference_cache
+
+KINDS = ("page", "client", "project", "invoice")
+KIND_LABELS = {"page": "Go to", "client": "Client", "project": "Project", "invoice": "Invoice"}
+MATCH_LIMIT = 500
+SCAN_CHUNK = 1024
+COMPACT_RATIO = 0.25
+COMPACT_MIN_DEAD = 1024
+FALLBACK_MAX_POSTING = 20_000  # trigrams this common say little about a typo'd query
+
+
+def _grams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2) if " " not in text[i:i + 3]}
+
+
+def _abbreviates(word, text):
+    """True if the letters of `word` appear in `text` in order."""
+    rest = iter(text)
+    return all(char in rest for char in word)
+
+
+def _prefixes(text):
+    found = set()
+    for word in text.split():
+        found.add(word[:1]); found.add(word[:2])
+    return found
+
+
+class FuzzyIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._kinds = bytearray()     # slot -> index into KINDS
+        self._ids = array('q')        # slot -> record id
+        self._labels = []             # slot -> label as displayed
+        self._details = []            # slot -> interned detail
+        self._texts = []              # slot -> case-folded "label detail"
+        self._alive = bytearray()
+        self._slots = {}              # (kind code, id) -> live slot
+        self._grams = {}              # trigram -> array('I') of slots
+        self._prefixes = {}           # 1-2 character word prefix -> array('I') of slots
+        self._dead = 0
+        self._last = None             # (words, matches) of the last complete scan
+
+    def __len__(self):
+        return len(self._slots)
+
+    # --- Updates ---
+    def _append(self, code, record_id, label, detail):
+        slot = len(self._ids)
+        detail = sys.intern(detail or "")
+        text = f"{label} {detail}".casefold() if detail else label.casefold()
+        self._kinds.append(code); self._ids.append(record_id); self._alive.append(1)
+        self._labels.append(sys.intern(label)); self._details.append(detail); self._texts.append(text)
+        self._slots[(code, record_id)] = slot
+        for gram in _grams(text):
+            postings = self._grams.get(gram)
+            if postings is None:
+                postings = self._grams[sys.intern(gram)] = array('I')
+            postings.append(slot)
+        for prefix in _prefixes(text):
+            postings = self._prefixes.get(prefix)
+            if postings is None:
+                postings = self._prefixes[prefix] = array('I')
+            postings.append(slot)
+
+    def _kill(self, slot):
+        self._alive[slot] = 0
+        del self._slots[(self._kinds[slot], self._ids[slot])]
+        self._dead += 1
+
+    def _put(self, code, record_id, label, detail):
+        """Indexes one entity; returns False if it was already indexed unchanged."""
+        label, detail = label or "", detail or ""
+        slot = self._slots.get((code, record_id))
+        if slot is not None:
+            if self._labels[slot] == label and self._details[slot] == detail:
+                return False
+            self._kill(slot)
+        self._append(code, record_id, label, detail)
+        return True
+
+    def put(self, kind, record_id, label, detail=""):
+        with self._lock:
+            if self._put(KINDS.index(kind), record_id, label, detail):
+                self._changed()
+
+    def discard(self, kind, record_id):
+        with self._lock:
+            slot = self._slots.get((KINDS.index(kind), record_id))
+            if slot is not None:
+                self._kill(slot)
+                self._changed()
+
+    def sync(self, kind, rows):
+        """Makes the indexed entities of `kind` match `rows` of (id, label, detail); returns how many changed."""
+        code = KINDS.index(kind)
+        with self._lock:
+            changed, seen = 0, set()
+            for record_id, label, detail in rows:
+                seen.add(record_id)
+                changed += self._put(code, record_id, label, detail)
+            for key in [key for key in self._slots if key[0] == code and key[1] not in seen]:
+                self._kill(self._slots[key])
+                changed += 1
+            if changed:
+                self._changed()
+            return changed
+
+    def _changed(self):
+        self._last = None
+        if self._dead >= COMPACT_MIN_DEAD and self._dead > COMPACT_RATIO * len(self._ids):
+            live = [(self._kinds[s], self._ids[s], self._labels[s], self._details[s])
+                    for s in range(len(self._ids)) if self._alive[s]]
+            self._clear()
+            for entity in live:
+                self._append(*entity)
+
+    # --- Queries ---
+    def _candidates(self, words):
+        """Slots that may match `words` and whether every match among them is certain to be found."""
+        last = self._last
+        if last is not None and len(words) >= len(last[0]) and all(old in new for old, new in zip(last[0], words)):
+            return last[1], True
+        long_words = [word for word in words if len(word) >= 3]
+        if long_words:
+            postings = [self._grams.get(gram) for word in long_words for gram in _grams(word)]
+            if any(p is None for p in postings):
+                return (), True
+            return min(postings, key=len), True
+        # Only short words: match them as word prefixes, which narrows "a" far more than a substring would.
+        return self._prefixes.get(max(words, key=len), ()), False
+
+    def _score(self, slot, words):
+        text, label_length, score = self._texts[slot], len(self._labels[slot]), 0
+        for word in words:
+            pos = text.find(word)
+            score += 0 if pos == 0 else 1 if text[pos - 1] == " " and pos < label_length else 2 if pos < label_length else 4
+        return (score, self._kinds[slot], label_length)
+
+    def _pages(self):
+        """Slots of the pages, which set_pages() numbers from 0."""
+        page, slots = 0, []
+        while (0, page) in self._slots:
+            slots.append(self._slots[(0, page)]); page += 1
+        return slots
+
+    def _fuzzy(self, words, limit):
+        abbreviated = [slot for slot in self._pages() if all(_abbreviates(word, self._texts[slot]) for word in words)]
+        grams = {gram for word in words for gram in _grams(word)}
+        counts = {}
+        for gram in grams:
+            postings = self._grams.get(gram, ())
+            if len(postings) <= FALLBACK_MAX_POSTING:
+                for slot in postings:
+                    counts[slot] = counts.get(slot, 0) + 1
+        needed = max(1, (len(grams) + 1) // 2)
+        alive = self._alive
+        hits = [(-count, self._kinds[slot], len(self._labels[slot]), slot) for slot, count in counts.items()
+                if count >= needed and alive[slot]]
+        hits.sort()
+        return (abbreviated + [hit[3] for hit in hits if hit[3] not in abbreviated])[:limit]
+
+    def search(self, query, limit=20):
+        """Best matches first: dicts with kind, id, label and detail."""
+        words = query.casefold().split()
+        with self._lock:
+            if not words:
+                slots = self._pages()[:limit]
+            else:
+                candidates, complete = self._candidates(words)
+                texts, alive, matches = self._texts, self._alive, []
+                # One list comprehension per word over a chunk runs several times faster than testing slot by slot.
+                checks = sorted(words, key=len, reverse=True)
+                for start in range(0, len(candidates), SCAN_CHUNK):
+                    chunk = [slot for slot in candidates[start:start + SCAN_CHUNK] if alive[slot]]
+                    for word in checks:
+                        chunk = [slot for slot in chunk if word in texts[slot]]
+                    matches += chunk
+                    if len(matches) >= MATCH_LIMIT:
+                        complete = start + SCAN_CHUNK >= len(candidates) and complete
+                        break
+                self._last = (words, matches) if complete else None
+                if matches:
+                    slots = sorted(matches, key=lambda slot: self._score(slot, words))[:limit]
+                else:
+                    slots = self._fuzzy(words, limit)
+            return [{"kind": KINDS[self._kinds[s]], "id": self._ids[s], "label": self._labels[s], "detail": self._details[s]}
+                    for s in slots]
+
+    def stats(self):
+        with self._lock:
+            return {"entities": len(self._slots), "slots": len(self._ids), "dead": self._dead,
+                    "trigrams": len(self._grams), "postings": sum(len(p) for p in self._grams.values())}
+
+
+# Palette sources: kind -> (tables it is read from, loader returning (id, label, detail) rows).
+SOURCES = {
+    "client": (("clients",), lambda: ((c["id"], c["name"], c["email"]) for c in db.get_all_clients())),
+    "project": (("projects", "clients"), lambda: ((p["id"], p["name"], p["client_name"]) for p in db.get_all_projects_with_client_name())),
+    "invoice": (("invoices", "clients"), lambda: ((i["id"], i["invoice_number"], i["client_name"]) for i in db.get_all_invoices_with_details())),
+}
+
+
+class PaletteIndex(FuzzyIndex):
+    """The FuzzyIndex behind the command palette, kept in step with the database."""
+
+    def __init__(self):
+        super().__init__()
+        self._synced = {}  # kind -> table generations at the last sync
+        self._refresh_lock = threading.Lock()
+
+    def set_pages(self, names):
+        self.sync("page", ((index, name, "") for index, name in enumerate(names)))
+
+    def refresh(self):
+        """Re-syncs every source whose tables changed since it was last synced; returns the number of changed entities."""
+        changed = 0
+        with self._refresh_lock:
+            for kind, (tables, load) in SOURCES.items():
+                # Read before loading, so a write during the load triggers another sync next time.
+                generations = reference_cache.table_generations(tables)
+                if self._synced.get(kind) != generations:
+                    changed += self.sync(kind, load())
+                    self._synced[kind] = generations
+        return changed
+
+
+palette_index = PaletteIndex()
@@ -0,0 +1,190 @@
+# shared/pdf_cache.py
+
+# --- Invoice PDF Cache ---
+# Content-addressed store for rendered invoice PDFs. The key is a SHA-256 over
+# everything that ends up on the page: invoice data, line items, client data,
+# company settings and the logo file's bytes, plus RENDERER_VERSION (bump it when
+# the layout changes). Rendering the same invoice again is then a file lookup.
+#
+# Entries live in data/pdf_cache/<key>.pdf. The invoice file under data/invoices is
+# a hard link to its entry where the filesystem allows it, otherwise a copy. Files
+# are always replaced atomically and never rewritten in place, so a link never
+# changes content. The cache is kept under a size budget by evicting least recently
+# used entries. Evicting an entry never deletes an invoice file.
+#
+#   FREELANCER_HUB_PDF_CACHE=0      disable the cache (always render)
+#   FREELANCER_HUB_PDF_CACHE_MB     size budget in MiB (default 256)
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+CACHE_ENV = "FREELANCER_HUB_PDF_CACHE"
+BUDGET_ENV = "FREELANCER_HUB_PDF_CACHE_MB"
+DEFAULT_BUDGET_MB = 256
+RENDERER_VERSION = 2
+
+# Settings that do not affect the rendered page; the logo path is replaced by the logo's content hash.
+_IGNORED_SETTINGS = {"logo_path", "invoice_number_series"}
+
+
+# --- Logo ---
+_logos = {}  # path -> ((mtime_ns, size), (sha256, bytes))
+_logo_lock = threading.Lock()
+
+
+def read_logo(path):
+    """(sha256 hex, bytes) of the logo file, read once per process while the file is unchanged; None if missing."""
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _logo_lock:
+        cached = _logos.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    logo = (hashlib.sha256(data).hexdigest(), data)
+    with _logo_lock:
+        _logos[path] = (stamp, logo)
+    return logo
+
+
+def cache_key(invoice_data, line_items, client_data, company_details):
+    """Hex digest identifying the rendered PDF."""
+    logo = read_logo(company_details.get('logo_path'))
+    settings = {k: v for k, v in company_details.items() if k not in _IGNORED_SETTINGS}
+    payload = {"version": RENDERER_VERSION, "invoice": invoice_data, "items": list(line_items),
+               "client": client_data, "company": settings, "logo": logo[0] if logo else None}
+    encoded = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _place(source, target):
+    """Atomically makes `target` a hard link to (or, failing that, a copy of) `source`."""
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        try:
+            os.link(source, tmp)
+        except OSError:
+            with open(source, "rb") as src, open(tmp, "wb") as dst:
+                while chunk := src.read(1 << 20):
+                    dst.write(chunk)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class PdfCache:
+    def __init__(self, directory, budget_bytes, enabled=True):
+        self.directory = directory
+        self.budget_bytes = budget_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._index = None  # key -> [size, last used]; built from the directory on first use
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _load_index(self):
+        """Scans the directory; other processes (billing run workers) may have added entries."""
+        index = {}
+        os.makedirs(self.directory, exist_ok=True)
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".pdf"):
+                    st = entry.stat()
+                    index[entry.name[:-4]] = [st.st_size, st.st_mtime]
+        self._index = index
+        self._total = sum(size for size, _ in index.values())
+
+    def fetch(self, key, target):
+        """On a hit, makes `target` hold the cached PDF and returns True."""
+        if not self.enabled:
+            return False
+        path = self._path(key)
+        try:
+            if not (os.path.exists(target) and os.path.samefile(path, target)):
+                _place(path, target)
+        except OSError:
+            # Not cached, or evicted by another process a moment ago.
+            with self._lock:
+                self.misses += 1
+            return False
+        try:
+            os.utime(path)  # the mtime doubles as the last-used time for eviction
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            if self._index is not None and key in self._index:
+                self._index[key][1] = time.time()
+        return True
+
+    def store(self, key, rendered):
+        """Adds a freshly rendered file (which stays where it is) and evicts down to the budget."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            _place(rendered, self._path(key))
+            size = os.path.getsize(rendered)
+            previous = self._index.get(key)
+            self._total += size - (previous[0] if previous else 0)
+            self._index[key] = [size, os.path.getmtime(self._path(key))]
+            if self._total > self.budget_bytes:
+                self._evict(keep=key)
+
+    def _evict(self, keep):
+        self._load_index()
+        for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                continue
+            del self._index[key]
+            self._total -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._load_index()
+            for key in list(self._index):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._index, self._total = {}, 0
+
+    def stats(self):
+        with self._lock:
+            if self._index is None and self.enabled:
+                self._load_index()
+            return {"enabled": self.enabled, "entries": len(self._index or {}), "bytes": self._total,
+                    "budget_bytes": self.budget_bytes, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+pdf_cache = PdfCache(
+    os.path.join(os.getcwd(), 'data', 'pdf_cache'),
+    int(float(os.environ.get(BUDGET_ENV, DEFAULT_BUDGET_MB)) * 1024 * 1024),
+    enabled=os.environ.get(CACHE_ENV, "1").strip().lower() not in ("0", "false", "no", "off"),
+)
@@ -1,7 +1,27 @@
 # shared/pdf_generator.py
 
+import io
 import os
+import threading
 from fpdf import FPDF
+from shared.pdf_cache import cache_key, pdf_cache, read_logo
+
+# Decoded logos by content hash, shared by every PDF rendered in this process.
+# Core font metrics (Helvetica) are already module-level data in fpdf2.
+_decoded_logos = {}
+_decoded_logos_lock = threading.Lock()
+
+def _decoded_logo(logo):
+    """fpdf2's image info for the logo bytes, decoded once per process."""
+    from fpdf.image_parsing import get_img_info
+    sha, data = logo
+    with _decoded_logos_lock:
+        info = _decoded_logos.get(sha)
+    if info is None:
+        info = get_img_info(sha, io.BytesIO(data))
+        with _decoded_logos_lock:
+            _decoded_logos[sha] = info
+    return info
 
 class InvoicePDF(FPDF):
     """A custom PDF class to define a consistent header and footer for all invoices."""
@@ -10,12 +30,33 @@ class InvoicePDF(FPDF):
         self.company_name = company_details.get('company_name', 'Your Company Name')
         self.company_address = company_details.get('company_address', '123 Main St, Anytown')
         self.logo_path = company_details.get('logo_path')
+        self.logo = read_logo(self.logo_path)
         self.set_auto_page_break(auto=True, margin=15)
 
+    def _preload_logo(self):
+        """
+        Seeds this document's image cache with the process-wide decoded logo, so
+        fpdf2 finds it under the logo path instead of reading and decoding the file.
+        Relies on fpdf2's ImageCache layout; if that fails the logo is simply loaded normally.
+        """
+        images = self.image_cache.images
+        if self.logo_path in images:
+            return
+        try:
+            info = _decoded_logo(self.logo)
+            if info.get("iccp") is not None:
+                return  # ICC profiles need per-document bookkeeping
+            seeded = type(info)(info)
+            seeded.update(i=len(images) + 1, usages=0, iccp_i=None)
+            images[self.logo_path] = seeded
+        except Exception as e:
+            print(f"Warning: Could not preload logo image. Error: {e}")
+
     def header(self):
         # Logo: Check if path is valid before trying to render
-        if self.logo_path and os.path.exists(self.logo_path):
+        if self.logo:
             try:
+                self._preload_logo()
                 self.image(self.logo_path, 10, 8, 33)
             except Exception as e:
                 print(f"Warning: Could not load logo image. Error: {e}")
@@ -34,12 +75,150 @@ class InvoicePDF(FPDF):
         self.set_font('Helvetica', 'I', 8)
         self.cell(0, 10, f'Thank you for your business! - Page {self.page_no()}', 0, 0, 'C')
 
+# --- Line Item Table ---
+# Draws line items from any iterable (a list, or rows streamed from a database cursor)
+# one row at a time, so nothing per row is kept after it is drawn. Descriptions wrap
+# within their column, the header is repeated on every page, and a table that spans
+# several pages shows each page's subtotal with the total carried forward to the next.
+# Page breaks are placed by the table itself rather than by fpdf's auto page break.
+TABLE_COLUMNS = (("DESCRIPTION", 100), ("QUANTITY", 30), ("RATE", 30), ("AMOUNT", 30))  # (title, width in mm)
+HEADER_HEIGHT = 10
+ROW_HEIGHT = 10          # minimum row height (a single-line row)
+LINE_HEIGHT = 5          # per wrapped description line
+SUMMARY_HEIGHT = 8       # subtotal / carried forward / brought forward rows
+MAX_DESCRIPTION_LINES = 20
+
+
+def _text_width(pdf, text):
+    """Width of `text` in the current font; core fonts are measured straight from their width table."""
+    widths = getattr(pdf.current_font, "cw", None)
+    if widths is not None:
+        try:
+            return sum(widths[c] for c in text) * pdf.font_size_pt * 0.001 / pdf.k
+        except KeyError:
+            pass
+    return pdf.get_string_width(text)
+
+
+def _wrap(pdf, text, width):
+    """Greedy word wrap to `width` (mm) in the current font; over-long words are split."""
+    text = " ".join(str(text).split())
+    if _text_width(pdf, text) <= width:
+        return [text]
+    lines, line = [], ""
+    for word in text.split(" "):
+        candidate = f"{line} {word}" if line else word
+        if _text_width(pdf, candidate) <= width:
+            line = candidate
+            continue
+        if line:
+            lines.append(line)
+        while _text_width(pdf, word) > width:
+            cut = len(word) - 1
+            while cut > 1 and _text_width(pdf, word[:cut]) > width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        line = word
+    if line:
+        lines.append(line)
+    if len(lines) > MAX_DESCRIPTION_LINES:
+        lines = lines[:MAX_DESCRIPTION_LINES]
+        lines[-1] = lines[-1][:-3] + "..."
+    return lines
+
+
+def _draw_row(pdf, lines, values, height):
+    """
+    Draws one bordered row with text() and rect(), which cost a fraction of cell()
+    per call. `lines` is the wrapped description, `values` the right-aligned columns.
+    """
+    x, y = pdf.l_margin, pdf.get_y()
+    desc_width = TABLE_COLUMNS[0][1]
+    # Baseline that vertically centres a single line in the row, as cell() does.
+    first_line = y + (height / 2 if len(lines) == 1 else 2 + LINE_HEIGHT / 2) + 0.3 * pdf.font_size
+    pdf.rect(x, y, desc_width, height)
+    for i, line in enumerate(lines):
+        pdf.text(x + pdf.c_margin, first_line + i * LINE_HEIGHT, line)
+    x += desc_width
+    for (_, width), value in zip(TABLE_COLUMNS[1:], values):
+        pdf.rect(x, y, width, height)
+        pdf.text(x + width - pdf.c_margin - _text_width(pdf, value), y + height / 2 + 0.3 * pdf.font_size, value)
+        x += width
+    pdf.set_xy(pdf.l_margin, y + height)
+
+
+def _table_header(pdf):
+    pdf.set_font('Helvetica', 'B', 11)
+    pdf.set_fill_color(224, 224, 224) # A light grey for the header
+    pdf.set_text_color(0) # Black text for the header
+    for i, (title, width) in enumerate(TABLE_COLUMNS):
+        pdf.cell(width, HEADER_HEIGHT, title, 1, 1 if i == len(TABLE_COLUMNS) - 1 else 0, 'L' if i == 0 else 'C', 1)
+    pdf.set_font('Helvetica', '', 10)
+
+
+def _summary_row(pdf, label, amount):
+    pdf.set_font('Helvetica', 'B', 10)
+    label_width = sum(width for _, width in TABLE_COLUMNS[:-1])
+    pdf.cell(label_width, SUMMARY_HEIGHT, label, 0, 0, 'R')
+    pdf.cell(TABLE_COLUMNS[-1][1], SUMMARY_HEIGHT, f"${amount:.2f}", 1, 1, 'R')
+    pdf.set_font('Helvetica', '', 10)
+
+
+def draw_line_item_table(pdf, line_items):
+    """Draws the table at the current position; returns (row count, sum of amounts)."""
+    auto_page_break, bottom_margin = pdf.auto_page_break, pdf.b_margin
+    pdf.set_auto_page_break(False)
+    desc_width = TABLE_COLUMNS[0][1]
+    text_width = desc_width - 2 * pdf.c_margin
+    # Room kept at the bottom of every page for the page subtotal and carried forward rows.
+    limit = pdf.h - bottom_margin - 2 * SUMMARY_HEIGHT
+    _table_header(pdf)
+    rows, total, page_total, pages = 0, 0.0, 0.0, 1
+
+    for item in line_items:
+        lines = _wrap(pdf, item['description'], text_width)
+        height = max(ROW_HEIGHT, len(lines) * LINE_HEIGHT + 4)
+        if pdf.get_y() + height > limit:
+            _summary_row(pdf, "Page subtotal:", page_total)
+            _summary_row(pdf, "Carried forward:", total)
+            pdf.add_page()
+            _table_header(pdf)
+            _summary_row(pdf, "Brought forward:", total)
+            page_total, pages = 0.0, pages + 1
+
+        # Improved, more flexible quantity formatting
+        qty_str = f"{item['quantity']:.2f}" if isinstance(item['quantity'], float) else str(int(item['quantity']))
+        amount = item.get('amount', 0) or 0
+        _draw_row(pdf, lines, (qty_str, f"${item.get('rate', 0):.2f}", f"${amount:.2f}"), height)
+        rows, total, page_total = rows + 1, total + amount, page_total + amount
+
+    if pages > 1:
+        _summary_row(pdf, "Page subtotal:", page_total)
+    pdf.set_auto_page_break(auto_page_break, margin=bottom_margin)
+    return rows, total
+
+
 def create_invoice_pdf(invoice_data, line_items, client_data, company_details):
     """
     Generates a professional invoice PDF using dynamically provided details.
+    `line_items` may be any iterable of item dicts; see draw_line_item_table().
     
     This is the primary function to be called from other parts of the application.
+    An identical invoice rendered before is served from the PDF cache (shared/pdf_cache.py).
     """
+    output_dir = os.path.join(os.getcwd(), 'data', 'invoices')
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Create a clean filename to prevent errors
+    safe_client_name = "".join(c for c in client_data.get('name', '') if c.isalnum() or c in (' ',)).rstrip()
+    file_name = f"{invoice_data.get('invoice_number', 'INV-000')}_{safe_client_name}.pdf".replace(' ', '_')
+    pdf_path = os.path.join(output_dir, file_name)
+
+    # Only materialized line items can be hashed; an iterator is rendered as it streams in.
+    key = cache_key(invoice_data, line_items, client_data, company_details) if isinstance(line_items, (list, tuple)) else None
+    if key and pdf_cache.fetch(key, pdf_path):
+        return pdf_path
     
     # 1. Initialize our custom PDF class with company details
     pdf = InvoicePDF(company_details)
@@ -59,26 +238,7 @@ def create_invoice_pdf(invoice_data, line_items, client_data, company_details):
     
     # 3. Line Items Table
     pdf.ln(15)
-    pdf.set_font('Helvetica', 'B', 11)
-    pdf.set_fill_color(224, 224, 224) # A light grey for the header
-    pdf.set_text_color(0) # Black text for the header
-    
-    pdf.cell(100, 10, 'DESCRIPTION', 1, 0, 'L', 1)
-    pdf.cell(30, 10, 'QUANTITY', 1, 0, 'C', 1)
-    pdf.cell(30, 10, 'RATE', 1, 0, 'C', 1)
-    pdf.cell(30, 10, 'AMOUNT', 1, 1, 'C', 1)
-
-    pdf.set_font('Helvetica', '', 10)
-    pdf.set_text_color(0)
-    
-    for item in line_items:
-        # Improved, more flexible quantity formatting
-        qty_str = f"{item['quantity']:.2f}" if isinstance(item['quantity'], float) else str(int(item['quantity']))
-        
-        pdf.cell(100, 10, item['description'], 1, 0, 'L')
-        pdf.cell(30, 10, qty_str, 1, 0, 'R')
-        pdf.cell(30, 10, f"${item.get('rate', 0):.2f}", 1, 0, 'R')
-        pdf.cell(30, 10, f"${item.get('amount', 0):.2f}", 1, 1, 'R')
+    draw_line_item_table(pdf, line_items)
         
     # 4. Totals Section
     pdf.ln(10)
@@ -87,18 +247,20 @@ def create_invoice_pdf(invoice_data, line_items, client_data, company_details):
     pdf.cell(60, 12, f"${invoice_data.get('total_amount', 0.0):.2f}", 1, 1, 'R')
     
     # 5. Save the PDF file
-    output_dir = os.path.join(os.getcwd(), 'data', 'invoices')
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Create a clean filename to prevent errors
-    safe_client_name = "".join(c for c in client_data.get('name', '') if c.isalnum() or c in (' ',)).rstrip()
-    file_name = f"{invoice_data.get('invoice_number', 'INV-000')}_{safe_client_name}.pdf".replace(' ', '_')
-    pdf_path = os.path.join(output_dir, file_name)
-    
+    # Written next to the target and renamed over it: the old file may be a hard link into the cache.
+    tmp_path = f"{pdf_path}.{os.getpid()}.tmp"
     try:
-        pdf.output(pdf_path)
+        pdf.output(tmp_path)
+        os.replace(tmp_path, pdf_path)
         print(f"✅ Invoice PDF created at: {pdf_path}")
-        return pdf_path
     except Exception as e:
         print(f"❌ Error while saving PDF: {e}")
-        return None
\ No newline at end of file
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+    try:
+        if key:
+            pdf_cache.store(key, pdf_path)
+    except OSError as e:
+        print(f"Warning: Could not add the PDF to the cache. Error: {e}")
+    return pdf_path
\ No newline at end of file
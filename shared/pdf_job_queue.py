@@ -0,0 +1,213 @@
+# shared/pdf_job_queue.py
+
+# --- Background PDF Rendering ---
+# Invoice PDFs are rendered on a worker thread so saving an invoice returns at once.
+# A job is just an invoice id: the worker reads the invoice as it is when the job
+# starts, renders it and stores the new pdf_path.
+#   - Submitting an invoice that is already queued is a no-op. Submitting one that is
+#     rendering now queues a single re-render, so the PDF ends up reflecting the latest data.
+#   - cancel() drops a queued job. A job that is already rendering runs to the end,
+#     but its result is discarded and pdf_path is left alone.
+#   - A failed job keeps its error until retry() (or retry_failed()) queues it again.
+#   - reset() drops everything; a restore calls it, since the ids refer to the old database.
+# PdfJobs holds the logic and reports events to a callback. PdfJobQueue turns those
+# events into Qt signals, which are delivered on the GUI thread.
+
+import threading
+import traceback
+from collections import OrderedDict
+from PySide6.QtCore import QObject, Signal
+
+from database.database_manager import get_all_settings, get_invoice_render_data, update_invoice_pdf_path
+from shared import backup_service
+
+
+def render_invoice_pdf(invoice_id):
+    """Renders a saved invoice; returns the PDF path (raises on failure)."""
+    data = get_invoice_render_data(invoice_id)
+    if data is None:
+        raise LookupError(f"Invoice {invoice_id} no longer exists")
+    from shared.pdf_generator import create_invoice_pdf  # fpdf is only loaded once a PDF is needed
+    pdf_path = create_invoice_pdf(data["invoice_data"], data["line_items"], data["client_data"], get_all_settings())
+    if not pdf_path:
+        raise RuntimeError("The PDF could not be saved")
+    return pdf_path
+
+
+class PdfJobs:
+    """
+    A FIFO of invoice ids rendered one at a time by a daemon worker thread.
+    on_event(name, *args) is called from the worker thread with:
+      queued(id), started(id), finished(id, pdf_path), failed(id, error),
+      cancelled(id), progress(done, total)   (done/total count jobs since the queue was last idle)
+    """
+
+    def __init__(self, render=render_invoice_pdf, record=update_invoice_pdf_path, on_event=None):
+        self.render = render
+        self.record = record
+        self.on_event = on_event
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # invoice id -> None, in submission order
+        self._running = None
+        self._rerun = False            # re-render the running invoice once it finishes
+        self._cancelled = False        # discard the running invoice's result
+        self.failures = {}             # invoice id -> last error
+        self._done = 0
+        self._total = 0
+        self._thread = None
+
+    def _emit(self, name, *args):
+        if self.on_event is not None:
+            try:
+                self.on_event(name, *args)
+            except Exception:
+                traceback.print_exc()
+
+    def submit(self, invoice_id):
+        """Queues the invoice unless it is already queued; returns True if a new job was added."""
+        with self._cond:
+            self.failures.pop(invoice_id, None)
+            if invoice_id in self._pending:
+                return False
+            if invoice_id == self._running:
+                if self._rerun and not self._cancelled:
+                    return False
+                if self._cancelled:
+                    self._total += 1  # cancel() took it out of the count
+                # The re-render is the same job as the running one: it is counted done once, after the re-render.
+                self._rerun, self._cancelled = True, False
+            else:
+                self._pending[invoice_id] = None
+                self._total += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name="pdf-jobs", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        self._emit("queued", invoice_id)
+        return True
+
+    def cancel(self, invoice_id):
+        """Drops the invoice's job; returns True if there was one."""
+        with self._cond:
+            if invoice_id in self._pending:
+                del self._pending[invoice_id]
+                self._total -= 1
+            elif invoice_id == self._running and not self._cancelled:
+                self._cancelled, self._rerun = True, False
+                self._total -= 1
+            else:
+                return False
+        self._emit("cancelled", invoice_id)
+        return True
+
+    def reset(self):
+        """Drops every queued job, discards the running one's result and forgets failures (e.g. after a restore)."""
+        with self._cond:
+            dropped = list(self._pending)
+            self._pending.clear()
+            if self._running is not None and not self._cancelled:
+                self._cancelled, self._rerun = True, False
+                dropped.insert(0, self._running)
+            self.failures.clear()
+            self._done = self._total = 0
+            self._cond.notify_all()
+        for invoice_id in dropped:
+            self._emit("cancelled", invoice_id)
+
+    def retry(self, invoice_id):
+        return self.submit(invoice_id)
+
+    def retry_failed(self):
+        for invoice_id in list(self.failures):
+            self.submit(invoice_id)
+
+    def pending_ids(self):
+        with self._cond:
+            return ([self._running] if self._running is not None else []) + list(self._pending)
+
+    def is_idle(self):
+        with self._cond:
+            return self._running is None and not self._pending
+
+    def wait_for_done(self, timeout=None):
+        """Blocks until the queue is empty (used by headless tools); returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._running is None and not self._pending, timeout)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                if not self._pending:
+                    self._done = self._total = 0
+                    self._cond.notify_all()
+                    self._thread = None
+                    return
+                invoice_id, _ = self._pending.popitem(last=False)
+                self._running, self._rerun, self._cancelled = invoice_id, False, False
+            self._emit("started", invoice_id)
+            pdf_path, error = None, None
+            try:
+                pdf_path = self.render(invoice_id)
+            except Exception as e:
+                traceback.print_exc()
+                error = str(e) or type(e).__name__
+            with self._cond:
+                cancelled, rerun = self._cancelled, self._rerun
+            if not cancelled and pdf_path and not rerun:
+                try:
+                    self.record(invoice_id, pdf_path)
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+            with self._cond:
+                self._running = None
+                if rerun:
+                    # Rendered from data that changed meanwhile: render it again.
+                    self._pending[invoice_id] = None
+                    self._pending.move_to_end(invoice_id, last=False)
+                elif not cancelled:
+                    self._done += 1
+                    if error:
+                        self.failures[invoice_id] = error
+                done, total = self._done, self._total
+            if rerun or cancelled:
+                continue
+            if error:
+                self._emit("failed", invoice_id, error)
+            else:
+                self._emit("finished", invoice_id, pdf_path)
+            self._emit("progress", done, total)
+
+
+class PdfJobQueue(QObject):
+    """Qt front end of PdfJobs; the signals arrive on the GUI thread."""
+    queued = Signal(int)
+    started = Signal(int)
+    finished = Signal(int, str)   # invoice id, pdf path
+    failed = Signal(int, str)     # invoice id, error message
+    cancelled = Signal(int)
+    progress = Signal(int, int)   # done, total
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = PdfJobs(on_event=lambda name, *args: getattr(self, name).emit(*args))
+        # Queued invoice ids refer to the database that was replaced.
+        backup_service.add_restore_listener(self.jobs.reset)
+
+    def submit(self, invoice_id): return self.jobs.submit(invoice_id)
+    def cancel(self, invoice_id): return self.jobs.cancel(invoice_id)
+    def retry(self, invoice_id): return self.jobs.retry(invoice_id)
+    def retry_failed(self): self.jobs.retry_failed()
+    def reset(self): self.jobs.reset()
+    def pending_ids(self): return self.jobs.pending_ids()
+    def is_idle(self): return self.jobs.is_idle()
+    def wait_for_done(self, timeout=None): return self.jobs.wait_for_done(timeout)
+
+
+_queue = None
+
+def get_pdf_job_queue():
+    """Returns the application-wide PdfJobQueue (created on first use, after QApplication)."""
+    global _queue
+    if _queue is None:
+        _queue = PdfJobQueue()
+    return _queue
@@ -0,0 +1,138 @@
+# shared/query_executor.py
+
+import itertools
+import traceback
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+# Worker threads keep their pooled database connection (see connection_manager.py),
+# so the pool is small and its threads never expire.
+MAX_QUERY_THREADS = 4
+
+
+class _TaskSignals(QObject):
+    """Carries a task's outcome from the worker thread back to the GUI thread."""
+    finished = Signal(int, object)  # request_id, result
+    failed = Signal(int, str)       # request_id, error message
+
+
+class _QueryTask(QRunnable):
+    def __init__(self, executor, request_id, fn, args, kwargs):
+        super().__init__()
+        self.executor = executor
+        self.request_id = request_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = _TaskSignals()
+
+    def run(self):
+        # Skip the work entirely if a newer request superseded this one while it was queued.
+        if self.executor.is_cancelled(self.request_id):
+            self.signals.finished.emit(self.request_id, None)
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(self.request_id, str(e))
+        else:
+            self.signals.finished.emit(self.request_id, result)
+
+
+class QueryExecutor(QObject):
+    """
+    Runs database calls on a background thread pool and delivers the results
+    to callbacks on the GUI thread.
+
+    Requests submitted with the same `key` supersede each other: only the
+    result of the most recent one is delivered, older ones are skipped if they
+    have not started yet and their results are dropped otherwise.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(MAX_QUERY_THREADS)
+        self.pool.setExpiryTimeout(-1)
+        self._ids = itertools.count(1)
+        self._pending = {}   # request_id -> (task, key, on_result, on_error)
+        self._latest = {}    # key -> most recent request_id
+        self._cancelled = set()
+
+    def submit(self, fn, *args, key=None, on_result=None, on_error=None, **kwargs):
+        """
+        Schedules fn(*args, **kwargs) on a worker thread and returns a request id.
+        on_result(result) or on_error(message) is called on the GUI thread.
+        """
+        request_id = next(self._ids)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None and previous in self._pending:
+                self._cancelled.add(previous)
+            self._latest[key] = request_id
+
+        task = _QueryTask(self, request_id, fn, args, kwargs)
+        task.setAutoDelete(False)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        self._pending[request_id] = (task, key, on_result, on_error)
+        self.pool.start(task)
+        return request_id
+
+    def cancel(self, key):
+        """Cancels the outstanding request for `key`, if any; its result is dropped."""
+        request_id = self._latest.pop(key, None)
+        if request_id is not None and request_id in self._pending:
+            self._cancelled.add(request_id)
+
+    def is_cancelled(self, request_id):
+        return request_id in self._cancelled
+
+    def is_idle(self):
+        """True when no submitted request is waiting for its callback."""
+        return not self._pending
+
+    def wait_for_done(self, msecs=-1):
+        """Blocks until all queued work has finished (used by headless tools)."""
+        return self.pool.waitForDone(msecs)
+
+    def _take(self, request_id):
+        entry = self._pending.pop(request_id, None)
+        cancelled = request_id in self._cancelled
+        self._cancelled.discard(request_id)
+        if entry is None:
+            return None, True
+        task, key, on_result, on_error = entry
+        if key is not None and self._latest.get(key) == request_id:
+            del self._latest[key]
+        return (on_result, on_error), cancelled
+
+    @Slot(int, object)
+    def _on_finished(self, request_id, result):
+        callbacks, cancelled = self._take(request_id)
+        if cancelled or callbacks is None:
+            return
+        on_result, _ = callbacks
+        if on_result is not None:
+            on_result(result)
+
+    @Slot(int, str)
+    def _on_failed(self, request_id, message):
+        callbacks, cancelled = self._take(request_id)
+        if cancelled or callbacks is None:
+            return
+        _, on_error = callbacks
+        if on_error is not None:
+            on_error(message)
+        else:
+            print(f"Error in background query: {message}")
+
+
+_executor = None
+
+def get_query_executor():
+    """Returns the application-wide QueryExecutor (created on first use, after QApplication)."""
+    global _executor
+    if _executor is None:
+        _executor = QueryExecutor()
+    return _executor
@@ -0,0 +1,128 @@
+# shared/startup_timeline.py
+
+# --- Startup Timeline ---
+# Set FREELANCER_HUB_STARTUP_TIMELINE=1 to print how long each startup stage and
+# each imported module took. main.py imports this module first and calls enable();
+# stages are recorded with mark("...") and the report is printed once the
+# dashboard has painted. Import times are measured by a sys.meta_path finder that
+# times each module's loader; "self" excludes the time spent importing its own imports.
+# When the variable is unset enable() does nothing and mark() is a no-op.
+
+import importlib.abc
+import os
+import sys
+import time
+
+TIMELINE_ENV = "FREELANCER_HUB_STARTUP_TIMELINE"
+
+# Imports below this many milliseconds (self time) are left out of the report.
+MIN_IMPORT_MS = 1.0
+
+_origin = time.perf_counter()
+_enabled = False
+_stages = []    # (name, ms since start)
+_imports = {}   # module name -> [inclusive seconds, self seconds]
+_stack = []     # child time accumulated for each module currently executing
+
+
+def is_enabled():
+    return _enabled
+
+
+def mark(stage):
+    """Records that `stage` finished now."""
+    if _enabled:
+        _stages.append((stage, (time.perf_counter() - _origin) * 1000.0))
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a module's real loader for the duration of its first import."""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        # Extension modules do most of their work here.
+        return self._timed(spec.name, lambda: self._loader.create_module(spec))
+
+    def exec_module(self, module):
+        spec = module.__spec__
+        try:
+            self._timed(spec.name, lambda: self._loader.exec_module(module))
+        finally:
+            # Hand the module its real loader back so nothing else ever sees the wrapper.
+            spec.loader = self._loader
+            if getattr(module, "__loader__", None) is self:
+                module.__loader__ = self._loader
+
+    def _timed(self, name, call):
+        _stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return call()
+        finally:
+            inclusive = time.perf_counter() - started
+            children = _stack.pop()
+            if _stack:
+                _stack[-1] += inclusive
+            entry = _imports.setdefault(name, [0.0, 0.0])
+            entry[0] += inclusive
+            entry[1] += inclusive - children
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """Asks the other finders for the spec, then swaps in a timing loader."""
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+def enable(force=False):
+    """Starts recording if the environment flag (or `force`) asks for it."""
+    global _enabled
+    if _enabled or not (force or os.environ.get(TIMELINE_ENV, "").strip() not in ("", "0")):
+        return
+    _enabled = True
+    sys.meta_path.insert(0, _TimingFinder())
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    sys.meta_path[:] = [f for f in sys.meta_path if not isinstance(f, _TimingFinder)]
+
+
+def report(top=25):
+    """Returns the timeline as printable text."""
+    lines = ["Startup timeline (ms since the timeline module was imported):"]
+    previous = 0.0
+    for stage, at in _stages:
+        lines.append(f"  {at:9.1f}  (+{at - previous:8.1f})  {stage}")
+        previous = at
+    slowest = sorted(_imports.items(), key=lambda item: item[1][1], reverse=True)
+    shown = [(name, t) for name, t in slowest if t[1] * 1000.0 >= MIN_IMPORT_MS][:top]
+    total_self = sum(t[1] for t in _imports.values()) * 1000.0
+    lines.append(f"Imports: {len(_imports)} modules, {total_self:.1f} ms in total. Slowest by self time:")
+    lines.append(f"  {'self':>9}  {'inclusive':>9}  module")
+    for name, (inclusive, own) in shown:
+        lines.append(f"  {own * 1000.0:9.1f}  {inclusive * 1000.0:9.1f}  {name}")
+    return "\n".join(lines)
+
+
+def print_report(top=25):
+    """Prints the report (once) and stops timing imports."""
+    if not _enabled:
+        return
+    print(report(top))
+    disable()
@@ -0,0 +1,10 @@
+# tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+# Point the app at a scratch database before anything imports database_manager.
+os.environ.setdefault("FREELANCER_HUB_DB", os.path.join(tempfile.mkdtemp(prefix="freelancer_hub_tests_"), "test.db"))
+os.environ.setdefault("FREELANCER_HUB_PDF_CACHE", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,32 @@
+# tests/test_analytics.py
+
+import random
+
+import pytest
+
+from database import database_manager as db
+from database.reference_cache import reference_cache
+
+
+def test_hours_and_billable_value_match_sql_sums():
+    db.initialize_database()
+    db.add_client("Analytics Client", "analytics@example.com", "3 Main St")
+    client_id = max(client["id"] for client in db.get_all_clients())
+    for name, rate in (("Analytics Alpha", 87.5), ("Analytics Beta", 133.33)):
+        db.add_project(name, client_id, rate)
+    project_ids = [p["id"] for p in db.get_all_projects_with_client_name() if p["client_id"] == client_id]
+
+    rng = random.Random(7)
+    rows = [(rng.choice(project_ids), f"2026-05-{rng.randint(1, 31):02d}T09:00:00", rng.randint(1, 600)) for _ in range(50_000)]
+    conn = db.get_db_connection()
+    conn.executemany("INSERT INTO time_entries (project_id, start_time, end_time, duration_minutes) VALUES (?, ?, ?, ?)",
+                     [(project, start, start, minutes) for project, start, minutes in rows])
+    conn.commit()
+    hours, billable = conn.execute("""SELECT SUM(t.duration_minutes / 60.0), SUM(t.duration_minutes / 60.0 * p.rate)
+        FROM time_entries t JOIN projects p ON p.id = t.project_id WHERE p.client_id = ?""", (client_id,)).fetchone()
+    conn.close()
+    reference_cache.invalidate_all()  # the rows were inserted behind the cache's back
+
+    series = db.get_time_series("2026-05-01", "2026-05-31", "month", client_id=client_id)
+    assert series["hours"].sum() == pytest.approx(hours, rel=1e-12)
+    assert series["billable_value"].sum() == pytest.approx(billable, rel=1e-12)
@@ -0,0 +1,82 @@
+# tests/test_connection_manager.py
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from database import database_manager as db
+from database.connection_manager import ConnectionManager
+
+
+def _manager(tmp_path):
+    manager = ConnectionManager(str(tmp_path / "pool.db"))
+    conn = manager.connection()
+    conn.execute("CREATE TABLE numbers (n INTEGER)")
+    conn.executemany("INSERT INTO numbers VALUES (?)", [(n,) for n in range(100)])
+    conn.commit()
+    conn.close()
+    return manager
+
+
+def test_close_all_lets_a_query_in_flight_finish(tmp_path):
+    manager = _manager(tmp_path)
+    conn = manager.connection()
+    cursor = conn.execute("SELECT n FROM numbers")
+    first = cursor.fetchmany(10)
+    manager.close_all()
+    assert len(first) + len(cursor.fetchall()) == 100
+    conn.close()
+    # Released after close_all(), so it is really closed and the thread gets a new one.
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    fresh = manager.connection()
+    assert fresh is not conn
+    fresh.close()
+
+
+def test_exclusive_waits_for_other_threads_to_release_their_connections(tmp_path):
+    manager = _manager(tmp_path)
+    fetched, release, rows = threading.Event(), threading.Event(), []
+
+    def reader():
+        conn = manager.connection()
+        cursor = conn.execute("SELECT n FROM numbers")
+        rows.extend(cursor.fetchmany(10))
+        fetched.set()
+        release.wait()
+        rows.extend(cursor.fetchall())
+        conn.close()
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    fetched.wait()
+    threading.Timer(0.2, release.set).start()
+    with manager.exclusive():
+        assert len(rows) == 100
+    thread.join()
+
+
+def test_a_failing_write_releases_the_connection():
+    db.initialize_database()
+    with pytest.raises(sqlite3.IntegrityError):
+        db.add_project("Orphan Project", 10**9, 10.0)  # no such client
+    conn = db.connection_manager._local.conn
+    assert conn.users == 0 and not conn.in_transaction
+
+    errors = []
+    def writer():
+        try:
+            db.add_client("Other Thread Client", "other@example.com", "5 Main St")
+        except sqlite3.Error as e:
+            errors.append(e)
+    thread = threading.Thread(target=writer)
+    thread.start()
+    thread.join()
+    assert not errors
+    # Nothing is left in use, so exclusive() does not wait for a connection that will never be released.
+    started = time.monotonic()
+    with db.connection_manager.exclusive(timeout=2):
+        pass
+    assert time.monotonic() - started < 1
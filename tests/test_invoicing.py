@@ -0,0 +1,36 @@
+# tests/test_invoicing.py
+
+from datetime import datetime
+
+import pytest
+
+from database import database_manager as db
+from database.invoicing import EntriesAlreadyBilled
+
+
+def _unbilled_entry_ids(project_id):
+    return [entry["id"] for entry in db.get_unbilled_time_for_project(project_id)]
+
+
+def test_entries_cannot_be_billed_twice():
+    db.initialize_database()
+    db.add_client("Billing Client", "billing@example.com", "2 Main St")
+    client_id = max(client["id"] for client in db.get_all_clients())
+    db.add_project("Billing Project", client_id, 80.0)
+    project_id = max(project["id"] for project in db.get_all_projects_with_client_name())
+    entry_id = db.start_time_entry(project_id, datetime(2026, 3, 2, 9))
+    db.stop_time_entry(entry_id, datetime(2026, 3, 2, 11), 120, "Work")
+
+    # Two invoices built from the same unbilled entries, as a billing run and the dialog could.
+    entry_ids = _unbilled_entry_ids(project_id)
+    invoice = {"client_id": client_id, "issue_date": "2026-03-31", "due_date": "2026-04-30", "total_amount": 160.0}
+    items = [{"description": "Work", "quantity": 2.0, "rate": 80.0, "amount": 160.0}]
+    first_id = db.create_invoice_from_time_entries(dict(invoice), items, entry_ids)
+    next_number = db.get_next_invoice_number("2026-03-31")
+    with pytest.raises(EntriesAlreadyBilled):
+        db.create_invoice_from_time_entries(dict(invoice), items, entry_ids)
+
+    # The entry stays on the first invoice and the second one's number is released.
+    assert db.get_invoices_for_project(project_id)[0]["id"] == first_id
+    assert len(db.get_invoices_for_project(project_id)) == 1
+    assert db.get_next_invoice_number("2026-03-31") == next_number
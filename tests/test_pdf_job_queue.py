@@ -0,0 +1,29 @@
+# tests/test_pdf_job_queue.py
+
+import threading
+
+import pytest
+
+pytest.importorskip("PySide6")
+from shared.pdf_job_queue import PdfJobs
+
+
+def test_resubmitting_a_cancelled_running_job_counts_it_again():
+    started, release, events = threading.Event(), threading.Event(), []
+
+    def render(invoice_id):
+        started.set()
+        release.wait()
+        return f"/tmp/invoice_{invoice_id}.pdf"
+
+    jobs = PdfJobs(render=render, record=lambda invoice_id, pdf_path: None, on_event=lambda name, *args: events.append((name, args)))
+    jobs.submit(1)
+    assert started.wait(5)
+    assert jobs.cancel(1)
+    assert jobs.submit(1)  # while the cancelled render is still running
+    release.set()
+    assert jobs.wait_for_done(5)
+
+    progress = [args for name, args in events if name == "progress"]
+    assert progress == [(1, 1)]
+    assert ("finished", (1, "/tmp/invoice_1.pdf")) in events
@@ -0,0 +1,29 @@
+# tests/test_restore.py
+
+import sqlite3
+
+from controllers.project_controller import ProjectController
+from database import database_manager as db
+from shared import backup_service
+
+
+def test_restore_replaces_cached_project_dashboards(tmp_path):
+    db.initialize_database()
+    db.add_client("Restore Client", "restore@example.com", "1 Main St")
+    client_id = max(client["id"] for client in db.get_all_clients())
+    db.add_project("Original Project", client_id, 50.0)
+    project_id = max(project["id"] for project in db.get_all_projects_with_client_name())
+    controller = ProjectController()
+    assert controller.get_project_dashboard_data(project_id)["details"]["name"] == "Original Project"
+
+    # A different database whose revision for the project matches: neither has a revision row (revision 0).
+    backup = str(tmp_path / "other.db")
+    backup_service.backup_database(backup)
+    conn = sqlite3.connect(backup)
+    conn.execute("UPDATE projects SET name = 'Restored Project' WHERE id = ?", (project_id,))
+    conn.execute("DELETE FROM project_revisions WHERE project_id = ?", (project_id,))
+    conn.commit()
+    conn.close()
+
+    backup_service.restore_database(backup)
+    assert controller.get_project_dashboard_data(project_id)["details"]["name"] == "Restored Project"
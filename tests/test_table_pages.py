@@ -0,0 +1,36 @@
+# tests/test_table_pages.py
+
+from datetime import datetime
+
+from database import database_manager as db
+
+
+def test_page_through_reaches_the_row_in_every_order():
+    db.initialize_database()
+    for n in range(30):
+        db.add_client(f"Paging Client {n % 7}", f"paging{n}@example.com", None if n % 3 else f"{n} High St")
+    ids = [client["id"] for client in db.get_all_clients() if client["name"].startswith("Paging Client")]
+
+    for sort_key, descending in (("name", False), ("name", True), ("address", False), ("id", True)):
+        everything = db.get_table_page("clients", sort_key, descending, limit=10_000)
+        order = [row[0] for row in everything]
+        for row_id in ids[::5]:
+            position = db.get_table_row_position("clients", row_id, sort_key, descending)
+            assert order[position] == row_id
+            # Ten rows are loaded already; the next page runs through the row plus `limit` more.
+            loaded = everything[:10]
+            page = db.get_table_page_through("clients", row_id, sort_key, descending, 5, (loaded[-1][-1], loaded[-1][0]), len(loaded))
+            assert [row[0] for row in loaded + page] == order[:max(position + 1, 10) + 5]
+
+    assert db.get_table_row_position("clients", max(ids) + 1000) is None
+
+
+def test_search_result_parent():
+    db.initialize_database()
+    db.add_client("Parent Client", "parent@example.com", "4 Main St")
+    client_id = max(client["id"] for client in db.get_all_clients())
+    db.add_project("Parent Project", client_id, 50.0)
+    project_id = max(project["id"] for project in db.get_all_projects_with_client_name())
+    entry_id = db.start_time_entry(project_id, datetime(2026, 6, 1, 9))
+    assert db.get_search_result_parent("time_entry", entry_id) == project_id
+    assert db.get_search_result_parent("invoice_item", 10**9) is None
@@ -1,22 +1,31 @@
 # ui/main_window.py
 
-from PySide6.QtWidgets import QMainWindow, QHBoxLayout, QVBoxLayout, QWidget, QStackedWidget, QStyle
-from PySide6.QtCore import QSize
-from PySide6.QtGui import QIcon
+import importlib
+from PySide6.QtWidgets import QMainWindow, QHBoxLayout, QVBoxLayout, QWidget, QStackedWidget, QStyle, QLineEdit
+from PySide6.QtCore import QSize, Signal
+from PySide6.QtGui import QIcon, QKeySequence, QShortcut
 
 # Import Sidebar
 from .widgets.sidebar import Sidebar
+from shared import startup_timeline
+from shared import backup_service
 
-# Import all final views
-from .views.dashboard_view import DashboardView
-from .views.project_hub_view import ProjectHubView
-from .views.time_tracking_view import TimeTrackingView
-from .views.invoice_view import InvoiceView
-from .views.expense_view import ExpenseView
-from .views.client_view import ClientView
-from .views.settings_view import SettingsView
+# Views in sidebar order: (module, class). Each one is imported and built the first
+# time its page is opened, so startup only pays for the dashboard.
+VIEWS = [
+    ("ui.views.dashboard_view", "DashboardView"),         # Index 0
+    ("ui.views.project_hub_view", "ProjectHubView"),      # Index 1
+    ("ui.views.time_tracking_view", "TimeTrackingView"),  # Index 2
+    ("ui.views.invoice_view", "InvoiceView"),             # Index 3
+    ("ui.views.expense_view", "ExpenseView"),             # Index 4
+    ("ui.views.client_view", "ClientView"),               # Index 5
+    ("ui.views.settings_view", "SettingsView"),           # Index 6
+]
 
 class MainWindow(QMainWindow):
+    # Emitted after a restore replaced the database (from the restoring thread; delivered on the GUI thread).
+    database_replaced = Signal()
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Freelancer's Business Hub - Professional Edition")
@@ -39,42 +48,113 @@ class MainWindow(QMainWindow):
         self.sidebar = Sidebar()
         self.main_layout.addWidget(self.sidebar)
 
-        # --- 2. Main Content Area (Stacked) ---
+        # --- 2. Main Content Area: global search bar above the stacked pages ---
+        content_column = QVBoxLayout()
+        content_column.setContentsMargins(0, 0, 0, 0)
+        content_column.setSpacing(0)
+        search_bar = QHBoxLayout()
+        search_bar.setContentsMargins(20, 12, 20, 0)
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search everything... (Ctrl+F)")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setMaximumWidth(420)
+        self.search_box.returnPressed.connect(self.open_search)
+        search_bar.addStretch(1)
+        search_bar.addWidget(self.search_box)
+        content_column.addLayout(search_bar)
+
         self.content_stack = QStackedWidget()
         self.content_stack.setObjectName("ContentContainer") # For optional styling
-        self.main_layout.addWidget(self.content_stack)
-
-        # --- Instantiate Views ---
-        self.dashboard_tab = DashboardView()
-        self.project_hub_tab = ProjectHubView()
-        self.time_tracking_tab = TimeTrackingView()
-        self.invoice_tab = InvoiceView()
-        self.expense_tab = ExpenseView()
-        self.client_tab = ClientView()
-        self.settings_tab = SettingsView()
-
-        # Add views to stack (Order matches sidebar index)
-        self.content_stack.addWidget(self.dashboard_tab)      # Index 0
-        self.content_stack.addWidget(self.project_hub_tab)    # Index 1
-        self.content_stack.addWidget(self.time_tracking_tab)  # Index 2
-        self.content_stack.addWidget(self.invoice_tab)        # Index 3
-        self.content_stack.addWidget(self.expense_tab)        # Index 4
-        self.content_stack.addWidget(self.client_tab)         # Index 5
-        self.content_stack.addWidget(self.settings_tab)       # Index 6
+        content_column.addWidget(self.content_stack)
+        self.main_layout.addLayout(content_column)
+        QShortcut(QKeySequence.Find, self, activated=lambda: (self.search_box.setFocus(), self.search_box.selectAll()))
+        QShortcut(QKeySequence("Ctrl+K"), self, activated=self.open_palette)
+
+        # --- Views: an empty placeholder per page until it is first opened ---
+        self.views = [None] * len(VIEWS)
+        for _ in VIEWS:
+            self.content_stack.addWidget(QWidget())
 
         # --- Connect Signals ---
         self.sidebar.page_changed.connect(self.switch_page)
+        self.database_replaced.connect(self.reload_views)
+        backup_service.add_restore_listener(self.database_replaced.emit)
 
         # Initial Load
         self.switch_page(0)
 
+    def view(self, index):
+        """Returns the view for page `index`, importing and building it on first use."""
+        if self.views[index] is None:
+            module_name, class_name = VIEWS[index]
+            view_class = getattr(importlib.import_module(module_name), class_name)
+            view = view_class()
+            placeholder = self.content_stack.widget(index)
+            self.content_stack.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.content_stack.insertWidget(index, view)
+            self.views[index] = view
+            startup_timeline.mark(f"{class_name} created")
+        return self.views[index]
+
+    def open_search(self):
+        from ui.widgets.global_search import SearchDialog  # only loaded once somebody searches
+        dialog = SearchDialog(self.search_box.text().strip(), self)
+        dialog.result_activated.connect(self.open_search_result)
+        dialog.exec()
+
+    def open_search_result(self, kind, record_id):
+        """Switches to the page that lists records of `kind` and selects the record there."""
+        from ui.widgets.global_search import RESULT_PAGES
+        self.open_record(RESULT_PAGES[kind], kind, record_id)
+
+    def open_palette(self):
+        from ui.widgets.command_palette import CommandPalette  # only loaded once somebody uses it
+        palette = CommandPalette([button.text() for button in self.sidebar.buttons], self)
+        palette.entry_activated.connect(self.open_palette_entry)
+        palette.move(self.geometry().center().x() - palette.minimumWidth() // 2, self.geometry().top() + 80)
+        palette.exec()
+
+    def open_palette_entry(self, kind, entity_id):
+        """Switches to the chosen page, or to the page that lists the chosen entity and selects it."""
+        from ui.widgets.command_palette import ENTITY_PAGES
+        if kind == "page":
+            self.sidebar.set_active_index(entity_id)
+            self.switch_page(entity_id)
+        else:
+            self.open_record(ENTITY_PAGES[kind], kind, entity_id)
+
+    def open_record(self, index, kind, record_id):
+        """Switches to page `index` and has its view select the record (see the views' select_record)."""
+        self.sidebar.set_active_index(index)
+        self.switch_page(index)
+        view = self.views[index]
+        if view is not None and hasattr(view, 'select_record'):
+            view.select_record(kind, record_id)
+
+    def reload_views(self):
+        """Refreshes every view built so far, e.g. after a restore swapped in another database."""
+        for index, view in enumerate(self.views):
+            if view is not None and hasattr(view, 'refresh_data'):
+                try:
+                    view.refresh_data()
+                except Exception as e:
+                    print(f"Error refreshing page {index}: {e}")
+
+    def view_name(self, index):
+        return VIEWS[index][1]
+
     def switch_page(self, index):
-        """Switches the stacked widget page and refreshes data."""
+        """Switches the stacked widget page (building the view if needed) and refreshes data."""
+        try:
+            current_widget = self.view(index)
+        except Exception as e:
+            print(f"Error creating page {index}: {e}")
+            return
         self.content_stack.setCurrentIndex(index)
         
-        current_widget = self.content_stack.widget(index)
         if hasattr(current_widget, 'refresh_data'):
             try:
                 current_widget.refresh_data()
             except Exception as e:
-                print(f"Error refreshing page {index}: {e}")
\ No newline at end of file
+                print(f"Error refreshing page {index}: {e}")
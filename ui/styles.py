@@ -58,7 +58,7 @@ QWidget {
 
 /* --- GLASSMORPHISM CONTAINERS --- */
 /* Used for Dashboards, Cards, Tables */
-#ChartFrame, #KPICard, QTableWidget, QHeaderView::section, QLineEdit, QComboBox, QDoubleSpinBox, QTextEdit, QDateEdit, #ContentContainer, #GlassFrame {
+#ChartFrame, #KPICard, QTableWidget, QTableView, QHeaderView::section, QLineEdit, QComboBox, QDoubleSpinBox, QTextEdit, QDateEdit, #ContentContainer, #GlassFrame {
     background-color: rgba(30, 30, 46, 0.70); /* Glassy Dark */
     border: 1px solid rgba(255, 255, 255, 0.08);
     border-radius: 12px;
@@ -84,6 +84,7 @@ QSplitter::handle {
 #KPIValue { background-color: transparent; font-size: 32px; font-weight: bold; color: #a6e3a1; } /* Green */
 #KPILabel { background-color: transparent; font-size: 13px; color: #bac2de; }
 #KPITitle { background-color: transparent; font-size: 14px; font-weight: bold; color: #89b4fa; }
+#LoadingIndicator { background-color: transparent; font-size: 13px; font-style: italic; color: #f9e2af; } /* Yellow */
 
 /* --- KANBAN BOARD --- */
 #KanbanColumn {
@@ -165,7 +166,7 @@ QLineEdit:focus, QComboBox:focus, QDoubleSpinBox:focus, QTextEdit:focus, QDateEd
 }
 
 /* --- TABLES --- */
-QTableWidget { 
+QTableWidget, QTableView { 
     gridline-color: rgba(255, 255, 255, 0.05); 
     selection-background-color: rgba(137, 180, 250, 0.3); /* Selection Highlight */
 }
@@ -1,12 +1,13 @@
 # ui/views/client_view.py
 
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
                                QPushButton, QDialog, QFormLayout, QLineEdit,
-                               QMessageBox, QHeaderView, QDialogButtonBox, QLabel, QStyle)
-from PySide6.QtCore import Qt
+                               QMessageBox, QDialogButtonBox, QLabel, QStyle)
 from PySide6.QtGui import QIcon
 # Import the new delete function
-from database.database_manager import add_client, get_all_clients, delete_client
+from database.database_manager import add_client, delete_client
+from ui.widgets.loading_indicator import LoadingIndicator
+from ui.widgets.sql_table_model import SqlTableModel, configure_table_view, select_row_id, selected_row_id
 
 class ClientDialog(QDialog):
     # This class is unchanged from your provided code.
@@ -23,11 +24,14 @@ class ClientView(QWidget):
     def __init__(self):
         super().__init__()
         self.layout = QVBoxLayout(self); self.layout.setContentsMargins(20, 20, 20, 20); self.layout.setSpacing(15)
-        header = QLabel("Client Management"); header.setObjectName("HeaderLabel"); self.layout.addWidget(header)
+        header_layout = QHBoxLayout(); header = QLabel("Client Management"); header.setObjectName("HeaderLabel")
+        self.loading_indicator = LoadingIndicator()
+        header_layout.addWidget(header); header_layout.addStretch(1); header_layout.addWidget(self.loading_indicator); self.layout.addLayout(header_layout)
         
-        self.clients_table = QTableWidget(); self.clients_table.setColumnCount(3)
-        self.clients_table.setHorizontalHeaderLabels(["Client Name", "Email Address", "Mailing Address"]); self.clients_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.clients_table.setSelectionBehavior(QTableWidget.SelectRows); self.clients_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        # The model keeps each row's database ID under Qt.UserRole for the delete flow.
+        self.clients_model = SqlTableModel("clients", [("Client Name", "name", None), ("Email Address", "email", None), ("Mailing Address", "address", None)])
+        self.clients_model.bind_loading_indicator(self.loading_indicator)
+        self.clients_table = QTableView(); configure_table_view(self.clients_table, self.clients_model)
         self.layout.addWidget(self.clients_table)
 
         # --- NEW: Button Layout ---
@@ -48,19 +52,11 @@ class ClientView(QWidget):
         self.layout.addLayout(button_layout)
 
     def refresh_data(self):
-        """Refreshes the client list and crucially stores the ID in each row."""
-        clients = get_all_clients()
-        self.clients_table.setRowCount(len(clients))
-        for row, client in enumerate(clients):
-            # --- CRITICAL CHANGE ---
-            # Store the database ID in the item's data role. This is invisible to the user
-            # but allows us to retrieve the ID when a row is selected.
-            name_item = QTableWidgetItem(client.get("name"))
-            name_item.setData(Qt.UserRole, client.get("id"))
-            
-            self.clients_table.setItem(row, 0, name_item)
-            self.clients_table.setItem(row, 1, QTableWidgetItem(client.get("email")))
-            self.clients_table.setItem(row, 2, QTableWidgetItem(client.get("address")))
+        """Reloads the client list; rows are fetched page by page as the table scrolls."""
+        self.clients_model.reload()
+
+    def select_record(self, kind, record_id):
+        select_row_id(self.clients_table, record_id)
 
     def show_add_client_dialog(self):
         dialog = ClientDialog(self)
@@ -74,17 +70,14 @@ class ClientView(QWidget):
 
     def delete_selected_client(self):
         """Handles the logic for deleting a client."""
-        selected_items = self.clients_table.selectedItems()
-        if not selected_items:
+        # Retrieve the stored database ID of the selected row
+        client_id = selected_row_id(self.clients_table)
+        if client_id is None:
             QMessageBox.warning(self, "No Selection", "Please select a client from the table to delete.")
             return
 
-        # Get the item from the first column of the selected row
-        selected_row = selected_items[0].row()
-        client_item = self.clients_table.item(selected_row, 0)
-        client_name = client_item.text()
-        # Retrieve the stored database ID
-        client_id = client_item.data(Qt.UserRole)
+        # Get the name from the first column of the selected row
+        client_name = self.clients_table.selectionModel().selectedRows(0)[0].data()
 
         reply = QMessageBox.question(self, "Confirm Deletion",
                                      f"Are you sure you want to delete the client '{client_name}'?\n"
@@ -5,6 +5,8 @@ from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
 from PySide6.QtGui import QIcon
 from PySide6.QtCore import QSize
 from ui.widgets.mpl_chart_widget import MplChartWidget
+from ui.widgets.loading_indicator import LoadingIndicator
+from shared.query_executor import get_query_executor
 from database.database_manager import get_dashboard_kpis, get_monthly_income_summary, get_recent_activity
 from datetime import datetime, timedelta
 
@@ -20,6 +22,8 @@ class DashboardView(QWidget):
         header_label = QLabel("Dashboard"); header_label.setObjectName("HeaderLabel")
         header_layout.addWidget(header_label)
         header_layout.addStretch(1) # Pushes the button to the right
+        self.loading_indicator = LoadingIndicator()
+        header_layout.addWidget(self.loading_indicator)
         
         # --- NEW: Exit Button ---
         exit_button = QPushButton("Exit Application")
@@ -56,7 +60,19 @@ class DashboardView(QWidget):
         layout.addWidget(title_label); layout.addWidget(value_label); return card, value_label
 
     def refresh_data(self):
-        kpis = get_dashboard_kpis(); income_data = get_monthly_income_summary(months=6); recent_activity = get_recent_activity(limit=5)
+        """Loads the dashboard data in the background; populate_dashboard() fills the widgets."""
+        self.loading_indicator.start()
+        get_query_executor().submit(self.load_dashboard_data, key="dashboard",
+                                    on_result=self.populate_dashboard, on_error=self.loading_indicator.show_error)
+
+    @staticmethod
+    def load_dashboard_data():
+        """Runs on a worker thread."""
+        return get_dashboard_kpis(), get_monthly_income_summary(months=6), get_recent_activity(limit=5)
+
+    def populate_dashboard(self, data):
+        kpis, income_data, recent_activity = data
+        self.loading_indicator.stop()
         self.kpi_revenue[1].setText(f"${kpis['total_revenue']:.2f}"); self.kpi_unpaid[1].setText(f"${kpis['total_unpaid']:.2f}")
         self.kpi_projects[1].setText(str(kpis['active_projects'])); self.kpi_hours[1].setText(f"{kpis['logged_hours_this_month']:.1f} hrs")
         months = list(income_data.keys()); income = list(income_data.values()); self.income_chart.plot_bar_chart(months, income, "Monthly Revenue (from Paid Invoices)")
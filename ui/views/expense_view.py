@@ -2,12 +2,14 @@
 
 import os
 import shutil
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
                                QPushButton, QDialog, QFormLayout, QLineEdit, QMessageBox,
-                               QHeaderView, QDialogButtonBox, QLabel, QComboBox,
+                               QDialogButtonBox, QLabel, QComboBox,
                                QDoubleSpinBox, QDateEdit, QFileDialog, QStyle)
 from PySide6.QtCore import Qt, QDate
-from database.database_manager import add_expense, get_all_expenses, delete_expense
+from database.database_manager import add_expense, delete_expense
+from ui.widgets.loading_indicator import LoadingIndicator
+from ui.widgets.sql_table_model import SqlTableModel, configure_table_view, select_row_id, selected_row_id
 from datetime import datetime
 
 class ExpenseDialog(QDialog):
@@ -38,12 +40,16 @@ class ExpenseView(QWidget):
     def __init__(self):
         super().__init__()
         self.layout = QVBoxLayout(self); self.layout.setContentsMargins(20, 20, 20, 20); self.layout.setSpacing(15)
-        header = QLabel("Expense Tracker"); header.setObjectName("HeaderLabel"); self.layout.addWidget(header)
+        header_layout = QHBoxLayout(); header = QLabel("Expense Tracker"); header.setObjectName("HeaderLabel")
+        self.loading_indicator = LoadingIndicator()
+        header_layout.addWidget(header); header_layout.addStretch(1); header_layout.addWidget(self.loading_indicator); self.layout.addLayout(header_layout)
         
-        self.expense_table = QTableWidget(); self.expense_table.setColumnCount(4)
-        self.expense_table.setHorizontalHeaderLabels(["Date", "Description", "Category", "Amount"])
-        self.expense_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.expense_table.setSelectionBehavior(QTableWidget.SelectRows); self.expense_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.expense_model = SqlTableModel("expenses", [
+            ("Date", "expense_date", None), ("Description", "description", None),
+            ("Category", "category", None), ("Amount", "amount", lambda amount: f"${amount:.2f}"),
+        ])
+        self.expense_model.bind_loading_indicator(self.loading_indicator)
+        self.expense_table = QTableView(); configure_table_view(self.expense_table, self.expense_model)
         self.layout.addWidget(self.expense_table)
         
         # --- NEW: Button Layout ---
@@ -57,18 +63,11 @@ class ExpenseView(QWidget):
         self.delete_button.clicked.connect(self.delete_selected_expense)
 
     def refresh_data(self):
-        """Refreshes the expense list and stores the ID in each row."""
-        expenses = get_all_expenses()
-        self.expense_table.setRowCount(len(expenses))
-        for row, expense in enumerate(expenses):
-            # --- CRITICAL CHANGE: Store the ID ---
-            date_item = QTableWidgetItem(expense['expense_date'])
-            date_item.setData(Qt.UserRole, expense['id'])
-            
-            self.expense_table.setItem(row, 0, date_item)
-            self.expense_table.setItem(row, 1, QTableWidgetItem(expense['description']))
-            self.expense_table.setItem(row, 2, QTableWidgetItem(expense['category']))
-            self.expense_table.setItem(row, 3, QTableWidgetItem(f"${expense['amount']:.2f}"))
+        """Reloads the expense list; rows are fetched page by page as the table scrolls."""
+        self.expense_model.reload()
+
+    def select_record(self, kind, record_id):
+        select_row_id(self.expense_table, record_id)
 
     def show_add_expense_dialog(self):
         dialog = ExpenseDialog(self)
@@ -80,12 +79,10 @@ class ExpenseView(QWidget):
             self.refresh_data()
 
     def delete_selected_expense(self):
-        selected_items = self.expense_table.selectedItems()
-        if not selected_items:
+        exp_id = selected_row_id(self.expense_table)
+        if exp_id is None:
             QMessageBox.warning(self, "No Selection", "Please select an expense from the table to delete."); return
 
-        exp_item = self.expense_table.item(selected_items[0].row(), 0)
-        exp_id = exp_item.data(Qt.UserRole)
         # We could also get the receipt path here to delete the file from disk
         # expense_to_delete = next((exp for exp in get_all_expenses() if exp['id'] == exp_id), None)
 
@@ -1,18 +1,45 @@
 # ui/views/invoice_view.py
 
 import os
-from datetime import datetime, timedelta
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
-                               QPushButton, QDialog, QFormLayout, QLineEdit, QMessageBox, QHeaderView,
-                               QDialogButtonBox, QLabel, QComboBox, QDateEdit, QListWidget, QDoubleSpinBox, QStyle)
-from PySide6.QtCore import Qt, QDate
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+                               QPushButton, QDialog, QFormLayout, QLineEdit, QMessageBox,
+                               QDialogButtonBox, QLabel, QComboBox, QDateEdit, QListWidget, QDoubleSpinBox, QStyle,
+                               QProgressBar)
+from PySide6.QtCore import Qt, QDate, QThread, Signal
 from PySide6.QtGui import QIcon
-from database.database_manager import (get_all_clients, get_client_by_id, get_all_projects_with_client_name,
-                                       get_unbilled_time_for_project, create_invoice_from_time_entries,
-                                       get_next_invoice_number, update_invoice_pdf_path,
-                                       get_all_invoices_with_details, get_all_settings,
-                                       delete_invoice)
-from shared.pdf_generator import create_invoice_pdf
+from database.database_manager import (get_all_clients, get_all_projects_with_client_name,
+                                       get_unbilled_line_items, create_invoice_from_time_entries,
+                                       get_next_invoice_number, EntriesAlreadyBilled, get_search_result_parent,
+                                       delete_invoice, preview_billing_run, get_billing_runs, get_billing_run, get_billing_run_errors)
+from shared import billing_run
+from shared.pdf_job_queue import get_pdf_job_queue
+from shared.query_executor import get_query_executor
+from ui.widgets.loading_indicator import LoadingIndicator
+from database.line_items import GROUPINGS
+from ui.widgets.sql_table_model import SqlTableModel, RecordTableModel, configure_table_view, select_row_id, selected_row_id
+
+class BillingRunThread(QThread):
+    """Creates (or resumes) a billing run off the GUI thread; PDFs render in worker processes."""
+    progress = Signal(int, int, str, str)  # done, total, invoice number, error ("" if none)
+    completed = Signal(object, object)     # run id (None if nothing was unbilled), status
+    failed = Signal(str)
+
+    def __init__(self, period=None, resume_run_id=None, parent=None):
+        super().__init__(parent)
+        self.period = period  # (period_start, period_end, issue_date, due_date, grouping)
+        self.resume_run_id = resume_run_id
+
+    def run(self):
+        report = lambda done, total, number, error: self.progress.emit(done, total, number, error or "")
+        try:
+            if self.resume_run_id is not None:
+                run_id, status = self.resume_run_id, billing_run.render_run(self.resume_run_id, progress=report, should_stop=self.isInterruptionRequested)
+            else:
+                run_id, status = billing_run.run(*self.period, progress=report, should_stop=self.isInterruptionRequested)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(run_id, status)
 
 class InvoiceView(QWidget):
     def __init__(self):
@@ -21,15 +48,23 @@ class InvoiceView(QWidget):
         self.layout.setContentsMargins(20, 20, 20, 20)
         self.layout.setSpacing(15)
 
+        header_layout = QHBoxLayout()
         header = QLabel("Invoices"); header.setObjectName("HeaderLabel")
-        self.layout.addWidget(header)
+        self.loading_indicator = LoadingIndicator()
+        self.pdf_status_label = QLabel()
+        header_layout.addWidget(header); header_layout.addStretch(1); header_layout.addWidget(self.pdf_status_label); header_layout.addWidget(self.loading_indicator)
+        self.layout.addLayout(header_layout)
         
-        self.invoices_table = QTableWidget()
-        self.invoices_table.setColumnCount(5)
-        self.invoices_table.setHorizontalHeaderLabels(["Invoice #", "Client", "Issue Date", "Status", "Amount"])
-        self.invoices_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.invoices_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.invoices_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.invoices_model = SqlTableModel("invoices", [
+            ("Invoice #", "invoice_number", None),
+            ("Client", "client_name", None),
+            ("Issue Date", "issue_date", None),
+            ("Status", "status", None),
+            ("Amount", "total_amount", lambda amount: f"${amount or 0:.2f}"),
+        ])
+        self.invoices_model.bind_loading_indicator(self.loading_indicator)
+        self.invoices_table = QTableView()
+        configure_table_view(self.invoices_table, self.invoices_model)
         self.layout.addWidget(self.invoices_table)
 
         # --- Buttons ---
@@ -37,59 +72,100 @@ class InvoiceView(QWidget):
         btn_layout.addStretch(1)
         self.delete_invoice_button = QPushButton("Delete Selected"); self.delete_invoice_button.setIcon(self.style().standardIcon(QStyle.SP_TrashIcon))
         self.add_invoice_button = QPushButton("Create New Invoice"); self.add_invoice_button.setIcon(self.style().standardIcon(QStyle.SP_FileDialogNewFolder))
+        self.billing_run_button = QPushButton("Month-End Billing Run"); self.billing_run_button.setIcon(self.style().standardIcon(QStyle.SP_FileDialogDetailedView))
+        self.regenerate_pdf_button = QPushButton("Regenerate PDF"); self.regenerate_pdf_button.setIcon(self.style().standardIcon(QStyle.SP_BrowserReload))
         btn_layout.addWidget(self.delete_invoice_button)
+        btn_layout.addWidget(self.regenerate_pdf_button)
+        btn_layout.addWidget(self.billing_run_button)
         btn_layout.addWidget(self.add_invoice_button)
         self.layout.addLayout(btn_layout)
         
         self.add_invoice_button.clicked.connect(self.show_create_invoice_dialog)
+        self.billing_run_button.clicked.connect(self.show_billing_run_dialog)
         self.delete_invoice_button.clicked.connect(self.delete_selected_invoice)
+        self.regenerate_pdf_button.clicked.connect(self.regenerate_selected_pdf)
+
+        # PDFs render on the job queue's worker thread; these signals arrive on the GUI thread.
+        self.pdf_jobs = get_pdf_job_queue()
+        self.pdf_jobs.progress.connect(self.on_pdf_progress)
+        self.pdf_jobs.failed.connect(self.on_pdf_failed)
+        self.pdf_jobs.cancelled.connect(lambda _: self.on_pdf_progress(0, 0))
 
     def refresh_data(self):
-        """Refreshes the invoice list and stores the ID in each row."""
-        invoices = get_all_invoices_with_details()
-        self.invoices_table.setRowCount(len(invoices))
-        for row, invoice in enumerate(invoices):
-            inv_num_item = QTableWidgetItem(invoice['invoice_number'])
-            inv_num_item.setData(Qt.UserRole, invoice['id']) # Store the ID
-            
-            self.invoices_table.setItem(row, 0, inv_num_item)
-            self.invoices_table.setItem(row, 1, QTableWidgetItem(invoice['client_name']))
-            self.invoices_table.setItem(row, 2, QTableWidgetItem(invoice['issue_date']))
-            self.invoices_table.setItem(row, 3, QTableWidgetItem(invoice['status']))
-            self.invoices_table.setItem(row, 4, QTableWidgetItem(f"${invoice.get('total_amount', 0):.2f}"))
+        """Reloads the invoice list; rows are fetched page by page as the table scrolls."""
+        self.invoices_model.reload()
+
+    def select_record(self, kind, record_id):
+        """Selects an invoice, or the invoice an invoice item is on."""
+        if kind == "invoice_item":
+            get_query_executor().submit(get_search_result_parent, kind, record_id, key="invoice_view_select", on_result=self.select_invoice)
+        else:
+            self.select_invoice(record_id)
+
+    def select_invoice(self, invoice_id):
+        if invoice_id is not None: select_row_id(self.invoices_table, invoice_id)
 
     def show_create_invoice_dialog(self):
         dialog = self.CreateInvoiceDialog(self)
         if dialog.exec() == QDialog.Accepted:
             invoice_data, line_items, time_entry_ids, client_id = dialog.get_data()
             if not line_items: QMessageBox.warning(self, "Empty Invoice", "Cannot create an invoice with no line items."); return
-            client_data = get_client_by_id(client_id)
-            company_details = get_all_settings()
-            invoice_id = create_invoice_from_time_entries(invoice_data, line_items, time_entry_ids)
-            pdf_path = create_invoice_pdf(invoice_data, line_items, client_data, company_details)
-            if pdf_path: update_invoice_pdf_path(invoice_id, pdf_path)
+            try:
+                invoice_id = create_invoice_from_time_entries(invoice_data, line_items, time_entry_ids)
+            except EntriesAlreadyBilled:
+                QMessageBox.warning(self, "Already Billed", "Some of these time entries were billed on another invoice "
+                                    "(e.g. by a billing run) while the dialog was open. Nothing was saved; please create the invoice again.")
+                self.refresh_data(); return
+            # The PDF is rendered in the background; pdf_path is filled in when it is done.
+            self.pdf_jobs.submit(invoice_id)
+            self.on_pdf_progress(0, 0)
             self.refresh_data()
-            
+
+    def regenerate_selected_pdf(self):
+        inv_id = selected_row_id(self.invoices_table)
+        if inv_id is None:
+            QMessageBox.warning(self, "No Selection", "Please select an invoice from the table."); return
+        self.pdf_jobs.submit(inv_id)
+        self.on_pdf_progress(0, 0)
+
+    def on_pdf_progress(self, done, total):
+        pending = len(self.pdf_jobs.pending_ids())
+        self.pdf_status_label.setText(f"Rendering PDFs... {pending} left" if pending else "")
+
+    def on_pdf_failed(self, invoice_id, error):
+        self.on_pdf_progress(0, 0)
+        reply = QMessageBox.warning(self, "PDF Generation Failed",
+                                    f"The PDF for invoice #{invoice_id} could not be generated:\n{error}\n\nTry again?",
+                                    QMessageBox.Retry | QMessageBox.Cancel, QMessageBox.Retry)
+        if reply == QMessageBox.Retry:
+            self.pdf_jobs.retry(invoice_id)
+            self.on_pdf_progress(0, 0)
+
+    def show_billing_run_dialog(self):
+        dialog = self.BillingRunDialog(self)
+        dialog.exec()
+        self.refresh_data()
+
     def delete_selected_invoice(self):
-        selected_items = self.invoices_table.selectedItems()
-        if not selected_items:
+        inv_id = selected_row_id(self.invoices_table)
+        if inv_id is None:
             QMessageBox.warning(self, "No Selection", "Please select an invoice from the table to delete."); return
 
-        inv_item = self.invoices_table.item(selected_items[0].row(), 0)
-        inv_num = inv_item.text()
-        inv_id = inv_item.data(Qt.UserRole)
+        inv_num = self.invoices_table.selectionModel().selectedRows(0)[0].data()
 
         reply = QMessageBox.question(self, "Confirm Deletion",
                                      f"Are you sure you want to delete invoice '{inv_num}'?\n"
                                      "Associated time entries will be marked as 'un-billed' again.",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
+            self.pdf_jobs.cancel(inv_id)
             delete_invoice(inv_id)
             self.refresh_data()
             QMessageBox.information(self, "Success", f"Invoice '{inv_num}' has been deleted.")
 
     class CreateInvoiceDialog(QDialog):
         # This nested class code is unchanged and correct.
+        ITEM_COLUMNS = [("Description", "description"), ("Hours", "hours"), ("Rate", "rate_text"), ("Amount", "amount_text")]
         def __init__(self, parent=None):
             super().__init__(parent); self.setWindowTitle("Create Invoice from Project Time"); self.setMinimumWidth(600)
             self.layout = QVBoxLayout(self); self.line_items = []; self.time_entry_ids = []
@@ -97,15 +173,16 @@ class InvoiceView(QWidget):
             self.invoice_number_label = QLabel(get_next_invoice_number()); self.issue_date = QDateEdit(QDate.currentDate()); self.due_date = QDateEdit(QDate.currentDate().addDays(30))
             form.addRow("Invoice Number:", self.invoice_number_label); form.addRow("Generate from Project:", self.project_combo)
             form.addRow("Issue Date:", self.issue_date); form.addRow("Due Date:", self.due_date); self.layout.addLayout(form)
+            # The number is only taken when the invoice is saved, so another window or a billing run can't collide with it.
+            self.invoice_number_label.setToolTip("Provisional: the final number is assigned when the invoice is saved.")
+            self.issue_date.dateChanged.connect(lambda d: self.invoice_number_label.setText(get_next_invoice_number(d.toString(Qt.ISODate))))
         # Line Items Section
-            self.layout.addWidget(QLabel("Time Entries to Bill:"))
-            self.entries_list = QListWidget()
-            self.entries_list.setSelectionMode(QListWidget.MultiSelection)
-            self.layout.addWidget(self.entries_list)
+            self.grouping_combo = QComboBox()
+            for key, label in GROUPINGS.items(): self.grouping_combo.addItem(label, userData=key)
+            form.addRow("Group Line Items:", self.grouping_combo)
             
             self.generate_button = QPushButton("Generate Line Items"); self.generate_button.setIcon(self.style().standardIcon(QStyle.SP_ArrowRight)); self.layout.addWidget(self.generate_button)
-            self.items_table = QTableWidget(); self.items_table.setColumnCount(4); self.items_table.setHorizontalHeaderLabels(["Description", "Hours", "Rate", "Amount"])
-            self.items_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch); self.layout.addWidget(self.items_table)
+            self.items_table = QTableView(); self.items_model = RecordTableModel([], self.ITEM_COLUMNS, self.items_table); configure_table_view(self.items_table, self.items_model); self.layout.addWidget(self.items_table)
             self.total_label = QLabel("Total: $0.00"); self.total_label.setStyleSheet("font-weight: bold; font-size: 16px;"); self.layout.addWidget(self.total_label, alignment=Qt.AlignRight)
             self.button_box = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel); self.button_box.button(QDialogButtonBox.Save).setText("Save Invoice"); self.layout.addWidget(self.button_box)
             self.button_box.accepted.connect(self.accept); self.button_box.rejected.connect(self.reject); self.generate_button.clicked.connect(self.generate_line_items)
@@ -113,21 +190,111 @@ class InvoiceView(QWidget):
         def populate_projects(self):
             self.projects = get_all_projects_with_client_name()
             for p in self.projects: self.project_combo.addItem(f"{p['name']} ({p['client_name']})", userData=p)
+        def show_line_items(self, items):
+            rows = [{"description": i['description'], "hours": f"{i['quantity']:.2f}", "rate_text": f"${i['rate']:.2f}", "amount_text": f"${i['amount']:.2f}"} for i in items]
+            self.items_model = RecordTableModel(rows, self.ITEM_COLUMNS, self.items_table); self.items_table.setModel(self.items_model)
+            self.total_label.setText(f"Total: ${sum(i['amount'] for i in items):.2f}")
         def generate_line_items(self):
             project = self.project_combo.currentData()
             if not project: QMessageBox.warning(self, "No Project Selected", "Please select a project."); return
-            unbilled_entries = get_unbilled_time_for_project(project['id'])
-            if not unbilled_entries:
+            # Grouped in SQL; every item keeps the ids of the time entries it bills.
+            self.line_items = get_unbilled_line_items(project['id'], self.grouping_combo.currentData(), project.get('rate') or 0.0)
+            self.time_entry_ids = [entry_id for item in self.line_items for entry_id in item['entry_ids']]
+            self.show_line_items(self.line_items)
+            if not self.line_items:
                 QMessageBox.information(self, "No Unbilled Time", "No unbilled time entries found for this project.")
-                self.line_items.clear(); self.time_entry_ids.clear(); self.items_table.setRowCount(0); self.total_label.setText("Total: $0.00")
-                return
-            self.line_items.clear(); self.time_entry_ids.clear(); self.items_table.setRowCount(len(unbilled_entries)); total = 0.0; rate = project.get('rate', 0.0)
-            for row, entry in enumerate(unbilled_entries):
-                hours = entry['duration_minutes'] / 60.0; amount = hours * rate; desc = f"Work from {datetime.fromisoformat(entry['start_time']).strftime('%Y-%m-%d')}: {entry.get('description', 'General Work')}"
-                self.items_table.setItem(row, 0, QTableWidgetItem(desc)); self.items_table.setItem(row, 1, QTableWidgetItem(f"{hours:.2f}")); self.items_table.setItem(row, 2, QTableWidgetItem(f"${rate:.2f}")); self.items_table.setItem(row, 3, QTableWidgetItem(f"${amount:.2f}"))
-                self.line_items.append({"description": desc, "quantity": hours, "rate": rate, "amount": amount}); self.time_entry_ids.append(entry['id']); total += amount
-            self.total_label.setText(f"Total: ${total:.2f}")
         def get_data(self):
             project = self.project_combo.currentData(); total = sum(item['amount'] for item in self.line_items)
-            invoice_data = {"invoice_number": self.invoice_number_label.text(), "client_id": project['client_id'], "issue_date": self.issue_date.date().toString(Qt.ISODate), "due_date": self.due_date.date().toString(Qt.ISODate), "total_amount": total}
-            return invoice_data, self.line_items, self.time_entry_ids, project['client_id']
\ No newline at end of file
+            invoice_data = {"invoice_number": None, "client_id": project['client_id'], "issue_date": self.issue_date.date().toString(Qt.ISODate), "due_date": self.due_date.date().toString(Qt.ISODate), "total_amount": total}
+            return invoice_data, self.line_items, self.time_entry_ids, project['client_id']
+
+    class BillingRunDialog(QDialog):
+        """Invoices every client with unbilled time in a period; unfinished runs can be resumed."""
+        PREVIEW_COLUMNS = [("Client", "client_name"), ("Projects", "project_count"), ("Entries", "entry_count"), ("Hours", "hours_text"), ("Amount", "amount_text")]
+        def __init__(self, parent=None):
+            super().__init__(parent); self.setWindowTitle("Month-End Billing Run"); self.setMinimumWidth(650)
+            self.layout = QVBoxLayout(self); self.run_thread = None
+            first_of_month = QDate(QDate.currentDate().year(), QDate.currentDate().month(), 1)
+            form = QFormLayout()
+            self.period_start = QDateEdit(first_of_month.addMonths(-1)); self.period_end = QDateEdit(first_of_month.addDays(-1))
+            self.issue_date = QDateEdit(QDate.currentDate()); self.due_date = QDateEdit(QDate.currentDate().addDays(billing_run.DEFAULT_DUE_DAYS))
+            self.grouping_combo = QComboBox()
+            for key, label in GROUPINGS.items(): self.grouping_combo.addItem(label, userData=key)
+            self.grouping_combo.setCurrentIndex(list(GROUPINGS).index("week"))
+            form.addRow("Period Start:", self.period_start); form.addRow("Period End:", self.period_end)
+            form.addRow("Issue Date:", self.issue_date); form.addRow("Due Date:", self.due_date); form.addRow("Group Line Items:", self.grouping_combo)
+            self.resume_combo = QComboBox()
+            for run in get_billing_runs(unfinished_only=True): self.resume_combo.addItem(f"Run {run['id']}: {run['period_start']} to {run['period_end']} ({run['status']})", userData=run['id'])
+            form.addRow("Unfinished Runs:", self.resume_combo)
+            self.layout.addLayout(form)
+            self.preview_table = QTableView(); configure_table_view(self.preview_table, RecordTableModel([], self.PREVIEW_COLUMNS, self.preview_table)); self.layout.addWidget(self.preview_table)
+            self.summary_label = QLabel(""); self.layout.addWidget(self.summary_label)
+            self.progress_bar = QProgressBar(); self.progress_bar.setVisible(False); self.layout.addWidget(self.progress_bar)
+            self.errors_list = QListWidget(); self.errors_list.setVisible(False); self.layout.addWidget(self.errors_list)
+            btn_layout = QHBoxLayout(); btn_layout.addStretch(1)
+            self.resume_button = QPushButton("Resume Selected Run")
+            self.run_button = QPushButton("Create Invoices"); self.close_button = QPushButton("Close")
+            for button in (self.resume_button, self.run_button, self.close_button): btn_layout.addWidget(button)
+            self.layout.addLayout(btn_layout)
+            self.period_start.dateChanged.connect(self.refresh_preview); self.period_end.dateChanged.connect(self.refresh_preview)
+            self.run_button.clicked.connect(self.start_run); self.resume_button.clicked.connect(self.resume_run); self.close_button.clicked.connect(self.reject)
+            self.refresh_preview(); self.update_resume_controls()
+        def update_resume_controls(self):
+            has_runs = self.resume_combo.count() > 0
+            self.resume_combo.setEnabled(has_runs); self.resume_button.setEnabled(has_runs and self.run_thread is None)
+        def period(self):
+            return self.period_start.date().toString(Qt.ISODate), self.period_end.date().toString(Qt.ISODate)
+        def refresh_preview(self):
+            rows = preview_billing_run(*self.period())
+            for row in rows: row["hours_text"] = f"{row['hours']:.2f}"; row["amount_text"] = f"${row['amount']:.2f}"
+            self.preview_table.setModel(RecordTableModel(rows, self.PREVIEW_COLUMNS, self.preview_table))
+            self.summary_label.setText(f"{len(rows)} invoices, ${sum(r['amount'] for r in rows):.2f} in total" if rows else "No unbilled time in this period.")
+            self.run_button.setEnabled(bool(rows))
+        def start_run(self):
+            period = (*self.period(), self.issue_date.date().toString(Qt.ISODate), self.due_date.date().toString(Qt.ISODate), self.grouping_combo.currentData())
+            self.start_thread(BillingRunThread(period=period, parent=self))
+        def resume_run(self):
+            self.start_thread(BillingRunThread(resume_run_id=self.resume_combo.currentData(), parent=self))
+        def start_thread(self, thread):
+            self.run_thread = thread
+            for button in (self.run_button, self.resume_button): button.setEnabled(False)
+            self.progress_bar.setRange(0, 0); self.progress_bar.setVisible(True); self.errors_list.clear()
+            self.summary_label.setText("Creating invoices...")
+            thread.progress.connect(self.on_progress); thread.completed.connect(self.on_completed); thread.failed.connect(self.on_failed)
+            thread.start()
+        def on_progress(self, done, total, invoice_number, error):
+            self.progress_bar.setRange(0, total); self.progress_bar.setValue(done)
+            self.summary_label.setText(f"Rendering PDFs: {done} of {total}")
+            if error: self.errors_list.setVisible(True); self.errors_list.addItem(f"{invoice_number}: {error}")
+        def on_completed(self, run_id, status):
+            self.progress_bar.setVisible(False); self.run_thread = None
+            if run_id is None:
+                self.summary_label.setText("No unbilled time in this period."); return
+            run = get_billing_run(run_id)
+            self.summary_label.setText(f"Run {run_id}: {run['invoice_count']} invoices, ${run['total_amount']:.2f}, {status}.")
+            errors = get_billing_run_errors(run_id)
+            if errors:
+                self.errors_list.clear(); self.errors_list.setVisible(True)
+                for invoice_number, error in errors: self.errors_list.addItem(f"{invoice_number}: {error}")
+            index = self.resume_combo.findData(run_id)
+            if status == 'Completed' and index >= 0: self.resume_combo.removeItem(index)
+            elif status != 'Completed':
+                if index < 0: self.resume_combo.addItem(f"Run {run_id} ({status})", userData=run_id)
+                self.resume_combo.setCurrentIndex(self.resume_combo.findData(run_id))
+            self.refresh_preview(); self.update_resume_controls()
+        def on_failed(self, message):
+            self.progress_bar.setVisible(False); self.run_thread = None
+            self.refresh_preview(); self.update_resume_controls()
+            if self.isEnabled(): QMessageBox.critical(self, "Billing Run Failed", f"The billing run stopped with an error:\n{message}")
+        def reject(self):
+            # Stops after the PDFs in flight and closes once the thread is done, without blocking the GUI; what is left can be resumed later.
+            if self.run_thread is None or self.run_thread.isFinished():
+                super().reject(); return
+            if self.isEnabled():
+                self.setEnabled(False); self.summary_label.setText("Stopping after the PDFs in flight...")
+                self.run_thread.finished.connect(self.close_after_run)
+                self.run_thread.requestInterruption()
+                # It may have finished between the check above and the connect.
+                if self.run_thread.isFinished(): self.close_after_run()
+        def close_after_run(self):
+            if self.isVisible(): super().reject()  # at most once, however it is reached
@@ -1,7 +1,7 @@
 # ui/views/project_hub_view.py
 
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
-                               QTableWidgetItem, QHeaderView, QSplitter, QPushButton,
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableView,
+                               QSplitter, QPushButton,
                                QMessageBox, QDialog, QFormLayout, QLineEdit, QComboBox,
                                QDoubleSpinBox, QDialogButtonBox, QFrame, QTabWidget, QStyle)
 from PySide6.QtCore import Qt
@@ -12,6 +12,9 @@ from controllers.project_controller import ProjectController
 
 # Import Kanban Board
 from ..widgets.kanban_board import KanbanBoard
+from ..widgets.loading_indicator import LoadingIndicator
+from ..widgets.sql_table_model import SqlTableModel, RecordTableModel, configure_table_view, select_row_id, selected_row_id
+from shared.query_executor import get_query_executor
 
 class ProjectDialog(QDialog):
     """A dialog for adding new projects."""
@@ -71,12 +74,12 @@ class ProjectHubView(QWidget):
         left_panel = QFrame(); left_panel.setObjectName("GlassFrame"); left_panel.setContentsMargins(0,0,10,0)
         left_layout = QVBoxLayout(left_panel)
         header = QLabel("Active Projects"); header.setObjectName("HeaderLabel")
+        self.loading_indicator = LoadingIndicator()
         
-        self.projects_table = QTableWidget(); self.projects_table.setColumnCount(2)
-        self.projects_table.setHorizontalHeaderLabels(["Project", "Client"])
-        self.projects_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.projects_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.projects_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.projects_model = SqlTableModel("projects", [("Project", "name", None), ("Client", "client_name", None)])
+        self.projects_model.bind_loading_indicator(self.loading_indicator)
+        self.projects_table = QTableView()
+        configure_table_view(self.projects_table, self.projects_model)
         
         button_layout = QHBoxLayout()
         self.delete_project_button = QPushButton("Delete"); self.delete_project_button.setIcon(self.style().standardIcon(QStyle.SP_TrashIcon))
@@ -86,6 +89,7 @@ class ProjectHubView(QWidget):
         button_layout.addWidget(self.add_project_button)
         
         left_layout.addWidget(header)
+        left_layout.addWidget(self.loading_indicator)
         left_layout.addWidget(self.projects_table)
         left_layout.addLayout(button_layout)
         
@@ -93,6 +97,8 @@ class ProjectHubView(QWidget):
         self.right_panel = QFrame(); self.right_panel.setObjectName("GlassFrame"); self.right_panel.setContentsMargins(10,0,0,0)
         self.right_layout = QVBoxLayout(self.right_panel)
         self.placeholder_label = QLabel("Select a project to view details"); self.placeholder_label.setAlignment(Qt.AlignCenter)
+        self.dashboard_loading_indicator = LoadingIndicator(); self.dashboard_loading_indicator.setAlignment(Qt.AlignCenter)
+        self.right_layout.addWidget(self.dashboard_loading_indicator)
         self.dashboard_widget = QWidget(); self.dashboard_widget.setVisible(False)
         self.right_layout.addWidget(self.placeholder_label)
         self.right_layout.addWidget(self.dashboard_widget)
@@ -101,16 +107,21 @@ class ProjectHubView(QWidget):
         self.splitter.addWidget(self.right_panel)
         self.splitter.setSizes([400, 800])
         
-        self.projects_table.itemSelectionChanged.connect(self.display_project_dashboard)
+        self.projects_table.selectionModel().selectionChanged.connect(lambda *_: self.display_project_dashboard())
         self.add_project_button.clicked.connect(self.show_add_project_dialog)
         self.delete_project_button.clicked.connect(self.delete_selected_project)
 
         # --- Tab 2: Kanban Board ---
+        # Its own indicator, so the board and the project list don't hide each other's.
+        self.kanban_tab = QWidget(); kanban_layout = QVBoxLayout(self.kanban_tab); kanban_layout.setContentsMargins(0, 0, 0, 0)
+        self.kanban_loading_indicator = LoadingIndicator()
         self.kanban_widget = KanbanBoard()
+        kanban_layout.addWidget(self.kanban_loading_indicator)
+        kanban_layout.addWidget(self.kanban_widget)
 
         # Add tabs
         self.view_tabs.addTab(self.list_view_widget, self.style().standardIcon(QStyle.SP_FileDialogListView), "List View")
-        self.view_tabs.addTab(self.kanban_widget, self.style().standardIcon(QStyle.SP_FileDialogDetailedView), "Task Board")
+        self.view_tabs.addTab(self.kanban_tab, self.style().standardIcon(QStyle.SP_FileDialogDetailedView), "Task Board")
         
         self.view_tabs.currentChanged.connect(self.on_tab_changed)
 
@@ -128,39 +139,51 @@ class ProjectHubView(QWidget):
             self.refresh_project_list()
 
     def refresh_kanban(self):
-        """Loads projects into the Kanban Board."""
-        projects = self.controller.get_all_projects()
+        """Loads projects into the Kanban Board in the background."""
+        self.kanban_loading_indicator.start()
+        get_query_executor().submit(self.controller.get_all_projects, key="project_hub_kanban",
+                                    on_result=self.populate_kanban, on_error=self.kanban_loading_indicator.show_error)
+
+    def populate_kanban(self, projects):
+        self.kanban_loading_indicator.stop()
         self.kanban_widget.load_projects(projects)
 
     def refresh_project_list(self):
-        """Refreshes the project list table and stores the project ID in each row."""
-        projects = self.controller.get_all_projects()
-        self.projects_table.setRowCount(len(projects))
-        for row, project in enumerate(projects):
-            name_item = QTableWidgetItem(project["name"])
-            name_item.setData(Qt.UserRole, project["id"]) # Store the ID
-            self.projects_table.setItem(row, 0, name_item)
-            self.projects_table.setItem(row, 1, QTableWidgetItem(project["client_name"]))
+        """Reloads the project list; the model keeps each project's ID under Qt.UserRole."""
+        self.projects_model.reload()
+
+    def select_record(self, kind, record_id):
+        """Selects the project in the list view, which opens its dashboard."""
+        self.view_tabs.setCurrentIndex(0)
+        select_row_id(self.projects_table, record_id)
 
     def display_project_dashboard(self):
-        """Displays the detailed dashboard for the selected project using the Controller."""
-        selected_items = self.projects_table.selectedItems()
-        if not selected_items:
+        """Loads the detailed dashboard for the selected project using the Controller."""
+        project_id = selected_row_id(self.projects_table)
+        if project_id is None:
+            # Drop any in-flight load for a project that is no longer selected
+            get_query_executor().cancel("project_dashboard")
+            self.dashboard_loading_indicator.stop()
             self.placeholder_label.setVisible(True)
             self.dashboard_widget.setVisible(False)
             return
         
         self.placeholder_label.setVisible(False)
-        self.dashboard_widget.setVisible(True)
-        project_id = selected_items[0].data(Qt.UserRole)
-        
-        # --- USE CONTROLLER ---
-        data = self.controller.get_project_dashboard_data(project_id)
+        self.dashboard_loading_indicator.start()
         
+        # --- USE CONTROLLER (off the GUI thread; a newer selection supersedes this one) ---
+        get_query_executor().submit(self.controller.get_project_dashboard_data, project_id, key="project_dashboard",
+                                    on_result=self.show_project_dashboard, on_error=self.dashboard_loading_indicator.show_error)
+
+    def show_project_dashboard(self, data):
+        """Builds the project dashboard from the controller's data."""
+        self.dashboard_loading_indicator.stop()
         if not data: 
             self.refresh_data()
             return
 
+        self.dashboard_widget.setVisible(True)
+
         # Rebuild UI
         if self.dashboard_widget.layout(): QWidget().setLayout(self.dashboard_widget.layout())
         layout = QVBoxLayout(self.dashboard_widget)
@@ -190,27 +213,13 @@ class ProjectHubView(QWidget):
 
     def create_time_table(self, formatted_entries):
         """Creates the time entry table from pre-formatted data."""
-        table = QTableWidget()
-        table.setColumnCount(3)
-        table.setHorizontalHeaderLabels(["Date", "Duration", "Description"])
-        table.setRowCount(len(formatted_entries))
-        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        table.setEditTriggers(QTableWidget.NoEditTriggers)
-        
-        for r, entry in enumerate(formatted_entries):
-            table.setItem(r, 0, QTableWidgetItem(entry['date']))
-            table.setItem(r, 1, QTableWidgetItem(entry['duration']))
-            table.setItem(r, 2, QTableWidgetItem(entry['description']))
+        table = QTableView()
+        configure_table_view(table, RecordTableModel(formatted_entries, [("Date", "date"), ("Duration", "duration"), ("Description", "description")], table))
         return table
 
     def create_invoice_table(self, formatted_invoices):
-        table = QTableWidget(); table.setColumnCount(4); table.setHorizontalHeaderLabels(["Invoice #", "Issue Date", "Status", "Amount"])
-        table.setRowCount(len(formatted_invoices)); table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch); table.setEditTriggers(QTableWidget.NoEditTriggers)
-        for r, invoice in enumerate(formatted_invoices):
-            table.setItem(r, 0, QTableWidgetItem(invoice['number']))
-            table.setItem(r, 1, QTableWidgetItem(invoice['date']))
-            table.setItem(r, 2, QTableWidgetItem(invoice['status']))
-            table.setItem(r, 3, QTableWidgetItem(invoice['amount']))
+        table = QTableView()
+        configure_table_view(table, RecordTableModel(formatted_invoices, [("Invoice #", "number"), ("Issue Date", "date"), ("Status", "status"), ("Amount", "amount")], table))
         return table
 
     def show_add_project_dialog(self):
@@ -225,13 +234,11 @@ class ProjectHubView(QWidget):
             self.refresh_project_list()
 
     def delete_selected_project(self):
-        selected_items = self.projects_table.selectedItems()
-        if not selected_items:
+        project_id = selected_row_id(self.projects_table)
+        if project_id is None:
             QMessageBox.warning(self, "No Selection", "Please select a project from the list to delete."); return
 
-        project_item = selected_items[0]
-        project_name = project_item.text()
-        project_id = project_item.data(Qt.UserRole)
+        project_name = self.projects_table.selectionModel().selectedRows(0)[0].data()
 
         reply = QMessageBox.question(self, "Confirm Deletion",
                                      f"Are you sure you want to delete the project '{project_name}'?\n"
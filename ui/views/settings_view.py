@@ -1,12 +1,152 @@
 # ui/views/settings_view.py
 
-import os
-import shutil
 from datetime import datetime
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QGroupBox, QFormLayout, 
-                               QComboBox, QPushButton, QHBoxLayout, QStyle, QLineEdit, QFileDialog, QMessageBox)
+                               QComboBox, QPushButton, QHBoxLayout, QStyle, QLineEdit, QFileDialog, QMessageBox,
+                               QDialog, QTabWidget, QTableView, QDialogButtonBox, QProgressDialog, QSpinBox)
+from PySide6.QtCore import QThread, Signal
 from PySide6.QtGui import QIcon
-from database.database_manager import get_all_settings, save_setting
+from database.database_manager import get_all_settings, save_setting, set_invoice_number_series
+from database.invoicing import SERIES_MODES, SERIES_SETTING
+from database import instrumentation
+from database.reference_cache import reference_cache
+from ui.widgets.sql_table_model import RecordTableModel, configure_table_view, selected_row_id
+from shared import backup_service
+from shared.backup_store import backup_store, INTERVAL_SETTING, DEFAULT_INTERVAL_HOURS
+from shared.export_manager import EXPORTERS, export_data
+
+BACKUP_FILTER = "Database Files (*.db);;Compressed Backup (*.db.gz)"
+
+class BackupThread(QThread):
+    """Runs a backup_service call off the GUI thread."""
+    progress = Signal(int, int)  # pages copied, total pages
+    completed = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+    def __init__(self, task, *args, cancellable=True, parent=None):
+        super().__init__(parent)
+        self.task, self.args, self.cancellable = task, args, cancellable
+
+    def run(self):
+        kwargs = {"should_stop": self.isInterruptionRequested} if self.cancellable else {}
+        try:
+            result = self.task(*self.args, progress=self.progress.emit, **kwargs)
+        except backup_service.BackupCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(result)
+
+class QueryStatsDialog(QDialog):
+    """Shows the per-function and per-SQL statistics collected by database/instrumentation.py."""
+    COLUMNS = [("Name", "name"), ("Calls", "calls"), ("Errors", "errors"), ("Rows", "rows"),
+               ("Total (ms)", "total_ms"), ("Mean (ms)", "mean_ms"), ("Max (ms)", "max_ms")]
+
+    def __init__(self, stats, parent=None):
+        super().__init__(parent)
+        self.stats = stats
+        self.setWindowTitle("Query Statistics"); self.setMinimumSize(1000, 600)
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        self.tabs = QTabWidget()
+        self.functions_table = QTableView(); self.statements_table = QTableView()
+        self.tabs.addTab(self.functions_table, "Functions"); self.tabs.addTab(self.statements_table, "SQL Statements")
+        layout.addWidget(self.tabs)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        refresh_button = buttons.addButton("Refresh", QDialogButtonBox.ActionRole)
+        reset_button = buttons.addButton("Reset", QDialogButtonBox.ActionRole)
+        save_button = buttons.addButton("Save to File...", QDialogButtonBox.ActionRole)
+        buttons.rejected.connect(self.reject)
+        refresh_button.clicked.connect(self.refresh)
+        reset_button.clicked.connect(self.reset)
+        save_button.clicked.connect(self.save)
+        layout.addWidget(buttons)
+        self.refresh()
+
+    @staticmethod
+    def _format(entries):
+        return [{**e, "total_ms": f"{e['total_ms']:.2f}", "mean_ms": f"{e['mean_ms']:.3f}", "max_ms": f"{e['max_ms']:.2f}"} for e in entries]
+
+    def refresh(self):
+        snapshot = self.stats.snapshot()
+        cache = reference_cache.stats()
+        self.summary_label.setText(f"Since {snapshot['started']}: {len(snapshot['functions'])} functions, "
+                                   f"{len(snapshot['statements'])} statements, {snapshot['slow_queries']} slow queries "
+                                   f"(over {snapshot['slow_query_ms']:g} ms). Reference cache: {cache['hits']} hits, "
+                                   f"{cache['misses']} misses, {cache['entries']}/{cache['max_entries']} entries"
+                                   f"{'' if cache['enabled'] else ' (disabled)'}.")
+        for table, key in ((self.functions_table, "functions"), (self.statements_table, "statements")):
+            configure_table_view(table, RecordTableModel(self._format(snapshot[key]), self.COLUMNS, table))
+
+    def reset(self):
+        self.stats.reset()
+        self.refresh()
+
+    def save(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Query Statistics", "query_stats.json", "JSON Files (*.json)")
+        if path:
+            try:
+                self.stats.dump(path)
+            except OSError as e:
+                QMessageBox.critical(self, "Save Failed", f"An error occurred: {e}")
+
+class SnapshotsDialog(QDialog):
+    """Lists the snapshots in the backup store (shared/backup_store.py) and restores or prunes them."""
+    COLUMNS = [("Snapshot", "id"), ("Taken", "created_at"), ("Database Size", "size_text"), ("Stored", "stored_text")]
+
+    def __init__(self, settings_view):
+        super().__init__(settings_view)
+        self.settings_view = settings_view
+        self.setWindowTitle("Backup Snapshots"); self.setMinimumSize(700, 450)
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        self.table = QTableView()
+        layout.addWidget(self.table)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        snapshot_button = buttons.addButton("Take Snapshot Now", QDialogButtonBox.ActionRole)
+        restore_button = buttons.addButton("Restore Selected", QDialogButtonBox.ActionRole)
+        prune_button = buttons.addButton("Prune Old Snapshots", QDialogButtonBox.ActionRole)
+        buttons.rejected.connect(self.reject)
+        snapshot_button.clicked.connect(self.take_snapshot)
+        restore_button.clicked.connect(self.restore_selected)
+        prune_button.clicked.connect(self.prune)
+        layout.addWidget(buttons)
+        self.refresh()
+
+    def refresh(self):
+        rows = [{**m, "size_text": f"{m['size'] / 1e6:.1f} MB", "stored_text": f"+{m['stored_bytes'] / 1e6:.2f} MB"} for m in reversed(backup_store.snapshots())]
+        configure_table_view(self.table, RecordTableModel(rows, self.COLUMNS, self.table))
+        stats = backup_store.stats()
+        self.summary_label.setText(f"{stats['snapshots']} snapshots of {stats['logical_bytes'] / 1e6:.1f} MB in total, "
+                                   f"stored in {stats['stored_bytes'] / 1e6:.1f} MB.")
+
+    def take_snapshot(self):
+        self.settings_view.run_backup_task("Snapshot", "Taking a snapshot...", BackupThread(backup_store.snapshot, parent=self),
+                                           lambda _: self.refresh())
+
+    def restore_selected(self):
+        snapshot_id = selected_row_id(self.table)
+        if snapshot_id is None:
+            QMessageBox.warning(self, "No Selection", "Please select a snapshot to restore."); return
+        snapshot = backup_store.get(snapshot_id)
+        reply = QMessageBox.warning(self, "Confirm Restore",
+                                    f"Restore the database to the snapshot taken {snapshot['created_at']}?\nAll changes made since then will be lost.",
+                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.settings_view.run_backup_task("Restore", "Restoring the snapshot...",
+                                               BackupThread(backup_store.restore, snapshot["id"], cancellable=False, parent=self),
+                                               lambda _: QMessageBox.information(self, "Success", "Database successfully restored."))
+
+    def prune(self):
+        snapshots, chunks = backup_store.prune()
+        self.refresh()
+        QMessageBox.information(self, "Pruned", f"Removed {snapshots} snapshots and {chunks} unused chunks.")
 
 class SettingsView(QWidget):
     def __init__(self):
@@ -34,6 +174,11 @@ class SettingsView(QWidget):
         profile_layout.addRow("Company Address:", self.company_address_input)
         profile_layout.addRow("Company Logo:", self.logo_path_input)
         profile_layout.addRow(logo_button)
+
+        self.numbering_combo = QComboBox()
+        self.numbering_combo.addItem("Restart every year (INV-2026-001)", userData="yearly")
+        self.numbering_combo.addItem("One running sequence across years", userData="global")
+        profile_layout.addRow("Invoice Numbering:", self.numbering_combo)
         
         save_profile_button = QPushButton("Save Profile Settings")
         save_profile_button.setIcon(self.style().standardIcon(QStyle.SP_DialogSaveButton))
@@ -49,38 +194,71 @@ class SettingsView(QWidget):
         db_actions_layout = QHBoxLayout()
         backup_button = QPushButton("Backup Database"); backup_button.setIcon(self.style().standardIcon(QStyle.SP_DriveHDIcon))
         restore_button = QPushButton("Restore Backup"); restore_button.setIcon(self.style().standardIcon(QStyle.SP_BrowserReload))
+        snapshots_button = QPushButton("Snapshots..."); snapshots_button.setIcon(self.style().standardIcon(QStyle.SP_FileDialogContentsView))
         db_actions_layout.addWidget(backup_button)
         db_actions_layout.addWidget(restore_button)
+        db_actions_layout.addWidget(snapshots_button)
+
+        schedule_layout = QHBoxLayout()
+        self.backup_interval_spin = QSpinBox(); self.backup_interval_spin.setRange(0, 24 * 30); self.backup_interval_spin.setSuffix(" h")
+        self.backup_interval_spin.setSpecialValueText("Off")
+        self.backup_interval_spin.setToolTip("Take a snapshot in the background whenever the newest one is older than this.")
+        schedule_layout.addWidget(QLabel("Automatic snapshots every:"))
+        schedule_layout.addWidget(self.backup_interval_spin)
+        schedule_layout.addStretch(1)
         
         # Export Actions
         export_layout = QHBoxLayout()
-        self.export_projects_btn = QPushButton("Export Projects (CSV)")
-        self.export_projects_btn.setIcon(self.style().standardIcon(QStyle.SP_DialogSaveButton))
-        self.export_clients_btn = QPushButton("Export Clients (CSV)")
-        self.export_clients_btn.setIcon(self.style().standardIcon(QStyle.SP_DialogSaveButton))
-        export_layout.addWidget(self.export_projects_btn)
-        export_layout.addWidget(self.export_clients_btn)
+        self.export_combo = QComboBox()
+        for name, exporter in EXPORTERS.items():
+            self.export_combo.addItem(exporter["title"], userData=name)
+        self.export_btn = QPushButton("Export to CSV...")
+        self.export_btn.setIcon(self.style().standardIcon(QStyle.SP_DialogSaveButton))
+        export_layout.addWidget(self.export_combo)
+        export_layout.addWidget(self.export_btn)
+        export_layout.addStretch(1)
         
         data_layout.addLayout(db_actions_layout)
+        data_layout.addLayout(schedule_layout)
         data_layout.addWidget(QLabel("Export Data:"))
         data_layout.addLayout(export_layout)
 
         backup_button.clicked.connect(self.backup_database)
         restore_button.clicked.connect(self.restore_database)
-        self.export_projects_btn.clicked.connect(self.export_projects)
-        self.export_clients_btn.clicked.connect(self.export_clients)
+        snapshots_button.clicked.connect(lambda: SnapshotsDialog(self).exec())
+        self.backup_interval_spin.valueChanged.connect(lambda hours: save_setting(INTERVAL_SETTING, str(hours)))
+        self.export_btn.clicked.connect(lambda: export_data(self, self.export_combo.currentData()))
 
         self.layout.addWidget(data_group)
 
+        # --- Diagnostics Group ---
+        diagnostics_group = QGroupBox("Diagnostics")
+        diagnostics_layout = QHBoxLayout(diagnostics_group)
+        query_stats_button = QPushButton("View Query Statistics")
+        query_stats_button.setIcon(self.style().standardIcon(QStyle.SP_FileDialogDetailedView))
+        query_stats_button.clicked.connect(self.show_query_stats)
+        diagnostics_layout.addWidget(query_stats_button)
+        diagnostics_layout.addStretch(1)
+        self.layout.addWidget(diagnostics_group)
+
         self.layout.addStretch()
         self.load_settings()
 
+    def refresh_data(self):
+        self.load_settings()
+
     def load_settings(self):
         """Loads all saved settings from the database and populates the fields."""
         settings = get_all_settings()
         self.company_name_input.setText(settings.get('company_name', ''))
         self.company_address_input.setText(settings.get('company_address', ''))
         self.logo_path_input.setText(settings.get('logo_path', ''))
+        self.numbering_combo.setCurrentIndex(max(0, self.numbering_combo.findData(settings.get(SERIES_SETTING, SERIES_MODES[0]))))
+        try:
+            hours = int(float(settings.get(INTERVAL_SETTING, DEFAULT_INTERVAL_HOURS)))
+        except ValueError:
+            hours = DEFAULT_INTERVAL_HOURS
+        self.backup_interval_spin.blockSignals(True); self.backup_interval_spin.setValue(hours); self.backup_interval_spin.blockSignals(False)
 
     def browse_logo(self):
         """Opens a file dialog to select a logo image."""
@@ -93,69 +271,57 @@ class SettingsView(QWidget):
         save_setting('company_name', self.company_name_input.text())
         save_setting('company_address', self.company_address_input.text())
         save_setting('logo_path', self.logo_path_input.text())
+        if self.numbering_combo.currentData() != get_all_settings().get(SERIES_SETTING, SERIES_MODES[0]):
+            set_invoice_number_series(self.numbering_combo.currentData())
         QMessageBox.information(self, "Success", "Company profile settings have been saved successfully.")
 
-    def backup_database(self):
-        db_path = os.path.join(os.getcwd(), 'database', 'freelancer_hub.db')
-        if not os.path.exists(db_path):
-            QMessageBox.warning(self, "No Database", "Database file not found."); return
+    def show_query_stats(self):
+        stats = instrumentation.get_stats()
+        if stats is None:
+            QMessageBox.information(self, "Query Statistics Disabled",
+                                    f"Query instrumentation is off.\nStart the application with {instrumentation.PROFILE_ENV}=1 to collect statistics.")
+            return
+        QueryStatsDialog(stats, self).exec()
+
+    def run_backup_task(self, title, label, thread, on_completed):
+        """Runs a BackupThread behind a progress dialog (cancellable if the thread is)."""
+        dialog = QProgressDialog(label, "Cancel", 0, 0, self)
+        if not thread.cancellable: dialog.setCancelButton(None)
+        dialog.setWindowTitle(title); dialog.setMinimumDuration(300); dialog.setAutoClose(False); dialog.setAutoReset(False)
+        def on_progress(done, total):
+            dialog.setMaximum(total); dialog.setValue(done)
+        def on_failed(message):
+            dialog.close(); QMessageBox.critical(self, f"{title} Failed", f"An error occurred: {message}")
+        thread.progress.connect(on_progress)
+        thread.completed.connect(lambda result: (dialog.close(), on_completed(result)))
+        thread.failed.connect(on_failed)
+        thread.cancelled.connect(dialog.close)
+        thread.finished.connect(thread.deleteLater)
+        dialog.canceled.connect(thread.requestInterruption)
+        thread.start()
+        dialog.show()
 
+    def backup_database(self):
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         backup_name = f"freelancer_hub_backup_{timestamp}.db"
-        
-        save_path, _ = QFileDialog.getSaveFileName(self, "Save Database Backup", backup_name, "Database Files (*.db)")
-        if save_path:
-            try:
-                shutil.copy(db_path, save_path)
-                QMessageBox.information(self, "Success", f"Database successfully backed up to:\n{save_path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Backup Failed", f"An error occurred: {e}")
+
+        save_path, selected_filter = QFileDialog.getSaveFileName(self, "Save Database Backup", backup_name, BACKUP_FILTER)
+        if not save_path: return
+        if selected_filter.startswith("Compressed") and not save_path.lower().endswith(".gz"):
+            save_path += ".gz"
+        self.run_backup_task("Backup", "Backing up the database...", BackupThread(backup_service.backup_database, save_path, parent=self),
+                             lambda result: QMessageBox.information(self, "Success", f"Database successfully backed up and verified:\n{result['path']}"))
 
     def restore_database(self):
         reply = QMessageBox.warning(self, "Confirm Restore", 
-                                    "Restoring from a backup will OVERWRITE all current data.\nThis action cannot be undone. Are you sure you want to continue?",
+                                    "Restoring from a backup will REPLACE all current data.\n"
+                                    "The current database is kept next to it as freelancer_hub.db.pre-restore until the next restore.\n"
+                                    "Are you sure you want to continue?",
                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.No: return
 
-        db_path = os.path.join(os.getcwd(), 'database', 'freelancer_hub.db')
-        backup_path, _ = QFileDialog.getOpenFileName(self, "Select Backup to Restore", "", "Database Files (*.db)")
-
+        backup_path, _ = QFileDialog.getOpenFileName(self, "Select Backup to Restore", "", "Database Backups (*.db *.db.gz);;All Files (*)")
         if backup_path:
-            try:
-                shutil.copy(backup_path, db_path)
-                QMessageBox.information(self, "Success", "Database successfully restored.\nPlease restart the application for changes to take effect.")
-            except Exception as e:
-                QMessageBox.critical(self, "Restore Failed", f"An error occurred: {e}")
-
-    def export_projects(self):
-        from database.database_manager import get_all_projects_with_client_name
-        from shared.export_manager import export_to_csv
-        
-        # Fetch Data
-        raw_data = get_all_projects_with_client_name() # Returns list of dicts
-        
-        # Prepare for CSV (order matters)
-        headers = ["Project ID", "Name", "Client", "Rate", "Status"]
-        rows = []
-        for p in raw_data:
-            rows.append([
-                p.get("id"),
-                p.get("name"),
-                p.get("client_name"),
-                f"${p.get('rate', 0)}/hr",
-                p.get("status", "Pending")
-            ])
-            
-        export_to_csv(self, headers, rows, "projects_export.csv")
-
-    def export_clients(self):
-        from database.database_manager import get_all_clients
-        from shared.export_manager import export_to_csv
-        
-        raw_data = get_all_clients()
-        headers = ["Client ID", "Name", "Email", "Phone"]
-        rows = []
-        for c in raw_data:
-            rows.append([c.get("id"), c.get("name"), c.get("email"), c.get("phone")])
-            
-        export_to_csv(self, headers, rows, "clients_export.csv")
\ No newline at end of file
+            self.run_backup_task("Restore", "Restoring the database...",
+                                 BackupThread(backup_service.restore_database, backup_path, cancellable=False, parent=self),
+                                 lambda _: QMessageBox.information(self, "Success", "Database successfully restored."))
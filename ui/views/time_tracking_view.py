@@ -1,11 +1,13 @@
 # ui/views/time_tracking_view.py
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QPushButton, QLabel, QTableWidget,
-                               QTableWidgetItem, QHeaderView, QLineEdit, QMessageBox, QFrame, QStyle)
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QPushButton, QLabel, QTableView,
+                               QLineEdit, QMessageBox, QFrame, QStyle)
+from PySide6.QtCore import QTimer
 # Import the new delete function
 from database.database_manager import (get_all_projects_with_client_name, start_time_entry,
-                                       stop_time_entry, get_time_entries_for_project,
-                                       delete_time_entry)
+                                       stop_time_entry, delete_time_entry, get_search_result_parent)
+from shared.query_executor import get_query_executor
+from ui.widgets.loading_indicator import LoadingIndicator
+from ui.widgets.sql_table_model import SqlTableModel, configure_table_view, select_row_id, selected_row_id
 from datetime import datetime, timedelta
 
 class TimeTrackingView(QWidget):
@@ -19,8 +21,11 @@ class TimeTrackingView(QWidget):
         self.setup_ui()
 
     def setup_ui(self):
+        header_layout = QHBoxLayout()
         header = QLabel("Time Tracker"); header.setObjectName("HeaderLabel")
-        self.layout.addWidget(header)
+        self.loading_indicator = LoadingIndicator()
+        header_layout.addWidget(header); header_layout.addStretch(1); header_layout.addWidget(self.loading_indicator)
+        self.layout.addLayout(header_layout)
         timer_frame = QFrame(); timer_frame.setObjectName("KPICard")
         timer_layout = QHBoxLayout(timer_frame)
         self.project_combo = QComboBox(); self.project_combo.setPlaceholderText("Select a Project to Track")
@@ -32,10 +37,14 @@ class TimeTrackingView(QWidget):
         timer_layout.addWidget(self.description_input, 3); timer_layout.addWidget(self.timer_label); timer_layout.addWidget(self.start_stop_button)
         self.layout.addWidget(timer_frame)
 
-        self.entries_table = QTableWidget(); self.entries_table.setColumnCount(4)
-        self.entries_table.setHorizontalHeaderLabels(["Date", "Duration", "Description", "Billed?"])
-        self.entries_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.entries_table.setSelectionBehavior(QTableWidget.SelectRows); self.entries_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.entries_model = SqlTableModel("time_entries", [
+            ("Date", "start_time", lambda start: datetime.fromisoformat(start).strftime('%Y-%m-%d')),
+            ("Duration", "duration_minutes", lambda minutes: str(timedelta(minutes=minutes if minutes else 0))),
+            ("Description", "description", None),
+            ("Billed?", "is_billed", lambda billed: "Yes" if billed else "No"),
+        ])
+        self.entries_model.bind_loading_indicator(self.loading_indicator)
+        self.entries_table = QTableView(); configure_table_view(self.entries_table, self.entries_model)
         self.layout.addWidget(self.entries_table)
         
         # --- NEW: Delete button ---
@@ -53,13 +62,26 @@ class TimeTrackingView(QWidget):
 
     def refresh_data(self):
         self.load_projects()
-        self.project_changed()
 
     def load_projects(self):
-        current_project_id = None
-        if self.project_combo.currentData(): current_project_id = self.project_combo.currentData()['id']
+        """Reloads the project list in the background, then the entries of the selected project."""
+        self.loading_indicator.start()
+        get_query_executor().submit(get_all_projects_with_client_name, key="time_tracking_projects",
+                                    on_result=self.populate_projects, on_error=self.loading_indicator.show_error)
+
+    def select_record(self, kind, record_id):
+        """Selects the time entry's project, then scrolls to the entry."""
+        self.loading_indicator.start()
+        # Same key as load_projects, so it replaces the reload refresh_data has just started.
+        get_query_executor().submit(lambda: (get_all_projects_with_client_name(), get_search_result_parent(kind, record_id)), key="time_tracking_projects",
+                                    on_result=lambda result: self.populate_projects(*result, select_entry_id=record_id),
+                                    on_error=self.loading_indicator.show_error)
+
+    def populate_projects(self, projects, current_project_id=None, select_entry_id=None):
+        if current_project_id is None and self.project_combo.currentData(): current_project_id = self.project_combo.currentData()['id']
+        # Repopulating the combo fires currentIndexChanged for every step; load entries once at the end.
+        self.project_combo.blockSignals(True)
         self.project_combo.clear()
-        projects = get_all_projects_with_client_name()
         for p in projects: self.project_combo.addItem(f"{p['name']} ({p['client_name']})", userData=p)
         if current_project_id:
             index_to_set = -1
@@ -68,28 +90,18 @@ class TimeTrackingView(QWidget):
                     index_to_set = i
                     break
             if index_to_set != -1: self.project_combo.setCurrentIndex(index_to_set)
+        self.project_combo.blockSignals(False)
+        self.project_changed()
+        if select_entry_id is not None: select_row_id(self.entries_table, select_entry_id)
 
     def project_changed(self):
         project = self.project_combo.currentData()
         if project: self.refresh_entries_table(project['id'])
-        else: self.entries_table.setRowCount(0)
+        else: self.entries_model.clear()
 
     def refresh_entries_table(self, project_id):
-        self.entries_table.setRowCount(0)
-        entries = get_time_entries_for_project(project_id)
-        for row, entry in enumerate(entries):
-            self.entries_table.insertRow(row)
-            date = datetime.fromisoformat(entry['start_time']).strftime('%Y-%m-%d')
-            duration_minutes = entry.get('duration_minutes', 0)
-            duration = str(timedelta(minutes=duration_minutes if duration_minutes else 0))
-            billed_status = "Yes" if entry['is_billed'] else "No"
-            # --- CRITICAL CHANGE for Delete ---
-            date_item = QTableWidgetItem(date); date_item.setData(Qt.UserRole, entry['id'])
-            
-            self.entries_table.setItem(row, 0, date_item)
-            self.entries_table.setItem(row, 1, QTableWidgetItem(duration))
-            self.entries_table.setItem(row, 2, QTableWidgetItem(entry.get('description')))
-            self.entries_table.setItem(row, 3, QTableWidgetItem(billed_status))
+        """Shows the project's time entries; rows are fetched page by page as the table scrolls."""
+        self.entries_model.set_filters({"project_id": project_id})
 
     def toggle_timer(self):
         if self.live_timer.isActive():
@@ -131,14 +143,10 @@ class TimeTrackingView(QWidget):
             self.timer_label.setText(str(timedelta(seconds=int(elapsed.total_seconds()))))
 
     def delete_selected_entry(self):
-        selected_items = self.entries_table.selectedItems()
-        if not selected_items:
+        entry_id = selected_row_id(self.entries_table)
+        if entry_id is None:
             QMessageBox.warning(self, "No Selection", "Please select a time entry from the table to delete.")
             return
-            
-        selected_row = selected_items[0].row()
-        entry_item = self.entries_table.item(selected_row, 0)
-        entry_id = entry_item.data(Qt.UserRole)
         
         reply = QMessageBox.question(self, "Confirm Deletion", "Are you sure you want to delete this time entry?",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
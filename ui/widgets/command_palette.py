@@ -0,0 +1,74 @@
+# ui/widgets/command_palette.py
+
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+from PySide6.QtCore import Qt, Signal
+from shared.fuzzy_index import palette_index, KIND_LABELS
+from shared.query_executor import get_query_executor
+
+# Sidebar page that lists each kind of entity (see VIEWS in main_window.py); pages jump to themselves.
+ENTITY_PAGES = {"project": 1, "invoice": 3, "client": 5}
+MAX_RESULTS = 30
+
+
+class CommandPalette(QDialog):
+    """Ctrl+K palette: type part of a page, client, project or invoice number and press Enter to jump to it."""
+    entry_activated = Signal(str, int)  # kind, id
+
+    def __init__(self, pages, parent=None):
+        super().__init__(parent)
+        self.setWindowFlags(Qt.Popup | Qt.FramelessWindowHint)
+        self.setMinimumWidth(560)
+        layout = QVBoxLayout(self)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Jump to a page, client, project or invoice...")
+        self.results_list = QListWidget()
+        self.status_label = QLabel()
+        layout.addWidget(self.search_input)
+        layout.addWidget(self.results_list)
+        layout.addWidget(self.status_label)
+
+        # The index answers in a few milliseconds, so every keystroke searches without a debounce.
+        self.search_input.textChanged.connect(self.update_results)
+        self.search_input.returnPressed.connect(self.activate_current)
+        self.results_list.itemActivated.connect(self.activate_current)
+        self.search_input.installEventFilter(self)
+
+        palette_index.set_pages(pages)
+        self.update_results()
+        # Built on first use, then only the sources written since the last refresh are re-synced.
+        if len(palette_index) <= len(pages):
+            self.status_label.setText("Indexing...")
+        get_query_executor().submit(palette_index.refresh, key="command_palette_refresh",
+                                    on_result=self.on_refreshed, on_error=lambda message: self.status_label.setText(f"Indexing failed: {message}"))
+
+    def on_refreshed(self, changed):
+        self.status_label.clear()
+        if changed:
+            self.update_results()
+
+    def update_results(self):
+        self.results_list.clear()
+        for entry in palette_index.search(self.search_input.text(), MAX_RESULTS):
+            text = f"{KIND_LABELS[entry['kind']]}:  {entry['label']}" + (f"  ·  {entry['detail']}" if entry["detail"] else "")
+            item = QListWidgetItem(text)
+            item.setData(Qt.UserRole, (entry["kind"], entry["id"]))
+            self.results_list.addItem(item)
+        if self.results_list.count():
+            self.results_list.setCurrentRow(0)
+
+    def eventFilter(self, watched, event):
+        # Up/Down move through the results while the focus stays in the search box.
+        if watched is self.search_input and event.type() == event.Type.KeyPress and event.key() in (Qt.Key_Up, Qt.Key_Down):
+            step = -1 if event.key() == Qt.Key_Up else 1
+            row = self.results_list.currentRow() + step
+            if 0 <= row < self.results_list.count():
+                self.results_list.setCurrentRow(row)
+            return True
+        return super().eventFilter(watched, event)
+
+    def activate_current(self, *_):
+        item = self.results_list.currentItem()
+        if item is not None:
+            kind, entity_id = item.data(Qt.UserRole)
+            self.entry_activated.emit(kind, entity_id)
+            self.accept()
@@ -0,0 +1,62 @@
+# ui/widgets/global_search.py
+
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QTableView, QLabel
+from PySide6.QtCore import QTimer, Signal
+from database.database_manager import search_all
+from database.search import KIND_LABELS
+from shared.query_executor import get_query_executor
+from ui.widgets.sql_table_model import RecordTableModel, configure_table_view
+
+# Sidebar page that lists each kind of search result (see VIEWS in main_window.py).
+RESULT_PAGES = {"project": 1, "time_entry": 2, "invoice_item": 3, "expense": 4, "client": 5}
+
+
+class SearchDialog(QDialog):
+    """Full-text search over the whole database (database/search.py), refreshed as you type."""
+    COLUMNS = [("Type", "kind_label"), ("Record", "label"), ("Match", "snippet")]
+    result_activated = Signal(str, int)  # kind, record id
+
+    def __init__(self, query="", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Search"); self.setMinimumSize(900, 500)
+        layout = QVBoxLayout(self)
+        self.search_input = QLineEdit(query)
+        self.search_input.setPlaceholderText('Search time entries, invoices, clients, projects and expenses ("quoted phrase", prefixes)')
+        self.status_label = QLabel()
+        self.results_table = QTableView()
+        self.results = []
+        configure_table_view(self.results_table, RecordTableModel([], self.COLUMNS, self.results_table))
+        layout.addWidget(self.search_input)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.results_table)
+
+        # Wait for a pause in typing before querying.
+        self.debounce = QTimer(self); self.debounce.setSingleShot(True); self.debounce.setInterval(150)
+        self.debounce.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(self.debounce.start)
+        self.search_input.returnPressed.connect(self.activate_current)
+        self.results_table.doubleClicked.connect(self.activate_current)
+        if query:
+            self.run_search()
+
+    def run_search(self):
+        query = self.search_input.text().strip()
+        if not query:
+            self.show_results([]); return
+        get_query_executor().submit(search_all, query, key="global_search", on_result=self.show_results,
+                                    on_error=lambda message: self.status_label.setText(f"Search failed: {message}"))
+
+    def show_results(self, results):
+        self.results = [{**hit, "kind_label": KIND_LABELS[hit["kind"]],
+                         "label": " · ".join(part for part in (hit["title"], hit["context"]) if part)} for hit in results]
+        configure_table_view(self.results_table, RecordTableModel(self.results, self.COLUMNS, self.results_table))
+        if self.results:
+            self.results_table.selectRow(0)
+        self.status_label.setText(f"{len(self.results)} results" if self.search_input.text().strip() else "")
+
+    def activate_current(self):
+        rows = self.results_table.selectionModel().selectedRows() if self.results_table.selectionModel() else []
+        if rows and rows[0].row() < len(self.results):
+            hit = self.results[rows[0].row()]
+            self.result_activated.emit(hit["kind"], hit["id"])
+            self.accept()
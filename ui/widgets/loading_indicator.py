@@ -0,0 +1,24 @@
+# ui/widgets/loading_indicator.py
+
+from PySide6.QtWidgets import QLabel
+from PySide6.QtCore import Qt
+
+class LoadingIndicator(QLabel):
+    """A small status label shown while a view waits for background data."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("LoadingIndicator")
+        self.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.setVisible(False)
+
+    def start(self, text="Loading..."):
+        self.setText(text)
+        self.setVisible(True)
+
+    def stop(self):
+        self.setVisible(False)
+
+    def show_error(self, message):
+        """Keeps the indicator visible with the error instead of the loading text."""
+        self.setText(f"Failed to load data: {message}")
+        self.setVisible(True)
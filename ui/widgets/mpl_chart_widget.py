@@ -1,18 +1,33 @@
 # ui/widgets/mpl_chart_widget.py
 
 from PySide6.QtWidgets import QWidget, QVBoxLayout
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
 
 class MplChartWidget(QWidget):
-    """A custom widget to embed a Matplotlib chart into a PySide6 application."""
+    """
+    A custom widget to embed a Matplotlib chart into a PySide6 application.
+    Matplotlib is imported and the canvas created on the first plot, so
+    building the widget does not delay the first paint of its view.
+    """
     def __init__(self, parent=None):
         super().__init__(parent)
-        
+        self.figure = None
+        self.canvas = None
+
+        # --- Layout ---
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0,0,0,0)
+        self.setLayout(layout)
+
+    def _ensure_canvas(self):
+        if self.canvas is not None:
+            return
+        from matplotlib import style
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
         # --- Matplotlib Figure Setup ---
         # Use a style that complements dark themes
-        plt.style.use('dark_background')
+        style.use('dark_background')
         
         # Create a figure with a transparent background to blend with our app's theme
         self.figure = Figure(figsize=(5, 3), dpi=100)
@@ -20,15 +35,11 @@ class MplChartWidget(QWidget):
         
         self.canvas = FigureCanvas(self.figure)
         self.canvas.setStyleSheet("background-color:transparent;")
-
-        # --- Layout ---
-        layout = QVBoxLayout()
-        layout.setContentsMargins(0,0,0,0)
-        layout.addWidget(self.canvas)
-        self.setLayout(layout)
+        self.layout().addWidget(self.canvas)
 
     def plot_bar_chart(self, x_data, y_data, title):
         """Clears the previous plot and draws a new styled bar chart."""
+        self._ensure_canvas()
         self.figure.clear()
         ax = self.figure.add_subplot(111)
         
@@ -51,4 +62,4 @@ class MplChartWidget(QWidget):
         ax.spines['left'].set_color('#494d64')
         
         self.figure.tight_layout() # Adjust plot to prevent labels overlapping
-        self.canvas.draw()
\ No newline at end of file
+        self.canvas.draw()
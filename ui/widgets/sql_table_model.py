@@ -0,0 +1,245 @@
+# ui/widgets/sql_table_model.py
+
+from PySide6.QtWidgets import QHeaderView, QAbstractItemView
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+from database.database_manager import get_table_page, get_table_page_through, get_table_source_columns, TABLE_SOURCES
+from shared.query_executor import get_query_executor
+
+# Rows fetched per fetchMore() call; roughly a few screens of a QTableView.
+PAGE_SIZE = 200
+
+
+class SqlTableModel(QAbstractTableModel):
+    """
+    A read-only table model over one of database_manager.TABLE_SOURCES.
+
+    Rows are fetched lazily, a page at a time, as the view scrolls
+    (canFetchMore/fetchMore), on the background query executor, using keyset
+    pagination so deep pages cost the same as the first one. Sorting is
+    pushed down to SQL ORDER BY. Qt.UserRole returns the row's database id for
+    every column, so code that used QTableWidgetItem.data(Qt.UserRole) keeps working.
+
+    `columns` is a list of (header, field, formatter) tuples; `field` is a column of
+    the source's SELECT and `formatter` (optional) turns the raw value into display text.
+    """
+    loading_started = Signal()
+    loading_finished = Signal()
+    load_failed = Signal(str)
+
+    def __init__(self, source, columns, filters=None, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.columns = columns
+        self.filters = dict(filters or {})
+        field_index = {name: i for i, name in enumerate(get_table_source_columns(source))}
+        self._field_positions = [field_index[field] for _, field, _ in columns]
+        self._sort_keys = TABLE_SOURCES[source]['sort_keys']
+        self.sort_key, self.descending = TABLE_SOURCES[source]['default_sort']
+        self._rows = []
+        self._exhausted = True  # Nothing is fetched until the first reload()
+        self._fetching = False
+        self._request_key = f"table_model_{id(self)}"
+
+    # --- Loading ---
+    def reload(self):
+        """Discards loaded rows and fetches the first page again."""
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self._fetching = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def clear(self):
+        """Empties the model without fetching anything."""
+        get_query_executor().cancel(self._request_key)
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = True
+        self._fetching = False
+        self.endResetModel()
+        self.loading_finished.emit()
+
+    def set_filters(self, filters):
+        self.filters = dict(filters or {})
+        self.reload()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._exhausted and not self._fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._fetching = True
+        self.loading_started.emit()
+        # Keyset cursor: the (sort value, id) of the last loaded row, appended by get_table_page
+        after = (self._rows[-1][-1], self._rows[-1][0]) if self._rows else None
+        get_query_executor().submit(get_table_page, self.source, self.sort_key, self.descending,
+                                    PAGE_SIZE, after, self.filters,
+                                    key=self._request_key, on_result=self._append_page, on_error=self._fetch_failed)
+
+    def locate(self, row_id, on_found):
+        """
+        Calls on_found(row) with the row number of the row whose id is `row_id`, first loading
+        the pages up to it in one query if needed. Nothing is called if the source has no such row.
+        """
+        row = self._find(row_id)
+        if row is not None:
+            on_found(row)
+            return
+        if self._exhausted and not self._fetching:
+            return
+        # Supersedes a page still in flight: the rows through `row_id` replace it.
+        self._fetching = True
+        self.loading_started.emit()
+        after = (self._rows[-1][-1], self._rows[-1][0]) if self._rows else None
+        get_query_executor().submit(get_table_page_through, self.source, row_id, self.sort_key, self.descending,
+                                    PAGE_SIZE, after, len(self._rows), self.filters,
+                                    key=self._request_key, on_result=lambda page: self._append_located(page, row_id, on_found),
+                                    on_error=self._fetch_failed)
+
+    def _find(self, row_id):
+        return next((row for row, values in enumerate(self._rows) if values[0] == row_id), None)
+
+    def _append_located(self, page, row_id, on_found):
+        self._append_page(page)
+        row = self._find(row_id)
+        if row is not None: on_found(row)
+
+    def _append_page(self, page):
+        self._fetching = False
+        if len(page) < PAGE_SIZE:
+            self._exhausted = True
+        if page:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+        self.loading_finished.emit()
+
+    def _fetch_failed(self, message):
+        self._fetching = False
+        self.load_failed.emit(message)
+
+    # --- Qt model interface ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            value = row[self._field_positions[index.column()]]
+            formatter = self.columns[index.column()][2]
+            if formatter is not None:
+                return formatter(value)
+            return "" if value is None else str(value)
+        if role == Qt.UserRole:
+            return row[0]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][0]
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if not 0 <= column < len(self.columns):
+            return
+        field = self.columns[column][1]
+        descending = order == Qt.DescendingOrder
+        if field not in self._sort_keys or (field, descending) == (self.sort_key, self.descending):
+            return
+        self.sort_key = field
+        self.descending = descending
+        self.reload()
+
+    def default_sort_section(self):
+        """Returns (column, Qt.SortOrder) for the source's default sort, or (-1, ...) if not shown."""
+        order = Qt.DescendingOrder if self.descending else Qt.AscendingOrder
+        for i, (_, field, _) in enumerate(self.columns):
+            if field == self.sort_key:
+                return i, order
+        return -1, order
+
+    def row_id(self, row):
+        return self._rows[row][0]
+
+    def bind_loading_indicator(self, indicator):
+        """Shows `indicator` (a LoadingIndicator) while pages are being fetched."""
+        self.loading_started.connect(indicator.start)
+        self.loading_finished.connect(indicator.stop)
+        self.load_failed.connect(indicator.show_error)
+
+
+class RecordTableModel(QAbstractTableModel):
+    """
+    A read-only table model over an in-memory list of dicts (e.g. controller output).
+    `columns` is a list of (header, key) tuples.
+    """
+
+    def __init__(self, records, columns, parent=None):
+        super().__init__(parent)
+        self.records = records
+        self.columns = columns
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.records[index.row()]
+        if role == Qt.DisplayRole:
+            value = record.get(self.columns[index.column()][1])
+            return "" if value is None else str(value)
+        if role == Qt.UserRole:
+            return record.get("id")
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][0]
+        return None
+
+
+def configure_table_view(view, model):
+    """Applies the settings the views used for their QTableWidgets and enables SQL sorting."""
+    view.setModel(model)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+    view.setSelectionBehavior(QAbstractItemView.SelectRows)
+    view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    if isinstance(model, SqlTableModel):
+        column, order = model.default_sort_section()
+        view.horizontalHeader().setSortIndicator(column, order)
+        view.setSortingEnabled(True)
+
+
+def select_row_id(view, row_id):
+    """Selects and scrolls to the row of a QTableView whose database id is `row_id`, once it is loaded."""
+    model = view.model()
+    def select(row):
+        view.selectRow(row)
+        view.scrollTo(model.index(row, 0), QAbstractItemView.PositionAtCenter)
+    if isinstance(model, SqlTableModel):
+        model.locate(row_id, select)
+    else:
+        row = next((row for row in range(model.rowCount()) if model.index(row, 0).data(Qt.UserRole) == row_id), None)
+        if row is not None: select(row)
+
+
+def selected_row_id(view):
+    """Returns the database id of the first selected row of a QTableView, or None."""
+    rows = view.selectionModel().selectedRows() if view.selectionModel() else []
+    if not rows:
+        return None
+    return rows[0].data(Qt.UserRole)